@@ -0,0 +1,496 @@
+"""Headless JSON API for the application tracker.
+
+Serves the tracker's data layer over HTTP without running the Streamlit
+script: every request calls the same add_*/get_*/search_applications/delete_*
+functions the UI uses, sharing their cached MongoClient (or local replica),
+per-user frame cache, insert batcher and rate limiter.
+
+Requests authenticate with HTTP Basic auth using a tracker account. List
+endpoints are paginated and every GET response carries an ETag, so clients
+revalidating with If-None-Match get an empty 304 when nothing changed.
+Responses are gzip-compressed when the client accepts it. Attachments are
+uploaded as the raw request body and streamed in both directions. Sync
+clients follow /api/events?after=<seq> to pick up changes incrementally.
+Log records carry the request's X-Request-ID (one is generated when the
+client sends none), which is echoed back in the response.
+
+Usage:
+    uvicorn api_server:app --port 8000
+
+    curl -u me@example.com:secret "http://localhost:8000/api/applications?page=1&page_size=20"
+"""
+
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from bson.errors import InvalidId
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import application_tracker_streamlit as tracker
+import structured_logging
+
+# Page size used when the client does not ask for one, and the largest allowed
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Verified credentials are trusted this long before the password is checked again
+AUTH_CACHE_SECONDS = int(os.getenv('API_AUTH_CACHE_SECONDS', '60'))
+
+# Responses smaller than this are sent uncompressed
+GZIP_MINIMUM_SIZE = 500
+
+# Collections exposed by the API and the data functions behind them
+COLLECTIONS = {
+    "applications": {
+        "list": lambda user_email: tracker.get_applications(user_email),
+        "delete": tracker.delete_application
+    },
+    "networking": {
+        "list": tracker.get_networking,
+        "delete": tracker.delete_networking
+    },
+    "notes": {
+        "list": lambda user_email: tracker.get_notes(user_email),
+        "delete": tracker.delete_note
+    },
+    "todos": {
+        "list": tracker.get_todos,
+        "delete": tracker.delete_todo
+    }
+}
+
+# Query parameters accepted by the application search and the arguments they map to
+SEARCH_PARAMETERS = {
+    "company": "company_filter",
+    "role": "role_filter",
+    "status": "status_filter",
+    "date_from": "date_from",
+    "date_to": "date_to",
+    "archive": "include_archive"
+}
+
+# ============================================================================
+# AUTHENTICATION
+# ============================================================================
+
+class CredentialCache:
+    """Remember recently verified credentials so each request skips the hash and query."""
+
+    def __init__(self, ttl_seconds):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._verified = {}     # sha256(email:password) -> expiry
+
+    def key(self, email, password):
+        return hashlib.sha256(f"{email}:{password}".encode()).hexdigest()
+
+    def check(self, email, password):
+        with self._lock:
+            expiry = self._verified.get(self.key(email, password))
+        return expiry is not None and expiry > time.monotonic()
+
+    def remember(self, email, password):
+        with self._lock:
+            now = time.monotonic()
+            # Drop expired entries so the cache stays the size of the active user set
+            self._verified = {key: expiry for key, expiry in self._verified.items() if expiry > now}
+            self._verified[self.key(email, password)] = now + self.ttl
+
+credentials = CredentialCache(AUTH_CACHE_SECONDS)
+
+def client_key(request):
+    """Rate limit key of the client sending a request."""
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def too_many_requests(retry_after):
+    return HTTPException(429, "Too many requests", headers={"Retry-After": str(retry_after)})
+
+def throttle(action, *keys):
+    """Charge a request to rate limit buckets, answering 429 when one is empty."""
+    limiter = tracker.get_rate_limiter()
+    for key in keys:
+        allowed, retry_after = limiter.acquire(action, key)
+        if not allowed:
+            raise too_many_requests(max(1, int(retry_after + 0.5)))
+
+def authenticate(request):
+    """Return the email of the account named in the Basic auth header."""
+    header = request.headers.get("authorization", "")
+    scheme, _, encoded = header.partition(" ")
+    if scheme.lower() != "basic" or not encoded:
+        raise HTTPException(401, "Authentication required", headers={"WWW-Authenticate": 'Basic realm="tracker"'})
+
+    try:
+        email, _, password = base64.b64decode(encoded).decode().partition(":")
+    except ValueError:
+        raise HTTPException(400, "Malformed Authorization header")
+
+    if not credentials.check(email, password):
+        throttle("login", f"email:{email.strip().lower()}", client_key(request))
+        if not tracker.verify_user(email, password):
+            raise HTTPException(401, "Invalid credentials", headers={"WWW-Authenticate": 'Basic realm="tracker"'})
+        credentials.remember(email, password)
+
+    throttle("api", email)
+    return email
+
+# ============================================================================
+# RESPONSES
+# ============================================================================
+
+def frame_records(frame):
+    """Convert a tracker DataFrame to JSON-ready records, leaving out display-only labels."""
+    if frame.empty:
+        return []
+    labels = [column for column in frame.columns if column.endswith(" Label")]
+    return json.loads(frame.drop(columns=labels).to_json(orient="records", date_format="iso"))
+
+def json_default(value):
+    """Encode the BSON and datetime values found in tracker documents."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def cached_json(request, payload):
+    """Send payload as JSON with an ETag, or an empty 304 when the client already has it."""
+    body = json.dumps(payload, default=json_default, separators=(",", ":")).encode()
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    # Compare against every tag the client sent, ignoring weak validators
+    sent = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in sent.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def page_parameters(request):
+    """Read and validate the page and page_size query parameters."""
+    try:
+        page = int(request.query_params.get("page", 1))
+        page_size = int(request.query_params.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise HTTPException(400, "page and page_size must be integers")
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise HTTPException(400, f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+    return page, page_size
+
+def paginate(request, frame, page, page_size):
+    """Serve one page of a DataFrame holding every matching row."""
+    start = (page - 1) * page_size
+    return cached_json(request, {
+        "page": page,
+        "page_size": page_size,
+        "total": len(frame),
+        "pages": (len(frame) + page_size - 1) // page_size,
+        "has_more": start + page_size < len(frame),
+        "items": frame_records(frame.iloc[start:start + page_size])
+    })
+
+async def read_json(request):
+    """Parse a JSON object request body."""
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Request body must be JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(400, "Request body must be a JSON object")
+    return payload
+
+def require(payload, *fields):
+    """Reject a payload missing any of the given fields."""
+    missing = [field for field in fields if not payload.get(field)]
+    if missing:
+        raise HTTPException(400, f"Missing fields: {', '.join(missing)}")
+
+# ============================================================================
+# ENDPOINTS
+# ============================================================================
+
+def health(request):
+    return JSONResponse({"status": "ok", "database": tracker.get_database() is not None})
+
+async def create_account(request):
+    payload = await read_json(request)
+    return await run_in_threadpool(save_account, request, payload)
+
+def save_account(request, payload):
+    require(payload, "email", "password")
+    throttle("signup", client_key(request))
+    if not tracker.create_user(payload['email'], payload['password']):
+        raise HTTPException(409, "This email is already registered")
+    return JSONResponse({"email": payload['email']}, status_code=201)
+
+def summary(request):
+    user_email = authenticate(request)
+    return cached_json(request, tracker.get_user_summary(user_email) or {})
+
+def list_items(request):
+    user_email = authenticate(request)
+    collection = request.path_params['collection']
+    if collection not in COLLECTIONS:
+        raise HTTPException(404, f"Unknown collection {collection}")
+    page, page_size = page_parameters(request)
+
+    filters = {
+        argument: request.query_params[parameter]
+        for parameter, argument in SEARCH_PARAMETERS.items()
+        if request.query_params.get(parameter)
+    }
+    if collection == "applications" and filters:
+        if "include_archive" in filters:
+            filters["include_archive"] = filters["include_archive"].lower() in ("1", "true", "yes")
+        for field in ("date_from", "date_to"):
+            if field in filters:
+                try:
+                    filters[field] = datetime.strptime(filters[field], '%Y-%m-%d').date()
+                except ValueError:
+                    raise HTTPException(400, f"{field} must be YYYY-MM-DD")
+
+        # Searches are not cached, so only fetch up to this page plus one row to tell if more follow
+        frame = tracker.search_applications(user_email, limit=page * page_size + 1, **filters)
+        start = (page - 1) * page_size
+        return cached_json(request, {
+            "page": page,
+            "page_size": page_size,
+            "has_more": len(frame) > start + page_size,
+            "items": frame_records(frame.iloc[start:start + page_size])
+        })
+
+    return paginate(request, COLLECTIONS[collection]['list'](user_email), page, page_size)
+
+def suggestions(request):
+    user_email = authenticate(request)
+    field = request.query_params.get("field", "company_name")
+    if field not in tracker.SUGGESTION_FIELDS:
+        raise HTTPException(400, f"field must be one of {', '.join(tracker.SUGGESTION_FIELDS)}")
+    return cached_json(request, {"items": tracker.suggest(user_email, field, request.query_params.get("prefix", ""))})
+
+def companies(request):
+    user_email = authenticate(request)
+    page, page_size = page_parameters(request)
+    return paginate(request, tracker.get_company_overview(user_email), page, page_size)
+
+def company_timeline(request):
+    user_email = authenticate(request)
+    events = tracker.get_company_view(user_email)
+    if not events.empty:
+        events = events[events['Company'] == request.path_params['company']]
+    if events.empty:
+        raise HTTPException(404, "Company not found")
+    return cached_json(request, {"items": frame_records(events)})
+
+def events(request):
+    user_email = authenticate(request)
+    try:
+        after = int(request.query_params.get("after", 0))
+        since = request.query_params.get("since")
+        since = datetime.fromisoformat(since) if since else None
+    except ValueError:
+        raise HTTPException(400, "after must be an integer and since an ISO timestamp")
+    _, page_size = page_parameters(request)
+
+    items = tracker.read_events(user_email, after, since=since, limit=page_size)
+    # Clients resume from "next"; it stays put while a missing event may still be in flight
+    return cached_json(request, {"items": items, "next": items[-1]['seq'] if items else after})
+
+def contact(request):
+    user_email = authenticate(request)
+    found = tracker.get_contact(user_email, request.query_params.get("linkedin_url"))
+    if found is None:
+        raise HTTPException(404, "Contact not found")
+    return cached_json(request, found)
+
+def note_body(request):
+    user_email = authenticate(request)
+    try:
+        body = tracker.get_note_body(request.path_params['item_id'], user_email)
+    except InvalidId:
+        body = None
+    if body is None:
+        raise HTTPException(404, "Note not found")
+    return cached_json(request, {"id": request.path_params['item_id'], "body": body})
+
+async def create_item(request):
+    # Authentication and the data layer block on MongoDB, so they run off the event loop
+    user_email = await run_in_threadpool(authenticate, request)
+    payload = await read_json(request)
+    return await run_in_threadpool(save_item, user_email, request.path_params['collection'], payload)
+
+def save_item(user_email, collection, payload):
+    if collection == "applications":
+        require(payload, "company_name", "role")
+        result = tracker.add_application(
+            user_email,
+            payload['company_name'],
+            payload['role'],
+            payload.get('url', ""),
+            payload.get('date_applied') or datetime.now().strftime('%Y-%m-%d'),
+            payload.get('notes', ""),
+            on_duplicate=payload.get('on_duplicate', "reject")
+        )
+        if result == tracker.ADD_DUPLICATE:
+            raise HTTPException(409, "You already track this application")
+    elif collection == "networking":
+        require(payload, "company_name")
+        result = tracker.add_networking(
+            user_email,
+            payload['company_name'],
+            payload.get('linkedin_url', ""),
+            payload.get('date_sent') or datetime.now().strftime('%Y-%m-%d'),
+            payload.get('notes', "")
+        )
+    elif collection == "notes":
+        require(payload, "title")
+        result = tracker.add_note(user_email, payload['title'], payload.get('body', ""))
+    elif collection == "todos":
+        require(payload, "task")
+        due_date = payload.get('due_date')
+        result = tracker.add_todo(
+            user_email,
+            payload['task'],
+            payload.get('priority', "Medium"),
+            datetime.strptime(due_date, '%Y-%m-%d') if due_date else None
+        )
+    else:
+        raise HTTPException(404, f"Unknown collection {collection}")
+
+    if not result:
+        raise HTTPException(503, "Could not save, please retry")
+    return JSONResponse({"result": result if isinstance(result, str) else tracker.ADD_INSERTED}, status_code=201)
+
+def delete_item(request):
+    user_email = authenticate(request)
+    collection = request.path_params['collection']
+    if collection not in COLLECTIONS:
+        raise HTTPException(404, f"Unknown collection {collection}")
+    if not COLLECTIONS[collection]['delete'](request.path_params['item_id'], user_email):
+        raise HTTPException(404, "Item not found")
+    return Response(status_code=204)
+
+def list_attachments(request):
+    user_email = authenticate(request)
+    return cached_json(request, {"items": tracker.get_attachments(request.path_params['app_id'], user_email)})
+
+async def upload_attachment(request):
+    user_email = await run_in_threadpool(authenticate, request)
+    filename = request.query_params.get("filename")
+    if not filename:
+        raise HTTPException(400, "Missing filename query parameter")
+
+    # Spool the body to disk as it arrives; the data layer then streams it into the store
+    limit = tracker.ATTACHMENT_MAX_MB * 1024 * 1024
+    with tempfile.TemporaryFile() as body:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > limit:
+                raise HTTPException(413, f"Attachments must be under {tracker.ATTACHMENT_MAX_MB:g} MB")
+            body.write(chunk)
+        body.seek(0)
+
+        attachment_id = await run_in_threadpool(
+            tracker.add_attachment,
+            request.path_params['app_id'],
+            user_email,
+            filename,
+            request.headers.get("content-type"),
+            body
+        )
+    if not attachment_id:
+        raise HTTPException(404, "Application not found")
+    return JSONResponse({"id": attachment_id, "size": size}, status_code=201)
+
+def download_attachment(request):
+    user_email = authenticate(request)
+    opened = tracker.open_attachment(request.path_params['attachment_id'], user_email)
+    if opened is None:
+        raise HTTPException(404, "Attachment not found")
+    attachment, chunks = opened
+
+    # Contents never change once stored, so the hash doubles as a strong ETag
+    etag = f'"{attachment["sha256"]}"'
+    if etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        chunks.close()
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return StreamingResponse(
+        iterate_in_threadpool(chunks),
+        media_type=attachment['content_type'],
+        headers={
+            "Content-Length": str(attachment['size']),
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(attachment['filename'])}",
+            "ETag": etag
+        }
+    )
+
+def remove_attachment(request):
+    user_email = authenticate(request)
+    if not tracker.delete_attachment(request.path_params['attachment_id'], user_email):
+        raise HTTPException(404, "Attachment not found")
+    return Response(status_code=204)
+
+class RequestCorrelation:
+    """Tag the request's log records with its X-Request-ID and echo the id back."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        supplied = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")[:64]
+        with structured_logging.correlation(supplied or None) as request_id:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+                await send(message)
+            
+            await self.app(scope, receive, send_with_id)
+
+async def http_error(request, exc):
+    return JSONResponse({"error": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+async def rate_limited(request, exc):
+    return await http_error(request, too_many_requests(exc.retry_after))
+
+app = Starlette(
+    routes=[
+        Route("/api/health", health),
+        Route("/api/users", create_account, methods=["POST"]),
+        Route("/api/summary", summary),
+        Route("/api/suggestions", suggestions),
+        Route("/api/companies", companies),
+        Route("/api/events", events),
+        Route("/api/contacts", contact),
+        Route("/api/companies/{company}", company_timeline),
+        Route("/api/notes/{item_id}", note_body),
+        Route("/api/applications/{app_id}/attachments", list_attachments),
+        Route("/api/applications/{app_id}/attachments", upload_attachment, methods=["POST"]),
+        Route("/api/attachments/{attachment_id}", download_attachment),
+        Route("/api/attachments/{attachment_id}", remove_attachment, methods=["DELETE"]),
+        Route("/api/{collection}", list_items),
+        Route("/api/{collection}", create_item, methods=["POST"]),
+        Route("/api/{collection}/{item_id}", delete_item, methods=["DELETE"])
+    ],
+    middleware=[
+        Middleware(RequestCorrelation),
+        Middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+    ],
+    exception_handlers={HTTPException: http_error, tracker.RateLimited: rate_limited}
+)
@@ -1,11 +1,32 @@
 import streamlit as st
 import hashlib
+import logging
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import bson
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from pymongo import monitoring
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
-from pymongo.errors import DuplicateKeyError
+from pymongo.collection import ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError, OperationFailure, PyMongoError
+from gridfs import GridFSBucket
+from local_replica import LocalReplica
+from shared_cache import SharedFrameStore
+import structured_logging
 
 # ============================================================================
 # CONFIGURATION AND SETUP
@@ -135,72 +156,595 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# MongoDB configuration
-MONGO_URI = "mongodb+srv://nishanth_atlas:<db_password>@stocktracker.bzekz.mongodb.net/?retryWrites=true&w=majority&appName=StockTracker"
+# Application pipeline stages, in order
+APPLICATION_STATUSES = ["applied", "screen", "interview", "offer", "rejected"]
+STATUS_LABELS = {
+    "applied": "📨 Applied",
+    "screen": "📞 Screen",
+    "interview": "🎤 Interview",
+    "offer": "🎉 Offer",
+    "rejected": "❌ Rejected"
+}
+
+# Outcomes of adding an application
+ADD_INSERTED = "inserted"
+ADD_MERGED = "merged"
+ADD_DUPLICATE = "duplicate"
+ADD_SIMILAR = "similar"     # inserted, but another posting has the same company and role
+
+# Outreach entries kept on a networking contact; older ones are dropped
+OUTREACH_HISTORY_LIMIT = 20
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "refid", "ref_src",
+    "src", "source", "trk", "trackingid", "referer", "referrer", "_hsenc", "_hsmi"
+}
+
+# Deleted items stay restorable for this long before the TTL index purges them
+TRASH_RETENTION_DAYS = 30
+
+# Collections whose deletes go through the trash
+TRASH_COLLECTIONS = ("applications", "networking", "notes", "todos")
+
+# Live applications move to the archive collection once applied for longer than
+# ARCHIVE_AFTER_DAYS, or after ARCHIVE_TERMINAL_DAYS in a terminal stage; each
+# user's applications are checked at most once per ARCHIVE_INTERVAL_HOURS
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '365'))
+ARCHIVE_TERMINAL_DAYS = int(os.getenv('ARCHIVE_TERMINAL_DAYS', '30'))
+ARCHIVE_TERMINAL_STATUSES = ("offer", "rejected")
+ARCHIVE_INTERVAL_HOURS = 24
+ARCHIVE_BATCH_SIZE = 500
+
+# Collections whose old documents move to a cold archive collection
+ARCHIVE_COLLECTIONS = {"applications": "applications_archive"}
+
+# Every mutation appends an event to the user's activity log, kept this long;
+# a missing sequence number younger than EVENT_GAP_GRACE_SECONDS may still be
+# in flight, so readers stop in front of it until then
+EVENT_RETENTION_DAYS = int(os.getenv('EVENT_RETENTION_DAYS', '90'))
+EVENT_GAP_GRACE_SECONDS = 5
+EVENTS_PAGE_SIZE = 500
+
+# Notes listed per page and note bodies kept in the recently opened LRU
+NOTES_PAGE_SIZE = 50
+NOTE_BODY_CACHE_SIZE = 64
+
+# Numeric rank stored with each todo so lists sort High > Medium > Low
+PRIORITY_RANKS = {"High": 3, "Medium": 2, "Low": 1}
+
+# Pending todos due within this many days show up in the due-soon queue
+DUE_SOON_DAYS = 3
+
+# Database commands a single rerun may issue before it is flagged
+DB_COMMAND_BUDGET = int(os.getenv('DB_COMMAND_BUDGET', '40'))
+
+# Show per-rerun command accounting in the sidebar
+DB_DIAGNOSTICS = os.getenv('DB_DIAGNOSTICS', '').lower() in ('1', 'true', 'yes')
+
+# Records below this level are dropped before they reach the log queue
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+# Fraction of database commands timed in DEBUG records (only when LOG_LEVEL=DEBUG)
+LOG_DB_SAMPLE_RATE = float(os.getenv('LOG_DB_SAMPLE_RATE', '0.01'))
+
+# Inserts from all sessions arriving within this window share one insert_many
+# (INSERT_BATCH_WINDOW_MS=0 sends each insert on its own)
+INSERT_BATCH_WINDOW_MS = float(os.getenv('INSERT_BATCH_WINDOW_MS', '5'))
+INSERT_BATCH_MAX = 100
+
+# Inserts queued beyond this make new callers wait for the batcher to catch up
+INSERT_QUEUE_LIMIT = int(os.getenv('INSERT_QUEUE_LIMIT', '1000'))
+
+# Token buckets per action as "capacity/seconds": up to capacity requests in a
+# burst, refilled at capacity per seconds (override with RATE_LIMIT_<ACTION>)
+RATE_LIMITS = {
+    action: tuple(float(part) for part in os.getenv(f'RATE_LIMIT_{action.upper()}', default).split('/'))
+    for action, default in {"login": "5/60", "signup": "3/600", "write": "60/60", "api": "120/60"}.items()
+}
+
+# Keep the buckets in MongoDB so every app process enforces the same limits
+RATE_LIMIT_SHARED = os.getenv('RATE_LIMIT_SHARED', '').lower() in ('1', 'true', 'yes')
+
+# How dates are shown; timezone-aware values are converted to DISPLAY_TIMEZONE
+# (the server's local zone when unset) before formatting
+DATE_DISPLAY_FORMAT = '%b %d, %Y'
+DISPLAY_TIMEZONE = os.getenv('DISPLAY_TIMEZONE')
+
+# Per-user DataFrames kept in memory across reruns; writes from other workers
+# show up once an entry is older than the TTL
+FRAME_CACHE_USERS = int(os.getenv('FRAME_CACHE_USERS', '500'))
+FRAME_CACHE_TTL_SECONDS = int(os.getenv('FRAME_CACHE_TTL_SECONDS', '300'))
+
+# SQLite file shared by every app process on the host (set SHARED_CACHE_PATH when
+# running several workers): frames built by one worker are served to the others
+# and writes invalidate every worker's copies
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH')
+
+# Legal-form suffixes ignored when matching company names ("Google LLC" is "Google")
+COMPANY_SUFFIXES = {"inc", "llc", "ltd", "limited", "corp", "corporation", "co", "company", "gmbh", "plc", "ag", "sa", "bv"}
+
+# Suggestions offered per lookup
+SUGGESTION_LIMIT = 10
+
+# Summary documents are recomputed from the raw collections this often to fix drift
+SUMMARY_RECONCILE_HOURS = 24
+
+# Per-day counters kept in the summary document for the "This Week" tiles
+SUMMARY_DAYS_KEPT = 14
+
+# Embedded replica (set LOCAL_REPLICA_PATH to a SQLite file to serve reads and
+# writes locally and sync with MongoDB in the background)
+LOCAL_REPLICA_PATH = os.getenv('LOCAL_REPLICA_PATH')
+REPLICA_SYNC_SECONDS = float(os.getenv('REPLICA_SYNC_SECONDS', 2))
+REPLICA_CONNECT_TIMEOUT_MS = 5000
+
+# Attachments larger than this are rejected; file contents are always moved in
+# chunks of ATTACHMENT_CHUNK_BYTES (the GridFS chunk size)
+ATTACHMENT_MAX_MB = float(os.getenv('ATTACHMENT_MAX_MB', '10'))
+ATTACHMENT_CHUNK_BYTES = 255 * 1024
+
+# Directory holding attachment files when the local replica is used instead of GridFS
+ATTACHMENT_DIR = os.getenv('ATTACHMENT_DIR') or (f"{LOCAL_REPLICA_PATH}.files" if LOCAL_REPLICA_PATH else None)
+
+# Replicated collections and the field naming the user each document belongs to
+REPLICA_SCOPES = {
+    "users": "email",
+    "applications": "user_email",
+    "applications_archive": "user_email",
+    "networking": "user_email",
+    "notes": "user_email",
+    "todos": "user_email",
+    "daily_stats": "user_email",
+    "company_stats": "user_email",
+    "user_summaries": "_id",
+    "attachments": "user_email",
+    "events": "user_email",
+    "event_counters": "_id"
+}
+
+# Replicated collections updated with $inc from several writers; the replica pushes
+# their updates as operators so no writer's increments are lost
+REPLICA_COUNTERS = ("daily_stats", "company_stats", "user_summaries", "event_counters")
+
+# Fields numbered from a per-user counter: collection -> (field, counter collection)
+REPLICA_SEQUENCES = {"events": ("seq", "event_counters")}
+
+# MongoDB configuration (MONGO_URI in the environment points at another server, e.g. a local one)
+MONGO_URI = os.getenv(
+    'MONGO_URI',
+    "mongodb+srv://nishanth_atlas:<db_password>@stocktracker.bzekz.mongodb.net/?retryWrites=true&w=majority&appName=StockTracker"
+)
+
+logger = logging.getLogger("tracker")
+structured_logging.configure(("tracker", "local_replica"), LOG_LEVEL)
 
 # ============================================================================
 # DATABASE FUNCTIONS
 # ============================================================================
 
+def secrets_available():
+    """Whether a secrets.toml was found (the JSON API and scripts may run without one)."""
+    try:
+        st.secrets.keys()
+        return True
+    except FileNotFoundError:
+        return False
+
+def connect_mongodb(timeout_ms=30000):
+    """Connect to MongoDB, then migrate and index the database."""
+    # Get password from secrets or environment
+    if secrets_available() and 'mongo_password' in st.secrets:
+        password = st.secrets.mongo_password
+        config_source = "secrets"
+    else:
+        password = os.getenv('MONGO_PASSWORD', '<db_password>')
+        config_source = "environment"
+    logger.info("Connecting to MongoDB", extra={"config_source": config_source})
+    
+    # Replace placeholder with actual password
+    uri = MONGO_URI.replace('<db_password>', password)
+    
+    # Create client and connect
+    client = MongoClient(
+        uri,
+        server_api=ServerApi('1'),
+        serverSelectionTimeoutMS=timeout_ms,
+        event_listeners=[get_command_accountant()]
+    )
+    
+    # Test connection
+    try:
+        client.admin.command('ping')
+    except Exception:
+        client.close()
+        raise
+    logger.info("Connected to MongoDB")
+    
+    # Get database
+    db = client.application_tracker
+    
+    # Migrate data first so indexes are built over the final document shape
+    run_migrations(db)
+    ensure_indexes(db)
+    
+    return db
+
 @st.cache_resource
 def init_mongodb():
     """Initialize MongoDB connection."""
     try:
-        # Get password from secrets or environment
-        print("Connecting with MongoDB")
-        print(f"st.secrets exists: {hasattr(st, 'secrets')}")
-        if hasattr(st, 'secrets'):
-            print(f"Available secret keys: {list(st.secrets.keys())}")
-            print(f"mongo_password in secrets: {'mongo_password' in st.secrets}")
-            
-            # Try to access each key individually
+        return connect_mongodb()
+    except Exception as e:
+        logger.exception("Failed to connect to MongoDB")
+        st.error(f"Failed to connect to MongoDB: {structured_logging.scrub(str(e))}")
+        return None
+
+@st.cache_resource
+def get_local_replica():
+    """Open the embedded replica and start syncing it with MongoDB in the background."""
+    replica = LocalReplica(
+        LOCAL_REPLICA_PATH,
+        REPLICA_SCOPES,
+        connect=lambda: connect_mongodb(timeout_ms=REPLICA_CONNECT_TIMEOUT_MS),
+        sync_interval=REPLICA_SYNC_SECONDS,
+        counters=REPLICA_COUNTERS,
+        sequences=REPLICA_SEQUENCES
+    )
+    ensure_indexes(replica.db)
+    replica.start()
+    return replica
+
+def ensure_indexes(db):
+    """Create indexes for better performance."""
+    # Hot read paths only ever see live documents, so their indexes skip the trash
+    live = {"deleted": False}
+    
+    db.users.create_index("email", unique=True)
+    db.applications.create_index([("user_email", 1), ("date_applied", -1)], partialFilterExpression=live)
+    db.applications.create_index([("user_email", 1), ("status", 1), ("date_applied", -1)], partialFilterExpression=live)
+    db.applications.create_index(
+        [("user_email", 1), ("url_key", 1)],
+        unique=True,
+        partialFilterExpression={"url_key": {"$type": "string"}, **live}
+    )
+    db.applications.create_index(
+        [("user_email", 1), ("fingerprint", 1)],
+        unique=True,
+        partialFilterExpression={"fingerprint": {"$type": "string"}, **live}
+    )
+    db.networking.create_index([("user_email", 1), ("date_sent", -1)], partialFilterExpression=live)
+    db.networking.create_index(
+        [("user_email", 1), ("profile_key", 1)],
+        unique=True,
+        partialFilterExpression={"profile_key": {"$type": "string"}, **live}
+    )
+    # The company view's $lookup joins on company_ref; trashed rows are filtered out after the join
+    db.applications.create_index("company_ref")
+    db.networking.create_index("company_ref")
+    db.notes.create_index([("user_email", 1), ("created_at", -1)], partialFilterExpression=live)
+    db.todos.create_index([("user_email", 1), ("created_at", -1)], partialFilterExpression=live)
+    db.todos.create_index(
+        [("user_email", 1), ("completed", 1), ("priority_rank", -1), ("created_at", -1)],
+        partialFilterExpression=live
+    )
+    db.todos.create_index([("user_email", 1), ("completed", 1), ("due_date", 1)], partialFilterExpression=live)
+    db.daily_stats.create_index([("user_email", 1), ("day", 1)], unique=True)
+    db.rate_limits.create_index("expires_at", expireAfterSeconds=0)
+    db.events.create_index([("user_email", 1), ("seq", 1)], unique=True)
+    db.events.create_index("at", expireAfterSeconds=EVENT_RETENTION_DAYS * 24 * 3600)
+    db.company_stats.create_index([("user_email", 1), ("company_key", 1)], unique=True)
+    db.attachments.create_index([("user_email", 1), ("application_id", 1), ("created_at", -1)])
+    # The archive is only read by archive searches and rollup rebuilds, so it carries no dedup indexes
+    db.applications_archive.create_index([("user_email", 1), ("date_applied", -1)])
+    db.applications_archive.create_index([("user_email", 1), ("status", 1), ("date_applied", -1)])
+    
+    for collection in TRASH_COLLECTIONS:
+        db[collection].create_index("deleted_at", expireAfterSeconds=TRASH_RETENTION_DAYS * 24 * 3600)
+        db[collection].create_index(
+            [("user_email", 1), ("deleted_at", -1)],
+            partialFilterExpression={"deleted": True}
+        )
+
+def run_migrations(db):
+    """Apply one-off data migrations that have not run against this database yet."""
+    applied = {m['_id'] for m in db.migrations.find({}, {"_id": 1})}
+    
+    for name, migration in MIGRATIONS:
+        if name in applied:
+            continue
+        migration(db)
+        db.migrations.update_one(
+            {"_id": name},
+            {"$set": {"applied_at": datetime.now()}},
+            upsert=True
+        )
+
+def migrate_application_status(db):
+    """Give applications created before the status pipeline an initial status."""
+    db.applications.update_many(
+        {"status": {"$exists": False}},
+        {"$set": {"status": "applied", "status_history": []}}
+    )
+
+def migrate_soft_delete(db):
+    """Mark existing documents live and drop the indexes that also covered the trash."""
+    for collection in TRASH_COLLECTIONS:
+        db[collection].update_many({"deleted": {"$exists": False}}, {"$set": {"deleted": False}})
+    
+    legacy_indexes = {
+        "applications": [
+            "user_email_1_date_applied_-1",
+            "user_email_1_status_1_date_applied_-1",
+            "user_email_1_url_key_1",
+            "user_email_1_fingerprint_1"
+        ],
+        "networking": ["user_email_1_date_sent_-1"],
+        "notes": ["user_email_1_created_at_-1"],
+        "todos": ["user_email_1_created_at_-1"]
+    }
+    for collection, names in legacy_indexes.items():
+        for name in names:
             try:
-                users = st.secrets.users
-                print(f"users section: {dict(users)}")
-            except Exception as e:
-                print(f"Error accessing users: {e}")
-            
+                db[collection].drop_index(name)
+            except OperationFailure:
+                pass  # Index was never created on this database
+
+def migrate_note_body_length(db):
+    """Store the body length on notes so listings can skip the body."""
+    db.notes.update_many(
+        {"body_length": {"$exists": False}},
+        [{"$set": {"body_length": {"$strLenCP": {"$ifNull": ["$body", ""]}}}}]
+    )
+
+def migrate_todo_priority_rank(db):
+    """Store a numeric priority rank on todos created before it existed."""
+    db.todos.update_many(
+        {"priority_rank": {"$exists": False}},
+        [{"$set": {"priority_rank": {"$switch": {
+            "branches": [
+                {"case": {"$eq": ["$priority", name]}, "then": rank}
+                for name, rank in PRIORITY_RANKS.items()
+            ],
+            "default": PRIORITY_RANKS["Medium"]
+        }}}}]
+    )
+
+def migrate_application_dedup_keys(db):
+    """Backfill duplicate-detection keys, leaving them off later duplicates."""
+    # The unique indexes are what detect the duplicates
+    ensure_indexes(db)
+    
+    legacy = db.applications.find(
+        {"fingerprint": {"$exists": False}, "url_key": {"$exists": False}, "deleted": False},
+        {"company_name": 1, "role": 1, "url": 1}
+    ).sort("created_at", 1)
+    
+    for app in legacy:
+        for field, value in application_keys(app['company_name'], app['role'], app.get('url')).items():
             try:
-                mongo_pass = st.secrets.mongo_password
-                print(f"mongo_password value: {mongo_pass}")
-            except Exception as e:
-                print(f"Error accessing mongo_password: {e}")
-                
-        if hasattr(st, 'secrets') and 'mongo_password' in st.secrets:
-            print("fetching password")
-            password = st.secrets.mongo_password
-            print("password:{password}")
-        else:
-            password = os.getenv('MONGO_PASSWORD', '<db_password>')
-        
-        # Replace placeholder with actual password
-        uri = MONGO_URI.replace('<db_password>', password)
-        
-        # Create client and connect
-        client = MongoClient(uri, server_api=ServerApi('1'))
-        
-        # Test connection
-        client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
+                db.applications.update_one({"_id": app['_id']}, {"$set": {field: value}})
+            except DuplicateKeyError:
+                pass
+
+def migrate_url_postings(db):
+    """Drop the company and role key from applications with a job URL.
+    
+    Separate postings for the same role were rejected as duplicates of each
+    other; the URL alone identifies them now.
+    """
+    db.applications.update_many(
+        {"url_key": {"$type": "string"}, "fingerprint": {"$exists": True}},
+        {"$unset": {"fingerprint": ""}}
+    )
+
+def migrate_company_refs(db):
+    """Backfill the per-user company key joining applications, outreach and company rollups."""
+    for collection in ("applications", "networking", "company_stats"):
+        legacy = db[collection].find({"company_ref": {"$exists": False}}, {"user_email": 1, "company_name": 1})
+        for document in legacy:
+            db[collection].update_one(
+                {"_id": document["_id"]},
+                {"$set": {"company_ref": company_reference(document.get("user_email"), document.get("company_name"))}}
+            )
+
+def migrate_networking_contacts(db):
+    """Fold repeat outreach to the same LinkedIn profile into one contact with a history."""
+    contacts = {}
+    legacy = db.networking.find(
+        {"profile_key": {"$exists": False}, "deleted": False},
+        {"user_email": 1, "company_name": 1, "linkedin_url": 1, "date_sent": 1, "notes": 1}
+    ).sort("date_sent", 1)
+    for contact in legacy:
+        key = (contact['user_email'], canonicalize_linkedin_url(contact.get('linkedin_url')))
+        contacts.setdefault(key if key[1] else (contact['_id'], None), []).append(contact)
+    
+    merged_users = set()
+    for (user_email, profile_key), group in contacts.items():
+        latest = group[-1]
+        history = [
+            {"date_sent": contact['date_sent'], "company_name": contact.get('company_name'), "notes": contact.get('notes', "")}
+            for contact in group
+        ]
+        update = {"outreach": history[-OUTREACH_HISTORY_LIMIT:], "outreach_count": len(group)}
+        notes = next((contact['notes'] for contact in reversed(group) if contact.get('notes')), "")
+        if len(group) > 1:
+            # The copies are folded into the latest one, so they are removed outright rather than trashed
+            db.networking.delete_many({"_id": {"$in": [contact['_id'] for contact in group[:-1]]}})
+            update["notes"] = notes
+            merged_users.add(user_email)
+        if profile_key:
+            update["profile_key"] = profile_key
+        db.networking.update_one({"_id": latest['_id']}, {"$set": update})
+    
+    # Rollups and summaries of users whose contacts were folded are rebuilt on their next visit
+    if merged_users:
+        db.users.update_many({"email": {"$in": list(merged_users)}}, {"$unset": {"rollups_version": ""}})
+        db.user_summaries.delete_many({"_id": {"$in": list(merged_users)}})
+
+# Ordered (name, function) pairs; names must never be reused
+MIGRATIONS = [
+    ("application_status", migrate_application_status),
+    ("soft_delete", migrate_soft_delete),
+    ("application_dedup_keys", migrate_application_dedup_keys),
+    ("note_body_length", migrate_note_body_length),
+    ("todo_priority_rank", migrate_todo_priority_rank),
+    ("company_refs", migrate_company_refs),
+    ("networking_contacts", migrate_networking_contacts),
+    ("url_postings", migrate_url_postings),
+]
+
+# ============================================================================
+# DATABASE COMMAND ACCOUNTING
+# ============================================================================
+
+class CommandAccountant(monitoring.CommandListener):
+    """Tally the MongoDB commands each Streamlit rerun issues."""
+    
+    def __init__(self, budget, history_size=200):
+        self.budget = budget
+        self.history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._reruns = {}    # session id -> stats of the rerun in progress
+        self._pending = {}   # request id -> stats of the reruns the command is charged to
+        self._rerun_counts = Counter()
+        self._worker = threading.local()   # sessions a worker thread is issuing commands for
+    
+    def begin_rerun(self, session_id):
+        """Start charging commands from this session to a new rerun."""
+        with self._lock:
+            self._rerun_counts[session_id] += 1
+            self._reruns[session_id] = {
+                "session": session_id,
+                "rerun": self._rerun_counts[session_id],
+                "started_at": datetime.now(),
+                "commands": 0,
+                "duration_ms": 0.0,
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "by_command": Counter()
+            }
+    
+    def finish_rerun(self, session_id):
+        """Close the session's current rerun and flag it if it broke the budget."""
+        with self._lock:
+            stats = self._reruns.pop(session_id, None)
+            if stats is None:
+                return None
+            stats['over_budget'] = stats['commands'] > self.budget
+            self.history.append(stats)
         
-        # Get database
-        db = client.application_tracker
+        if stats['over_budget']:
+            logger.warning("DB command budget exceeded", extra={
+                "session": session_id,
+                "rerun": stats['rerun'],
+                "commands": stats['commands'],
+                "budget": self.budget,
+                "by_command": dict(stats['by_command'])
+            })
+        return stats
+    
+    @contextmanager
+    def on_behalf_of(self, session_ids):
+        """Charge the commands this worker thread issues to the sessions' reruns."""
+        self._worker.sessions = session_ids
+        try:
+            yield
+        finally:
+            self._worker.sessions = ()
+    
+    def started(self, event):
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            sessions = (ctx.session_id,)
+        else:
+            # Not issued by a script run, unless a worker is acting for some
+            sessions = getattr(self._worker, 'sessions', ())
+        if not sessions:
+            return
         
-        # Create indexes for better performance
-        db.users.create_index("email", unique=True)
-        db.applications.create_index([("user_email", 1), ("date_applied", -1)])
-        db.networking.create_index([("user_email", 1), ("date_sent", -1)])
-        db.notes.create_index([("user_email", 1), ("created_at", -1)])
-        db.todos.create_index([("user_email", 1), ("created_at", -1)])
+        with self._lock:
+            charged = [self._reruns[session] for session in sessions if session in self._reruns]
+            if not charged:
+                return
+            # Encoding every command costs more than counting it, so sizes are for diagnostics only
+            size = len(bson.encode(event.command)) if DB_DIAGNOSTICS else 0
+            for stats in charged:
+                stats['commands'] += 1
+                stats['by_command'][event.command_name] += 1
+                stats['bytes_sent'] += size
+            self._pending[event.request_id] = charged
+    
+    def succeeded(self, event):
+        with self._lock:
+            charged = self._pending.pop(event.request_id, ())
+            size = len(bson.encode(event.reply)) if charged and DB_DIAGNOSTICS else 0
+            for stats in charged:
+                stats['duration_ms'] += event.duration_micros / 1000
+                stats['bytes_received'] += size
+        self._log_timing(event, "succeeded")
+    
+    def failed(self, event):
+        with self._lock:
+            for stats in self._pending.pop(event.request_id, ()):
+                stats['duration_ms'] += event.duration_micros / 1000
+        self._log_timing(event, "failed")
+    
+    def _log_timing(self, event, outcome):
+        # Sampled, and only the command name: filters and documents may hold user data
+        if logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_DB_SAMPLE_RATE:
+            logger.debug("DB command", extra={
+                "command": event.command_name,
+                "database": event.database_name,
+                "duration_ms": event.duration_micros / 1000,
+                "outcome": outcome
+            })
+    
+    def summary(self):
+        """Aggregate the recent rerun history for operators."""
+        with self._lock:
+            history = list(self.history)
         
-        return db
+        if not history:
+            return {"reruns": 0}
         
-    except Exception as e:
-        st.error(f"Failed to connect to MongoDB: {e}")
-        return None
+        commands = sorted(stats['commands'] for stats in history)
+        return {
+            "reruns": len(history),
+            "avg_commands": sum(commands) / len(commands),
+            "max_commands": commands[-1],
+            "p95_commands": commands[min(len(commands) - 1, int(len(commands) * 0.95))],
+            "avg_duration_ms": sum(stats['duration_ms'] for stats in history) / len(history),
+            "over_budget": sum(stats['over_budget'] for stats in history)
+        }
+
+@st.cache_resource
+def get_command_accountant():
+    """Get the process-wide command accountant registered with the MongoClient."""
+    return CommandAccountant(DB_COMMAND_BUDGET)
+
+@contextmanager
+def account_rerun():
+    """Charge the database commands issued while running the script to this rerun."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        yield
+        return
+    
+    accountant = get_command_accountant()
+    accountant.begin_rerun(ctx.session_id)
+    try:
+        with structured_logging.correlation():
+            yield
+    finally:
+        stats = accountant.finish_rerun(ctx.session_id)
+        if stats is not None:
+            st.session_state.last_rerun_accounting = stats
 
 def get_database():
-    """Get MongoDB database instance."""
+    """Get MongoDB database instance, or the local replica standing in for it."""
+    if LOCAL_REPLICA_PATH:
+        return get_local_replica().db
     return init_mongodb()
 
 def hash_password(password):
@@ -238,13 +782,611 @@ def create_user(email, password):
     except DuplicateKeyError:
         return False
 
+# ============================================================================
+# WRITE BATCHING
+# ============================================================================
+
+class InsertBatcher:
+    """Coalesce inserts from every session into insert_many batches.
+    
+    Callers block until the batch holding their document is acknowledged, so a
+    returned insert is exactly as durable as a direct insert_one, and duplicate
+    key errors are raised to the caller that caused them.
+    """
+    
+    def __init__(self, window_ms, max_batch, queue_limit, accountant, history_size=500):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue_limit = queue_limit
+        self.accountant = accountant
+        self._cond = threading.Condition()
+        self._pending = {}   # collection name -> [(collection, document, future, enqueued_at, session_id)]
+        self._depth = 0
+        self._max_depth = 0
+        self._stats = Counter()
+        self._waits = deque(maxlen=history_size)
+        self._batch_sizes = deque(maxlen=history_size)
+        self._thread = threading.Thread(target=self._run, name="insert-batcher", daemon=True)
+        self._thread.start()
+    
+    def insert(self, collection, document, timeout=30):
+        """Queue a document and wait until MongoDB has acknowledged it."""
+        document.setdefault("_id", bson.ObjectId())
+        future = Future()
+        ctx = get_script_run_ctx()
+        with self._cond:
+            if self._depth >= self.queue_limit:
+                # Backpressure: hold the caller instead of growing the queue without bound
+                self._stats['throttled'] += 1
+                if not self._cond.wait_for(lambda: self._depth < self.queue_limit, timeout):
+                    self._stats['rejected'] += 1
+                    raise TimeoutError("Insert queue is full")
+            self._pending.setdefault(collection.name, []).append(
+                (collection, document, future, time.perf_counter(), ctx.session_id if ctx else None)
+            )
+            self._depth += 1
+            self._max_depth = max(self._max_depth, self._depth)
+            self._stats['queued'] += 1
+            self._cond.notify_all()
+        return future.result(timeout)
+    
+    def _full_batch(self):
+        return any(len(items) >= self.max_batch for items in self._pending.values())
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._depth > 0)
+                # Give other sessions the window to join the batch unless it is already full
+                self._cond.wait_for(self._full_batch, self.window)
+                batches = []
+                for name in list(self._pending):
+                    items = self._pending[name]
+                    batches.append(items[:self.max_batch])
+                    if len(items) > self.max_batch:
+                        self._pending[name] = items[self.max_batch:]
+                    else:
+                        del self._pending[name]
+                self._depth -= sum(len(batch) for batch in batches)
+                self._cond.notify_all()
+            
+            for batch in batches:
+                self._flush(batch)
+    
+    def _flush(self, batch):
+        collection = batch[0][0]
+        # The reruns waiting on the batch are charged for it, as for a direct insert
+        sessions = {session_id for *_, session_id in batch if session_id is not None}
+        errors = {}
+        try:
+            with self.accountant.on_behalf_of(sessions):
+                collection.insert_many([document for _, document, *_ in batch], ordered=False)
+        except BulkWriteError as e:
+            errors = {error['index']: error for error in e.details.get('writeErrors', [])}
+        except Exception as e:
+            logger.exception("Batched insert failed", extra={"collection": collection.name, "documents": len(batch)})
+            self._stats['failed'] += len(batch)
+            for _, _, future, *_ in batch:
+                future.set_exception(e)
+            return
+        
+        acknowledged = time.perf_counter()
+        with self._cond:
+            self._stats['batches'] += 1
+            self._stats['inserted'] += len(batch) - len(errors)
+            self._batch_sizes.append(len(batch))
+            self._waits.extend(acknowledged - enqueued_at for _, _, _, enqueued_at, _ in batch)
+        
+        for index, (_, document, future, *_) in enumerate(batch):
+            error = errors.get(index)
+            if error is None:
+                future.set_result(document["_id"])
+            elif error['code'] == 11000:
+                future.set_exception(DuplicateKeyError(error.get('errmsg', ''), 11000, error))
+            else:
+                future.set_exception(OperationFailure(error.get('errmsg', ''), error['code'], error))
+    
+    def metrics(self):
+        """Queue depth, batch sizes and acknowledgement latency for operators."""
+        with self._cond:
+            waits = sorted(self._waits)
+            sizes = list(self._batch_sizes)
+            metrics = dict(self._stats)
+            metrics.update({
+                "depth": self._depth,
+                "max_depth": self._max_depth,
+                "avg_batch": sum(sizes) / len(sizes) if sizes else 0.0,
+                "max_batch": max(sizes) if sizes else 0
+            })
+        metrics['p50_wait_ms'] = waits[len(waits) // 2] * 1000 if waits else 0.0
+        metrics['p95_wait_ms'] = waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0
+        return metrics
+
+@st.cache_resource
+def get_insert_batcher():
+    """Get the process-wide insert batcher shared by all sessions."""
+    return InsertBatcher(INSERT_BATCH_WINDOW_MS, INSERT_BATCH_MAX, INSERT_QUEUE_LIMIT, get_command_accountant())
+
+def insert_document(collection, document):
+    """Insert one document, batched with other sessions' inserts when enabled."""
+    if INSERT_BATCH_WINDOW_MS > 0:
+        get_insert_batcher().insert(collection, document)
+    else:
+        collection.insert_one(document)
+
+# ============================================================================
+# COMPACT FRAME CACHE
+# ============================================================================
+
+def build_frame(documents, columns, categories=(), dates=(), counts=()):
+    """Build a compact DataFrame straight from projected documents.
+    
+    columns maps each output column to its (document field, default) pair.
+    Repeated labels become categoricals, dates datetime64 and counts int32;
+    other strings are interned so repeats share one object. Each date column
+    also gets a preformatted "<column> Label" column for display.
+    """
+    data = {"ID": [str(document['_id']) for document in documents]}
+    for column, (field, default) in columns.items():
+        values = [document.get(field, default) for document in documents]
+        if column in categories:
+            data[column] = pd.Categorical(values)
+        elif column in dates:
+            data[column] = to_datetimes(values)
+            data[f"{column} Label"] = format_dates(data[column])
+        elif column in counts:
+            data[column] = pd.array(values, dtype="int32")
+        else:
+            data[column] = [sys.intern(value) if isinstance(value, str) else value for value in values]
+    return pd.DataFrame(data)
+
+def frame_projection(columns):
+    """Projection loading only the fields a frame is built from."""
+    return {field: 1 for field, _ in columns.values()}
+
+class FrameCache:
+    """Per-user LRU of compact DataFrames shared by all of a user's sessions.
+    
+    Frames are keyed by (kind, variant) and must be treated as read-only.
+    Writes made by this process drop the user's frames of that kind. With a
+    shared store, misses are looked up there before building, and writes
+    from other processes are picked up from its invalidation log.
+    """
+    
+    def __init__(self, max_users, ttl_seconds, shared=None):
+        self.max_users = max_users
+        self.ttl = ttl_seconds
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._users = OrderedDict()        # user -> {key: (built_at, frame)}
+        self._generations = Counter()      # (user, kind) -> writes seen
+        self._epoch = 0                    # bumped when the whole cache is dropped
+        self._stats = Counter()
+    
+    def get(self, user_email, key, build):
+        """Return the cached frame for a key, building it on a miss."""
+        self.sync()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_email, {}).get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._users.move_to_end(user_email)
+                self._stats['hits'] += 1
+                return entry[1]
+            generation = (self._epoch, self._generations[(user_email, key[0])])
+        
+        frame = None
+        if self.shared is not None:
+            shared_generation = self.shared.generation(user_email, key[0])
+            frame = self.shared.get(user_email, key, shared_generation)
+        
+        with self._lock:
+            self._stats['misses' if frame is None else 'shared_hits'] += 1
+        
+        if frame is None:
+            frame = build()
+            if self.shared is not None:
+                self.shared.put(user_email, key, shared_generation, frame)
+        
+        with self._lock:
+            # Skip storing a frame a concurrent write has already made stale
+            if (self._epoch, self._generations[(user_email, key[0])]) == generation:
+                self._users.setdefault(user_email, {})[key] = (now, frame)
+                self._users.move_to_end(user_email)
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return frame
+    
+    def _drop(self, user_email, kind):
+        self._generations[(user_email, kind)] += 1
+        frames = self._users.get(user_email)
+        if frames:
+            for key in [key for key in frames if key[0] == kind]:
+                del frames[key]
+    
+    def invalidate(self, user_email, kind):
+        with self._lock:
+            self._drop(user_email, kind)
+        if self.shared is not None:
+            self.shared.invalidate(user_email, kind)
+    
+    def sync(self):
+        """Drop frames other processes have written to since the last sync."""
+        if self.shared is None:
+            return
+        messages = self.shared.poll()
+        if messages == []:
+            return
+        with self._lock:
+            if messages is None:
+                # Fell behind the log, so any frame may be stale
+                self._users.clear()
+                self._epoch += 1
+                self._stats['flushes'] += 1
+                return
+            for user_email, kind in set(messages):
+                self._drop(user_email, kind)
+            self._stats['invalidations_received'] += len(messages)
+    
+    def report(self):
+        """Memory held per frame kind, plus hit and eviction counts."""
+        with self._lock:
+            entries = [(key, frame) for frames in self._users.values() for key, (_, frame) in frames.items()]
+            users = len(self._users)
+            report = dict(self._stats)
+        
+        by_kind = {}
+        for key, frame in entries:
+            stats = by_kind.setdefault(key[0], {"frames": 0, "rows": 0, "bytes": 0})
+            stats['frames'] += 1
+            stats['rows'] += len(frame)
+            stats['bytes'] += int(frame.memory_usage(deep=True).sum())
+        
+        total = sum(stats['bytes'] for stats in by_kind.values())
+        report.update({
+            "users": users,
+            "bytes": total,
+            "bytes_per_user": total / users if users else 0,
+            "by_kind": by_kind
+        })
+        if self.shared is not None:
+            report["shared"] = self.shared.stats()
+        return report
+
+@st.cache_resource
+def get_frame_cache():
+    """Get the process-wide per-user frame cache, backed by the shared store when configured."""
+    shared = SharedFrameStore(SHARED_CACHE_PATH, FRAME_CACHE_TTL_SECONDS) if SHARED_CACHE_PATH else None
+    return FrameCache(FRAME_CACHE_USERS, FRAME_CACHE_TTL_SECONDS, shared=shared)
+
+# Frame kinds joining other collections, dropped along with the kinds they read
+JOINED_FRAMES = {
+    "applications": ("companies",),
+    "networking": ("companies",)
+}
+
+def invalidate_frames(user_email, kind):
+    """Drop a user's cached frames of one kind, and the joins over it, after writing to its collection."""
+    cache = get_frame_cache()
+    for stale in (kind, *JOINED_FRAMES.get(kind, ())):
+        cache.invalidate(user_email, stale)
+
+# ============================================================================
+# SUGGESTION INDEX
+# ============================================================================
+
+def company_match_key(company_name, strip_suffixes=True):
+    """Key under which spellings of the same company match ("Google, LLC." -> "google")."""
+    words = re.sub(r"[^\w\s&+-]", " ", str(company_name or "").lower()).split()
+    while strip_suffixes and len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def role_match_key(role, strip_suffixes=True):
+    return " ".join(str(role or "").lower().split())
+
+# Suggestion fields: (match key function, collections the values are read from)
+SUGGESTION_FIELDS = {
+    "company_name": (company_match_key, ("applications", "networking")),
+    "role": (role_match_key, ("applications",))
+}
+
+class SuggestionIndex:
+    """Per-user sorted arrays of known companies and roles for prefix lookups.
+    
+    Each (user, field) holds parallel sorted lists of match keys and the
+    spelling used most for each key, so a prefix lookup is a bisect plus a
+    short scan. Entries are loaded once per TTL and extended on insert; the
+    lists of an entry are never modified once published, so lookups read
+    them without the lock.
+    """
+    
+    def __init__(self, max_users, ttl_seconds):
+        self.max_users = max_users
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()      # (user, field) -> (built_at, keys, values)
+    
+    def _get(self, user_email, field, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((user_email, field))
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end((user_email, field))
+                return entry
+        
+        match_key, _ = SUGGESTION_FIELDS[field]
+        spellings = {}
+        for value, count in load():
+            key = match_key(value)
+            if key and count > spellings.get(key, ("", 0))[1]:
+                spellings[key] = (value, count)
+        keys = sorted(spellings)
+        entry = (now, keys, [spellings[key][0] for key in keys])
+        
+        with self._lock:
+            self._entries[(user_email, field)] = entry
+            while len(self._entries) > self.max_users * len(SUGGESTION_FIELDS):
+                self._entries.popitem(last=False)
+        return entry
+    
+    def values(self, user_email, field, load):
+        """Every known value of a field, ordered by match key."""
+        return list(self._get(user_email, field, load)[2])
+    
+    def suggest(self, user_email, field, prefix, load, limit=SUGGESTION_LIMIT):
+        """Known values whose match key starts with the prefix's."""
+        _, keys, values = self._get(user_email, field, load)
+        match_key, _ = SUGGESTION_FIELDS[field]
+        # A prefix may end in a partly typed word, so only drop a legal suffix
+        # ("Acme Co") when keeping it matches nothing
+        for strip_suffixes in (False, True):
+            prefix_key = match_key(prefix, strip_suffixes=strip_suffixes)
+            start = bisect_left(keys, prefix_key)
+            suggestions = []
+            for key, value in zip(keys[start:start + limit], values[start:start + limit]):
+                if not key.startswith(prefix_key):
+                    break
+                suggestions.append(value)
+            if suggestions:
+                break
+        return suggestions
+    
+    def canonical(self, user_email, field, value, load):
+        """The known spelling matching value, or value itself if it is new."""
+        _, keys, values = self._get(user_email, field, load)
+        key = SUGGESTION_FIELDS[field][0](value)
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            return values[position]
+        return value
+    
+    def add(self, user_email, field, value):
+        """Record a value that was just stored, if its key is new."""
+        key = SUGGESTION_FIELDS[field][0](value)
+        if not key:
+            return
+        with self._lock:
+            entry = self._entries.get((user_email, field))
+            if entry is None:
+                return
+            built_at, keys, values = entry
+            position = bisect_left(keys, key)
+            if position == len(keys) or keys[position] != key:
+                # Swap in new lists; readers keep using the entry they already hold
+                self._entries[(user_email, field)] = (
+                    built_at,
+                    keys[:position] + [key] + keys[position:],
+                    values[:position] + [value] + values[position:]
+                )
+
+@st.cache_resource
+def get_suggestion_index():
+    """Get the process-wide suggestion index."""
+    return SuggestionIndex(FRAME_CACHE_USERS, FRAME_CACHE_TTL_SECONDS)
+
+def suggestion_loader(user_email, field):
+    """Load (value, count) pairs of a field for the suggestion index."""
+    def load():
+        db = get_database()
+        if db is None:
+            return []
+        pairs = []
+        for collection in SUGGESTION_FIELDS[field][1]:
+            pairs.extend(
+                (group['_id'], group['count'])
+                for group in db[collection].aggregate([
+                    {"$match": {"user_email": user_email, "deleted": False}},
+                    {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+                ])
+                if isinstance(group['_id'], str)
+            )
+        return pairs
+    return load
+
+def known_values(user_email, field):
+    """Every company or role the user has stored, for typeahead selectboxes."""
+    return get_suggestion_index().values(user_email, field, suggestion_loader(user_email, field))
+
+def suggest(user_email, field, prefix, limit=SUGGESTION_LIMIT):
+    """Known companies or roles starting with prefix."""
+    return get_suggestion_index().suggest(user_email, field, prefix, suggestion_loader(user_email, field), limit)
+
+def canonical_value(user_email, field, value, batch=None):
+    """Snap a typed company or role to the spelling the user already uses.
+    
+    batch, shared by the rows of one import, also snaps a new value to the
+    spelling an earlier row of the import used.
+    """
+    value = " ".join(str(value or "").split())
+    if not value:
+        return value
+    value = get_suggestion_index().canonical(user_email, field, value, suggestion_loader(user_email, field))
+    if batch is not None:
+        value = batch.setdefault((field, SUGGESTION_FIELDS[field][0](value)), value)
+    return value
+
+def remember_value(user_email, field, value):
+    """Offer a value in suggestions once the document holding it is stored."""
+    get_suggestion_index().add(user_email, field, value)
+
+def remember_application(application):
+    """Offer a stored application's company and role in suggestions."""
+    remember_value(application["user_email"], "company_name", application["company_name"])
+    remember_value(application["user_email"], "role", application["role"])
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+class RateLimiter:
+    """Token buckets keyed by (action, key), held in process.
+    
+    limits maps each action to (capacity, seconds): a bucket starts full and
+    regains capacity tokens every seconds. Idle buckets are dropped once more
+    than max_keys are tracked.
+    """
+    
+    def __init__(self, limits, max_keys=10000):
+        self.limits = limits
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()      # (action, key) -> (tokens, updated)
+        self._stats = {action: Counter() for action in limits}
+    
+    def refill(self, action, tokens, elapsed, cost):
+        """Return (tokens left, allowed, seconds until allowed) for a bucket."""
+        capacity, seconds = self.limits[action]
+        rate = capacity / seconds
+        tokens = min(capacity, tokens + max(elapsed, 0) * rate)
+        if tokens >= cost:
+            return tokens - cost, True, 0.0
+        return tokens, False, (cost - tokens) / rate
+    
+    def take(self, action, key, cost=1):
+        """Take cost tokens from a bucket in this process."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop((action, key), (self.limits[action][0], now))
+            tokens, allowed, retry_after = self.refill(action, tokens, now - updated, cost)
+            self._buckets[(action, key)] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+    
+    def acquire(self, action, key, cost=1):
+        """Take tokens for one request; returns (allowed, seconds until it would be)."""
+        allowed, retry_after = self.take(action, key, cost)
+        with self._lock:
+            self._stats[action]['allowed' if allowed else 'limited'] += 1
+        return allowed, retry_after
+    
+    def metrics(self):
+        """Allowed and limited requests per action, plus the buckets tracked here."""
+        with self._lock:
+            report = {action: dict(stats) for action, stats in self._stats.items()}
+            report['buckets'] = len(self._buckets)
+        return report
+
+class SharedRateLimiter(RateLimiter):
+    """Token buckets stored in MongoDB so all app processes share them.
+    
+    Buckets are updated with a compare-and-swap on updated_at and expire
+    through a TTL index once they would be full again. When the database is
+    unreachable or the bucket stays contended, the in-process bucket decides.
+    """
+    
+    def __init__(self, limits, get_db, max_keys=10000, attempts=3):
+        super().__init__(limits, max_keys)
+        self.get_db = get_db
+        self.attempts = attempts
+    
+    def take(self, action, key, cost=1):
+        db = self.get_db()
+        if db is None:
+            return super().take(action, key, cost)
+        
+        bucket_id = f"{action}:{key}"
+        capacity, seconds = self.limits[action]
+        try:
+            for _ in range(self.attempts):
+                now = datetime.now()
+                bucket = db.rate_limits.find_one({"_id": bucket_id})
+                if bucket is None:
+                    tokens, allowed, retry_after = self.refill(action, capacity, 0, cost)
+                else:
+                    elapsed = (now - bucket['updated_at']).total_seconds()
+                    tokens, allowed, retry_after = self.refill(action, bucket['tokens'], elapsed, cost)
+                
+                fields = {
+                    "tokens": tokens,
+                    "updated_at": now,
+                    "expires_at": now + timedelta(seconds=seconds)
+                }
+                if bucket is None:
+                    try:
+                        db.rate_limits.insert_one({"_id": bucket_id, **fields})
+                        return allowed, retry_after
+                    except DuplicateKeyError:
+                        continue
+                
+                swapped = db.rate_limits.update_one(
+                    {"_id": bucket_id, "updated_at": bucket['updated_at']},
+                    {"$set": fields}
+                )
+                if swapped.modified_count:
+                    return allowed, retry_after
+        except PyMongoError:
+            pass
+        return super().take(action, key, cost)
+
+@st.cache_resource
+def get_rate_limiter():
+    """Get the process-wide rate limiter (shared through MongoDB when configured).
+    
+    The local replica serves a single process, so shared buckets are only used
+    when the app talks to MongoDB directly.
+    """
+    if RATE_LIMIT_SHARED and not LOCAL_REPLICA_PATH:
+        return SharedRateLimiter(RATE_LIMITS, init_mongodb)
+    return RateLimiter(RATE_LIMITS)
+
+class RateLimited(Exception):
+    """A request was denied by rate_limit outside a script run, where no warning can be shown."""
+    
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limited, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+def rate_limit(action, *keys, cost=1):
+    """Check every bucket a request is charged to, warning the user when one is empty.
+    
+    Callers without a script run (the JSON API) get RateLimited raised instead.
+    """
+    limiter = get_rate_limiter()
+    for key in keys:
+        allowed, retry_after = limiter.acquire(action, key, cost)
+        if not allowed:
+            retry_after = max(1, int(retry_after + 0.5))
+            if get_script_run_ctx() is None:
+                raise RateLimited(retry_after)
+            st.warning(f"⏳ Too many requests. Please try again in {retry_after}s.")
+            return False
+    return True
+
+def session_key():
+    """Rate limit key of the browser session running this script."""
+    ctx = get_script_run_ctx()
+    return f"session:{ctx.session_id}" if ctx is not None else "session:none"
+
 # ============================================================================
 # AUTHENTICATION FUNCTIONS
 # ============================================================================
 
 def load_users_from_secrets():
     """Load users from Streamlit secrets if available."""
-    if hasattr(st, 'secrets') and 'users' in st.secrets:
+    if secrets_available() and 'users' in st.secrets:
         for email, password in st.secrets.users.items():
             # Try to create user, ignore if already exists
             create_user(email, password)
@@ -287,7 +1429,8 @@ def login_page():
             with col_register:
                 register_submitted = st.form_submit_button("Create Account", use_container_width=True)
             
-            if login_submitted:
+            # Each attempt costs a password hash and a query, so throttle per email and per session
+            if login_submitted and rate_limit("login", f"email:{email.strip().lower()}", session_key()):
                 if verify_user(email, password):
                     st.session_state.authenticated = True
                     st.session_state.user_email = email
@@ -297,7 +1440,7 @@ def login_page():
                 else:
                     st.error("❌ Invalid credentials. Please try again.")
             
-            if register_submitted:
+            if register_submitted and rate_limit("signup", session_key()):
                 if email and password:
                     if create_user(email, password):
                         st.success("✅ Account created successfully! Please sign in.")
@@ -310,186 +1453,535 @@ def login_page():
 # DATA MANAGEMENT FUNCTIONS
 # ============================================================================
 
-def add_application(user_email, company_name, role, url, date_applied, notes):
-    """Add a new job application."""
-    db = get_database()
-    if db is None:
-        return False
-        
+def canonicalize_job_url(url):
+    """Canonicalize a job posting URL so the same posting always compares equal."""
+    url = (url or "").strip()
+    if not url:
+        return None
+    if "://" not in url:
+        url = f"https://{url}"
+    
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    
+    return urlunsplit(("https", host, path, urlencode(params), ""))
+
+def canonicalize_linkedin_url(url):
+    """Canonicalize a LinkedIn profile URL so every link to a profile compares equal."""
+    url_key = canonicalize_job_url(url)
+    if not url_key:
+        return None
+    
+    parts = urlsplit(url_key)
+    host = parts.hostname or ""
+    if host != "linkedin.com" and not host.endswith(".linkedin.com"):
+        return url_key
+    
+    # Country subdomains, query strings and trailing segments (/in/<name>/overlay/...) all name the same profile
+    segments = [segment for segment in parts.path.lower().split("/") if segment]
+    if len(segments) >= 2 and segments[0] == "in":
+        segments = segments[:2]
+    return f"linkedin.com/{'/'.join(segments)}"
+
+def application_fingerprint(company_name, role):
+    """Hash the normalized company and role of an application."""
+    role_key = " ".join(str(role or "").lower().split())
+    return hashlib.sha256(f"{normalize_company(company_name)}|{role_key}".encode()).hexdigest()
+
+def application_keys(company_name, role, url):
+    """Build the duplicate-detection keys stored on an application.
+    
+    A job URL identifies the posting; company and role only do when there is
+    no URL, since one company can list several postings for the same role.
+    """
+    url_key = canonicalize_job_url(url)
+    if url_key:
+        return {"url_key": url_key}
+    return {"fingerprint": application_fingerprint(company_name, role)}
+
+def has_similar_posting(db, application):
+    """Whether another live application has the same company and role (under a different URL)."""
+    role_key = " ".join(str(application["role"] or "").lower().split())
+    others = db.applications.find(
+        {
+            "user_email": application["user_email"],
+            "company_ref": application["company_ref"],
+            "deleted": False,
+            "_id": {"$ne": application["_id"]}
+        },
+        {"role": 1}
+    )
+    return any(" ".join(str(other.get("role") or "").lower().split()) == role_key for other in others)
+
+def build_application(user_email, company_name, role, url, date_applied, notes, batch=None):
+    """Build a new application document."""
     # Convert date string to datetime object
     if isinstance(date_applied, str):
         date_applied = datetime.strptime(date_applied, '%Y-%m-%d')
-    elif hasattr(date_applied, 'date'):  # It's a datetime.date object
+    elif not isinstance(date_applied, datetime):  # It's a datetime.date object
         # Convert date to datetime (start of day)
         date_applied = datetime.combine(date_applied, datetime.min.time())
     
-    db.applications.insert_one({
+    # Snap to known spellings (and to earlier rows of the same import)
+    company_name = canonical_value(user_email, "company_name", company_name, batch)
+    role = canonical_value(user_email, "role", role, batch)
+    
+    return {
         "user_email": user_email,
         "company_name": company_name,
         "role": role,
         "url": url,
         "date_applied": date_applied,
         "notes": notes,
-        "created_at": datetime.now()
-    })
+        "status": "applied",
+        "status_history": [{"status": "applied", "at": datetime.now()}],
+        "created_at": datetime.now(),
+        "deleted": False,
+        "company_ref": company_reference(user_email, company_name),
+        **application_keys(company_name, role, url)
+    }
+
+def merge_application(db, application):
+    """Merge a duplicate application into the one already stored."""
+    duplicate_filter = [{key: application[key]} for key in ("fingerprint", "url_key") if key in application]
+    
+    existing = db.applications.find_one(
+        {"user_email": application["user_email"], "deleted": False, "$or": duplicate_filter},
+        {"url": 1, "url_key": 1, "notes": 1}
+    )
+    if existing is None:
+        return False
+    
+    updates = {}
+    if not existing.get('url') and application.get('url'):
+        updates["url"] = application["url"]
+        if "url_key" in application:
+            updates["url_key"] = application["url_key"]
+    
+    new_notes = (application.get('notes') or "").strip()
+    old_notes = existing.get('notes') or ""
+    if new_notes and new_notes not in old_notes:
+        updates["notes"] = f"{old_notes}\n\n{new_notes}" if old_notes else new_notes
+    
+    if updates:
+        try:
+            db.applications.update_one({"_id": existing["_id"]}, {"$set": updates})
+        except DuplicateKeyError:
+            # The URL belongs to yet another application; keep the notes only
+            updates.pop("url", None)
+            updates.pop("url_key", None)
+            if updates:
+                db.applications.update_one({"_id": existing["_id"]}, {"$set": updates})
+        invalidate_frames(application["user_email"], "applications")
+        record_event(db, application["user_email"], "applications", "merge", existing["_id"], fields=sorted(updates))
     return True
 
-def get_applications(user_email, limit=None):
-    """Get all applications for a user with optional limit."""
+def add_application(user_email, company_name, role, url, date_applied, notes, on_duplicate="reject"):
+    """Add a new job application, rejecting or merging duplicates of a stored one."""
     db = get_database()
     if db is None:
-        return pd.DataFrame()
+        return False
     
-    query = db.applications.find(
-        {"user_email": user_email}
-    ).sort("date_applied", -1)
+    if not rate_limit("write", user_email):
+        return False
     
-    if limit:
-        query = query.limit(limit)
-        
-    applications = list(query)
+    application = build_application(user_email, company_name, role, url, date_applied, notes)
     
-    if applications:
-        # Convert MongoDB documents to DataFrame
-        for app in applications:
-            app['ID'] = str(app['_id'])  # Convert ObjectId to string
-            app['Company'] = app['company_name']
-            app['Role'] = app['role']
-            app['URL'] = app['url']
-            app['Date Applied'] = app['date_applied']
-            app['Notes'] = app['notes']
-            app['Created'] = app['created_at']
-        
-        df = pd.DataFrame(applications)
-        return df[['ID', 'Company', 'Role', 'URL', 'Date Applied', 'Notes', 'Created']]
+    try:
+        insert_document(db.applications, application)
+    except DuplicateKeyError:
+        if on_duplicate == "merge" and merge_application(db, application):
+            return ADD_MERGED
+        return ADD_DUPLICATE
     
-    return pd.DataFrame()
+    remember_application(application)
+    rollup_document(db, user_email, "applications", application, delta=1)
+    record_events(db, user_email, [document_event("applications", "add", application)])
+    if "url_key" in application and has_similar_posting(db, application):
+        return ADD_SIMILAR
+    return ADD_INSERTED
 
-def search_applications(user_email, company_filter=None, date_from=None, date_to=None, role_filter=None, limit=50):
-    """Search applications with various filters."""
+def import_applications(user_email, records, on_duplicate="reject"):
+    """Bulk import applications, detecting duplicates through the unique indexes."""
     db = get_database()
     if db is None:
-        return pd.DataFrame()
+        return None
     
-    # Build query
-    query = {"user_email": user_email}
+    if not rate_limit("write", user_email):
+        return None
     
-    # Add company filter (case-insensitive partial match)
-    if company_filter:
-        query["company_name"] = {"$regex": company_filter, "$options": "i"}
+    batch = {}
+    applications = [
+        build_application(
+            user_email,
+            record['company_name'],
+            record['role'],
+            record.get('url', ""),
+            record['date_applied'],
+            record.get('notes', ""),
+            batch
+        )
+        for record in records
+    ]
+    summary = {ADD_INSERTED: 0, ADD_MERGED: 0, ADD_DUPLICATE: 0}
+    if not applications:
+        return summary
     
-    # Add role filter (case-insensitive partial match)
-    if role_filter:
-        query["role"] = {"$regex": role_filter, "$options": "i"}
+    duplicates = set()
+    try:
+        db.applications.insert_many(applications, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get('writeErrors', [])
+        if any(error['code'] != 11000 for error in errors):
+            raise
+        duplicates = {error['index'] for error in errors}
     
-    # Add date range filter
-    if date_from or date_to:
-        date_query = {}
+    events = []
+    for index, application in enumerate(applications):
+        if index not in duplicates:
+            remember_application(application)
+            rollup_document(db, user_email, "applications", application, delta=1)
+            events.append(document_event("applications", "add", application))
+            summary[ADD_INSERTED] += 1
+        elif on_duplicate == "merge" and merge_application(db, application):
+            summary[ADD_MERGED] += 1
+        else:
+            summary[ADD_DUPLICATE] += 1
+    
+    record_events(db, user_email, events)
+    return summary
+
+# DataFrame columns of an application and the document fields they come from
+APPLICATION_COLUMNS = {
+    "Company": ("company_name", ""),
+    "Role": ("role", ""),
+    "URL": ("url", ""),
+    "Date Applied": ("date_applied", None),
+    "Notes": ("notes", ""),
+    "Status": ("status", "applied"),
+    "Created": ("created_at", None)
+}
+
+# Extra column of search results that include the archive
+ARCHIVED_COLUMNS = {**APPLICATION_COLUMNS, "Archived": ("archived_at", None)}
+
+def application_frame(applications, columns=APPLICATION_COLUMNS):
+    """Convert application documents to the compact applications DataFrame."""
+    if not applications:
+        return pd.DataFrame()
+    return build_frame(
+        applications,
+        columns,
+        categories=("Company", "Role", "Status"),
+        dates=("Date Applied", "Created", "Archived")
+    )
+
+def get_applications(user_email, limit=None):
+    """Get all applications for a user with optional limit (cached per user)."""
+    db = get_database()
+    if db is None:
+        return pd.DataFrame()
+    
+    def load():
+        query = db.applications.find(
+            {"user_email": user_email, "deleted": False},
+            frame_projection(APPLICATION_COLUMNS)
+        ).sort("date_applied", -1)
+        if limit:
+            query = query.limit(limit)
+        return application_frame(list(query))
+    
+    return get_frame_cache().get(user_email, ("applications", limit), load)
+
+def search_applications(user_email, company_filter=None, date_from=None, date_to=None, role_filter=None, status_filter=None, limit=50, include_archive=False):
+    """Search applications with various filters, optionally across the archive too."""
+    db = get_database()
+    if db is None:
+        return pd.DataFrame()
+    
+    # Build query
+    query = {"user_email": user_email, "deleted": False}
+    
+    # Add status filter (exact match, served by the status index)
+    if status_filter:
+        query["status"] = status_filter
+    
+    # Add company filter (case-insensitive partial match)
+    if company_filter:
+        query["company_name"] = {"$regex": re.escape(company_filter), "$options": "i"}
+    
+    # Add role filter (case-insensitive partial match)
+    if role_filter:
+        query["role"] = {"$regex": re.escape(role_filter), "$options": "i"}
+    
+    # Add date range filter
+    if date_from or date_to:
+        date_query = {}
         if date_from:
             date_query["$gte"] = datetime.combine(date_from, datetime.min.time())
         if date_to:
             date_query["$lte"] = datetime.combine(date_to, datetime.max.time())
         query["date_applied"] = date_query
     
-    # Execute query with limit
-    applications = list(db.applications.find(query).sort("date_applied", -1).limit(limit))
+    if not include_archive:
+        # Execute query with limit
+        applications = list(db.applications.find(
+            query,
+            frame_projection(APPLICATION_COLUMNS)
+        ).sort("date_applied", -1).limit(limit))
+        return application_frame(applications)
     
-    if applications:
-        # Convert MongoDB documents to DataFrame
-        for app in applications:
-            app['ID'] = str(app['_id'])  # Convert ObjectId to string
-            app['Company'] = app['company_name']
-            app['Role'] = app['role']
-            app['URL'] = app['url']
-            app['Date Applied'] = app['date_applied']
-            app['Notes'] = app['notes']
-            app['Created'] = app['created_at']
-        
-        df = pd.DataFrame(applications)
-        return df[['ID', 'Company', 'Role', 'URL', 'Date Applied', 'Notes', 'Created']]
-    
-    return pd.DataFrame()
+    # Take the newest matches of each tier, then keep the newest overall
+    applications = [
+        application
+        for collection in with_archive("applications")
+        for application in db[collection].find(query, frame_projection(ARCHIVED_COLUMNS)).sort("date_applied", -1).limit(limit)
+    ]
+    applications.sort(key=lambda application: application['date_applied'], reverse=True)
+    return application_frame(applications[:limit], ARCHIVED_COLUMNS)
 
 def delete_application(app_id, user_email):
-    """Delete an application."""
+    """Move an application to the trash."""
     db = get_database()
     if db is None:
         return False
-        
+    
+    try:
+        return move_to_trash(db, "applications", app_id, user_email)
+    except (bson.errors.InvalidId, PyMongoError):
+        logger.warning("Failed to move application to trash", exc_info=True, extra={"item_id": app_id})
+        return False
+
+def update_application_status(app_id, user_email, status):
+    """Move an application to a new pipeline stage and record the transition."""
+    db = get_database()
+    if db is None or status not in APPLICATION_STATUSES:
+        return False
+    
+    if not rate_limit("write", user_email):
+        return False
+    
     from bson import ObjectId
     
     try:
-        db.applications.delete_one({
-            "_id": ObjectId(app_id),
-            "user_email": user_email
-        })
+        now = datetime.now()
+        previous = db.applications.find_one_and_update(
+            {"_id": ObjectId(app_id), "user_email": user_email, "deleted": False, "status": {"$ne": status}},
+            {
+                "$set": {"status": status},
+                "$push": {"status_history": {"status": status, "at": now}}
+            },
+            projection={"date_applied": 1, "company_name": 1}
+        )
+        if previous is None:
+            return False
+        invalidate_frames(user_email, "applications")
+        record_event(db, user_email, "applications", "status", previous["_id"], status=status)
+        
+        # The first move out of "applied" counts as a response from the company
+        if status != "applied":
+            responded = db.applications.update_one(
+                {"_id": previous["_id"], "responded_at": {"$exists": False}},
+                {"$set": {"responded_at": now}}
+            )
+            if responded.modified_count:
+                update_rollups(db, user_email, "responses", previous["date_applied"], previous["company_name"])
         return True
-    except:
+    except (bson.errors.InvalidId, PyMongoError):
+        logger.warning("Failed to update application status", exc_info=True, extra={"item_id": app_id})
         return False
 
+def get_status_counts(user_email):
+    """Count applications in each pipeline stage."""
+    db = get_database()
+    if db is None:
+        return {status: 0 for status in APPLICATION_STATUSES}
+    
+    return {
+        status: db.applications.count_documents({"user_email": user_email, "deleted": False, "status": status})
+        for status in APPLICATION_STATUSES
+    }
+
+def get_applications_by_status(user_email, status, limit=20):
+    """Get the most recent applications in one pipeline stage."""
+    db = get_database()
+    if db is None:
+        return []
+    
+    applications = list(db.applications.find(
+        {"user_email": user_email, "deleted": False, "status": status},
+        {"company_name": 1, "role": 1, "date_applied": 1, "status": 1}
+    ).sort("date_applied", -1).limit(limit))
+    
+    labels = format_dates(to_datetimes([app.get('date_applied') for app in applications]))
+    for app, label in zip(applications, labels):
+        app['date_label'] = label
+    return applications
+
 def add_networking(user_email, company_name, linkedin_url, date_sent, notes):
-    """Add a new networking attempt."""
+    """Record an outreach, adding it to the stored contact when the profile is already known.
+    
+    Returns ADD_INSERTED for a new contact, ADD_MERGED for a repeat one, or False.
+    """
     db = get_database()
     if db is None:
         return False
+    
+    if not rate_limit("write", user_email):
+        return False
         
     # Convert date string to datetime object
     if isinstance(date_sent, str):
         date_sent = datetime.strptime(date_sent, '%Y-%m-%d')
-    elif hasattr(date_sent, 'date'):  # It's a datetime.date object
+    elif not isinstance(date_sent, datetime):  # It's a datetime.date object
         # Convert date to datetime (start of day)
         date_sent = datetime.combine(date_sent, datetime.min.time())
     
-    db.networking.insert_one({
-        "user_email": user_email,
-        "company_name": company_name,
-        "linkedin_url": linkedin_url,
-        "date_sent": date_sent,
-        "notes": notes,
-        "created_at": datetime.now()
-    })
+    company_name = canonical_value(user_email, "company_name", company_name)
+    profile_key = canonicalize_linkedin_url(linkedin_url)
+    outreach = {"date_sent": date_sent, "company_name": company_name, "notes": notes}
+    
+    # A concurrent first outreach to the same profile makes the insert fail; take the update path then
+    for _ in range(2):
+        if profile_key and add_outreach(db, user_email, profile_key, outreach):
+            remember_value(user_email, "company_name", company_name)
+            return ADD_MERGED
+        
+        networking = {
+            "user_email": user_email,
+            "company_name": company_name,
+            "linkedin_url": linkedin_url,
+            "date_sent": date_sent,
+            "notes": notes,
+            "outreach": [outreach],
+            "outreach_count": 1,
+            "created_at": datetime.now(),
+            "deleted": False,
+            "company_ref": company_reference(user_email, company_name)
+        }
+        if profile_key:
+            networking["profile_key"] = profile_key
+        try:
+            insert_document(db.networking, networking)
+        except DuplicateKeyError:
+            continue
+        remember_value(user_email, "company_name", company_name)
+        rollup_document(db, user_email, "networking", networking, delta=1)
+        record_events(db, user_email, [document_event("networking", "add", networking)])
+        return ADD_INSERTED
+    return False
+
+def add_outreach(db, user_email, profile_key, outreach):
+    """Append an outreach to the user's stored contact for a profile; False when there is none."""
+    update = {
+        "$max": {"date_sent": outreach["date_sent"]},
+        "$inc": {"outreach_count": 1},
+        "$push": {"outreach": {
+            "$each": [outreach],
+            "$sort": {"date_sent": 1},
+            "$slice": -OUTREACH_HISTORY_LIMIT
+        }}
+    }
+    if outreach["notes"]:
+        update["$set"] = {"notes": outreach["notes"]}
+    
+    previous = db.networking.find_one_and_update(
+        {"user_email": user_email, "profile_key": profile_key, "deleted": False},
+        update,
+        projection=rollup_projection("networking")
+    )
+    if previous is None:
+        return False
+    
+    # The outreach counts on its own day; outreach the history trims moves to the oldest day kept
+    history = sorted((previous.get("outreach") or []) + [outreach], key=lambda entry: entry["date_sent"])
+    contact = {
+        **previous,
+        "outreach": history[-OUTREACH_HISTORY_LIMIT:],
+        "outreach_count": previous.get("outreach_count", 1) + 1
+    }
+    days = {}
+    for (day, company_name), delta in rollup_changes("networking", previous, contact).items():
+        update_rollups(db, user_email, "networking", day, company_name, delta=delta)
+        day_key = f"days.{day.strftime('%Y-%m-%d')}.networking"
+        days[day_key] = days.get(day_key, 0) + delta
+    summary_update = {"$inc": days, "$max": {"networking.latest": outreach["date_sent"]}}
+    company_key = normalize_company(outreach["company_name"])
+    if company_key:
+        summary_update["$addToSet"] = {"networking.companies": company_key}
+    db.user_summaries.update_one({"_id": user_email}, summary_update, upsert=True)
+    invalidate_frames(user_email, "networking")
+    record_event(
+        db, user_email, "networking", "outreach", previous["_id"],
+        date=outreach["date_sent"], company=outreach["company_name"]
+    )
     return True
 
+def get_contact(user_email, linkedin_url):
+    """Look up the user's contact for a LinkedIn profile through the profile index."""
+    db = get_database()
+    profile_key = canonicalize_linkedin_url(linkedin_url)
+    if db is None or not profile_key:
+        return None
+    
+    return db.networking.find_one(
+        {"user_email": user_email, "profile_key": profile_key, "deleted": False},
+        {"user_email": 0, "company_ref": 0}
+    )
+
+# DataFrame columns of a networking attempt and the document fields they come from
+NETWORKING_COLUMNS = {
+    "Company": ("company_name", ""),
+    "LinkedIn URL": ("linkedin_url", ""),
+    "Date Sent": ("date_sent", None),
+    "Notes": ("notes", ""),
+    "Outreach": ("outreach_count", 1),
+    "Created": ("created_at", None)
+}
+
 def get_networking(user_email):
-    """Get all networking attempts for a user."""
+    """Get all networking attempts for a user (cached per user)."""
     db = get_database()
     if db is None:
         return pd.DataFrame()
-        
-    networking = list(db.networking.find(
-        {"user_email": user_email}
-    ).sort("date_sent", -1))
     
-    if networking:
-        # Convert MongoDB documents to DataFrame
-        for net in networking:
-            net['ID'] = str(net['_id'])  # Convert ObjectId to string
-            net['Company'] = net['company_name']
-            net['LinkedIn URL'] = net['linkedin_url']
-            net['Date Sent'] = net['date_sent']
-            net['Notes'] = net['notes']
-            net['Created'] = net['created_at']
-        
-        df = pd.DataFrame(networking)
-        return df[['ID', 'Company', 'LinkedIn URL', 'Date Sent', 'Notes', 'Created']]
+    def load():
+        networking = list(db.networking.find(
+            {"user_email": user_email, "deleted": False},
+            frame_projection(NETWORKING_COLUMNS)
+        ).sort("date_sent", -1))
+        if not networking:
+            return pd.DataFrame()
+        return build_frame(
+            networking,
+            NETWORKING_COLUMNS,
+            categories=("Company",),
+            dates=("Date Sent", "Created"),
+            counts=("Outreach",)
+        )
     
-    return pd.DataFrame()
+    return get_frame_cache().get(user_email, ("networking", None), load)
 
 def delete_networking(net_id, user_email):
-    """Delete a networking attempt."""
+    """Move a networking attempt to the trash."""
     db = get_database()
     if db is None:
         return False
-        
-    from bson import ObjectId
     
     try:
-        db.networking.delete_one({
-            "_id": ObjectId(net_id),
-            "user_email": user_email
-        })
-        return True
-    except:
+        return move_to_trash(db, "networking", net_id, user_email)
+    except (bson.errors.InvalidId, PyMongoError):
+        logger.warning("Failed to move networking contact to trash", exc_info=True, extra={"item_id": net_id})
         return False
 
 def add_note(user_email, title, body):
@@ -497,180 +1989,1533 @@ def add_note(user_email, title, body):
     db = get_database()
     if db is None:
         return False
+    
+    if not rate_limit("write", user_email):
+        return False
         
-    db.notes.insert_one({
+    note = {
         "user_email": user_email,
         "title": title,
         "body": body,
-        "created_at": datetime.now()
-    })
+        "body_length": len(body or ""),
+        "created_at": datetime.now(),
+        "deleted": False
+    }
+    insert_document(db.notes, note)
+    rollup_document(db, user_email, "notes", note, delta=1)
+    record_events(db, user_email, [document_event("notes", "add", note)])
     return True
 
-def get_notes(user_email):
-    """Get all notes for a user."""
+# DataFrame columns of a note listing; bodies are loaded on demand by get_note_body
+NOTE_COLUMNS = {
+    "Title": ("title", ""),
+    "Length": ("body_length", 0),
+    "Created": ("created_at", None)
+}
+
+def get_notes(user_email, limit=None):
+    """Get notes for a user without their bodies, with optional limit (cached per user)."""
     db = get_database()
     if db is None:
         return pd.DataFrame()
+    
+    def load():
+        query = db.notes.find(
+            {"user_email": user_email, "deleted": False},
+            frame_projection(NOTE_COLUMNS)
+        ).sort("created_at", -1)
+        if limit:
+            query = query.limit(limit)
+        notes = list(query)
+        if not notes:
+            return pd.DataFrame()
+        return build_frame(notes, NOTE_COLUMNS, dates=("Created",), counts=("Length",))
+    
+    return get_frame_cache().get(user_email, ("notes", limit), load)
+
+@st.cache_data(max_entries=NOTE_BODY_CACHE_SIZE, show_spinner=False)
+def get_note_body(note_id, user_email):
+    """Get the body of a single live note, keeping recently opened bodies cached.
+    
+    Returns None when the note does not exist or is in the trash.
+    """
+    db = get_database()
+    if db is None:
+        return None
+    
+    from bson import ObjectId
+    
+    note = db.notes.find_one(
+        {"_id": ObjectId(note_id), "user_email": user_email, "deleted": False},
+        {"body": 1}
+    )
+    return note.get('body', "") if note else None
+
+def delete_note(note_id, user_email):
+    """Move a note to the trash."""
+    db = get_database()
+    if db is None:
+        return False
+    
+    try:
+        deleted = move_to_trash(db, "notes", note_id, user_email)
+    except (bson.errors.InvalidId, PyMongoError):
+        logger.warning("Failed to move note to trash", exc_info=True, extra={"item_id": note_id})
+        return False
+    if deleted:
+        # A body cached while the note was live must not be served from the trash
+        get_note_body.clear()
+    return deleted
+
+# ============================================================================
+# TODO LIST FUNCTIONS
+# ============================================================================
+
+def add_todo(user_email, task, priority="Medium", due_date=None):
+    """Add a new todo item."""
+    db = get_database()
+    if db is None:
+        return False
+    
+    if not rate_limit("write", user_email):
+        return False
+    
+    # Convert date if provided (BSON only stores full datetimes)
+    if due_date:
+        due_date = rollup_day(due_date)
+    
+    todo = {
+        "user_email": user_email,
+        "task": task,
+        "priority": priority,
+        "priority_rank": PRIORITY_RANKS.get(priority, PRIORITY_RANKS["Medium"]),
+        "due_date": due_date,
+        "completed": False,
+        "created_at": datetime.now(),
+        "deleted": False
+    }
+    insert_document(db.todos, todo)
+    rollup_document(db, user_email, "todos", todo, delta=1)
+    record_events(db, user_email, [document_event("todos", "add", todo)])
+    return True
+
+# DataFrame columns of a todo and the document fields they come from
+TODO_COLUMNS = {
+    "Task": ("task", ""),
+    "Priority": ("priority", "Medium"),
+    "Due Date": ("due_date", None),
+    "Completed": ("completed", False),
+    "Created": ("created_at", None)
+}
+
+def get_todos(user_email):
+    """Get all todos for a user (cached per user)."""
+    db = get_database()
+    if db is None:
+        return pd.DataFrame()
+    
+    def load():
+        todos = list(db.todos.find(
+            {"user_email": user_email, "deleted": False},
+            frame_projection(TODO_COLUMNS)
+        ).sort([("completed", 1), ("priority_rank", -1), ("created_at", -1)]))
+        if not todos:
+            return pd.DataFrame()
+        return build_frame(
+            todos,
+            TODO_COLUMNS,
+            categories=("Priority",),
+            dates=("Due Date", "Created")
+        )
+    
+    return get_frame_cache().get(user_email, ("todos", None), load)
+
+def get_due_todos(user_email, days=DUE_SOON_DAYS, limit=50):
+    """Get pending todos that are overdue or due within the next few days."""
+    db = get_database()
+    if db is None:
+        return pd.DataFrame()
+    
+    # Todos without a due date never fall inside the range
+    horizon = rollup_day(datetime.now()) + timedelta(days=days + 1)
+    todos = list(db.todos.find(
+        {"user_email": user_email, "deleted": False, "completed": False, "due_date": {"$lt": horizon}},
+        {"task": 1, "priority": 1, "due_date": 1}
+    ).sort("due_date", 1).limit(limit))
+    
+    if not todos:
+        return pd.DataFrame()
+    
+    df = build_frame(
+        todos,
+        {column: TODO_COLUMNS[column] for column in ("Task", "Priority", "Due Date")},
+        categories=("Priority",),
+        dates=("Due Date",)
+    )
+    df['Days Left'] = (df['Due Date'].dt.normalize() - pd.Timestamp(datetime.now().date())).dt.days
+    return df
+
+def count_due_todos(user_email, days=0):
+    """Count pending todos that are overdue and due within the next few days."""
+    db = get_database()
+    if db is None:
+        return {"overdue": 0, "due": 0}
+    
+    today = rollup_day(datetime.now())
+    query = {"user_email": user_email, "deleted": False, "completed": False}
+    
+    return {
+        "overdue": db.todos.count_documents({**query, "due_date": {"$lt": today}}),
+        "due": db.todos.count_documents({
+            **query,
+            "due_date": {"$gte": today, "$lt": today + timedelta(days=days + 1)}
+        })
+    }
+
+def toggle_todo_status(todo_id, user_email):
+    """Toggle the completion status of a todo."""
+    db = get_database()
+    if db is None:
+        return False
+    
+    if not rate_limit("write", user_email):
+        return False
+    
+    from bson import ObjectId
+    
+    try:
+        # Flip the status with a conditional update instead of reading it first;
+        # pending todos are toggled far more often, so try that state first
+        for completed in (False, True):
+            todo = db.todos.find_one_and_update(
+                {"_id": ObjectId(todo_id), "user_email": user_email, "deleted": False, "completed": completed},
+                {"$set": {"completed": not completed}},
+                projection={"_id": 1}
+            )
+            if todo:
+                db.user_summaries.update_one(
+                    {"_id": user_email},
+                    {"$inc": {"todos.completed": -1 if completed else 1}}
+                )
+                invalidate_frames(user_email, "todos")
+                record_event(db, user_email, "todos", "toggle", todo["_id"], completed=not completed)
+                return True
+        return False
+    except (bson.errors.InvalidId, PyMongoError):
+        logger.warning("Failed to toggle todo", exc_info=True, extra={"item_id": todo_id})
+        return False
+
+def delete_todo(todo_id, user_email):
+    """Move a todo item to the trash."""
+    db = get_database()
+    if db is None:
+        return False
+    
+    try:
+        return move_to_trash(db, "todos", todo_id, user_email)
+    except (bson.errors.InvalidId, PyMongoError):
+        logger.warning("Failed to move todo to trash", exc_info=True, extra={"item_id": todo_id})
+        return False
+
+# ============================================================================
+# USER SUMMARY FUNCTIONS
+# ============================================================================
+
+def update_summary(db, user_email, kind, document, delta, company_count=None):
+    """Apply a document's add or removal to the user's summary document."""
+    date_field = ROLLUP_SOURCES[kind]
+    when = document[date_field]
+    increments = {f"{kind}.total": delta}
+    for occurrence, count in rollup_occurrences(kind, document):
+        day_key = f"days.{rollup_day(occurrence[date_field]).strftime('%Y-%m-%d')}.{kind}"
+        increments[day_key] = increments.get(day_key, 0) + delta * count
+    if kind == "notes":
+        increments["notes.body_chars"] = delta * document.get("body_length", 0)
+    if kind == "todos" and document.get("completed"):
+        increments["todos.completed"] = delta
+    
+    update = {"$inc": increments}
+    company_key = normalize_company(document.get("company_name"))
+    if delta > 0:
+        update["$max"] = {f"{kind}.latest": when}
+        if company_key:
+            update["$addToSet"] = {f"{kind}.companies": company_key}
+    elif company_key and company_count is not None and company_count <= 0:
+        update["$pull"] = {f"{kind}.companies": company_key}
+    
+    db.user_summaries.update_one({"_id": user_email}, update, upsert=True)
+    
+    # $max cannot move "latest" back, so look it up again after a removal
+    if delta < 0:
+        date_field = ROLLUP_SOURCES[kind]
+        latest = db[kind].find_one(
+            {"user_email": user_email, "deleted": False},
+            {date_field: 1},
+            sort=[(date_field, -1)]
+        )
+        if latest:
+            refresh = {"$set": {f"{kind}.latest": latest[date_field]}}
+        else:
+            refresh = {"$unset": {f"{kind}.latest": ""}}
+        db.user_summaries.update_one({"_id": user_email}, refresh)
+
+def reconcile_user_summary(user_email):
+    """Recompute a user's summary document from the raw collections to fix drift."""
+    db = get_database()
+    if db is None:
+        return None
+    
+    summary = {"_id": user_email, "reconciled_at": datetime.now(), "days": {}}
+    
+    for kind, date_field in ROLLUP_SOURCES.items():
+        group = {"_id": None, "total": {"$sum": 1}, "latest": {"$max": f"${date_field}"}}
+        if kind in ("applications", "networking"):
+            group["companies"] = {"$addToSet": "$company_name"}
+        if kind == "notes":
+            group["body_chars"] = {"$sum": "$body_length"}
+        if kind == "todos":
+            group["completed"] = {"$sum": {"$cond": ["$completed", 1, 0]}}
         
-    notes = list(db.notes.find(
-        {"user_email": user_email}
-    ).sort("created_at", -1))
+        rows = list(db[kind].aggregate([
+            {"$match": {"user_email": user_email, "deleted": False}},
+            {"$group": group}
+        ]))
+        stats = rows[0] if rows else {"total": 0}
+        stats.pop("_id", None)
+        if stats.get("latest") is None:
+            stats.pop("latest", None)
+        if "companies" in stats:
+            stats["companies"] = sorted({normalize_company(c) for c in stats["companies"]} - {""})
+        summary[kind] = stats
+    
+    since = rollup_day(datetime.now()) - timedelta(days=SUMMARY_DAYS_KEPT)
+    for row in db.daily_stats.find({"user_email": user_email, "day": {"$gte": since}}):
+        summary["days"][row['day'].strftime('%Y-%m-%d')] = {
+            kind: row.get(kind, 0) for kind in ROLLUP_SOURCES
+        }
+    
+    db.user_summaries.replace_one({"_id": user_email}, summary, upsert=True)
+    return summary
+
+def get_user_summary(user_email):
+    """Get the user's summary document, reconciling it when it is missing or stale."""
+    db = get_database()
+    if db is None:
+        return {}
+    
+    summary = db.user_summaries.find_one({"_id": user_email})
+    stale_before = datetime.now() - timedelta(hours=SUMMARY_RECONCILE_HOURS)
+    if summary is None or summary.get('reconciled_at', datetime.min) < stale_before:
+        summary = reconcile_user_summary(user_email)
+        # Purged applications take no hook with them, so free their attachments here too
+        release_purged_attachments(user_email)
+    return summary or {}
+
+def summary_stat(summary, kind, field, default=0):
+    """Read one counter from a summary document."""
+    value = summary.get(kind, {}).get(field)
+    return default if value is None else value
+
+def summary_this_week(summary, kind):
+    """Count a kind's activity over the last seven days from the summary."""
+    since = (datetime.now() - timedelta(days=6)).strftime('%Y-%m-%d')
+    return sum(
+        counts.get(kind, 0)
+        for day, counts in summary.get('days', {}).items()
+        if day >= since
+    )
+
+# ============================================================================
+# ACTIVITY EVENT LOG
+# ============================================================================
+
+def record_events(db, user_email, events):
+    """Append compact mutation events to the user's activity log.
+    
+    Events are numbered from a per-user counter, so each user's log has
+    contiguous sequence numbers consumers can resume from.
+    """
+    if not events:
+        return
+    
+    try:
+        counter = db.event_counters.find_one_and_update(
+            {"_id": user_email},
+            {"$inc": {"seq": len(events)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        first = counter['seq'] - len(events) + 1
+        now = datetime.now()
+        entries = [{"user_email": user_email, "seq": first + offset, "at": now, **event} for offset, event in enumerate(events)]
+        if len(entries) == 1:
+            insert_document(db.events, entries[0])
+        else:
+            db.events.insert_many(entries)
+    except PyMongoError:
+        # The change itself is already stored; readers skip the lost numbers after the grace period
+        logger.warning(
+            "Failed to record activity events",
+            exc_info=True,
+            extra={"user_email": user_email, "events": len(events)}
+        )
+
+def activity_event(kind, action, item_id, **data):
+    """Build one event; data holds only the fields consumers need to apply it."""
+    event = {"kind": kind, "action": action, "item_id": str(item_id)}
+    data = {field: value for field, value in data.items() if value is not None}
+    if data:
+        event["data"] = data
+    return event
+
+def document_event(kind, action, document):
+    """Event for a document being added, deleted or restored, carrying its rollup fields."""
+    return activity_event(
+        kind,
+        action,
+        document['_id'],
+        date=document.get(ROLLUP_SOURCES[kind]),
+        company=document.get('company_name')
+    )
+
+def record_event(db, user_email, kind, action, item_id, **data):
+    """Append a single event to the user's activity log."""
+    record_events(db, user_email, [activity_event(kind, action, item_id, **data)])
+
+def read_events(user_email, after=0, since=None, limit=EVENTS_PAGE_SIZE):
+    """Read a user's events, oldest first, after sequence number `after` or from time `since`.
+    
+    Reading stops in front of a missing sequence number until it is older
+    than EVENT_GAP_GRACE_SECONDS, so a concurrent writer's event is never
+    skipped; numbers lost to failures or expiry are passed over after that.
+    """
+    db = get_database()
+    if db is None:
+        return []
+    
+    query = {"user_email": user_email, "seq": {"$gt": after}}
+    if since is not None:
+        query["at"] = {"$gte": since}
+    
+    events = db.events.find(query, {"_id": 0, "user_email": 0}).sort("seq", 1).limit(limit)
+    
+    settled = []
+    expected = after + 1 if since is None else None
+    in_flight_after = datetime.now() - timedelta(seconds=EVENT_GAP_GRACE_SECONDS)
+    for event in events:
+        if expected is not None and event['seq'] != expected and event['at'] > in_flight_after:
+            break
+        settled.append(event)
+        expected = event['seq'] + 1
+    return settled
+
+# ============================================================================
+# TRASH FUNCTIONS
+# ============================================================================
+
+# Fields shown for each collection when listing the trash
+TRASH_LABEL_FIELDS = {
+    "applications": ("company_name", "role"),
+    "networking": ("company_name",),
+    "notes": ("title",),
+    "todos": ("task",)
+}
+
+def rollup_projection(collection):
+    """Projection of the fields a document contributes to the rollups."""
+    return {
+        ROLLUP_SOURCES[collection]: 1,
+        "company_name": 1,
+        "responded_at": 1,
+        "body_length": 1,
+        "completed": 1,
+        "outreach": 1,
+        "outreach_count": 1
+    }
+
+def rollup_occurrences(kind, document):
+    """The dated entries a document counts as, with how many times each counts.
     
-    if notes:
-        # Convert MongoDB documents to DataFrame
-        for note in notes:
-            note['ID'] = str(note['_id'])  # Convert ObjectId to string
-            note['Title'] = note['title']
-            note['Body'] = note['body']
-            note['Created'] = note['created_at']
+    A contact counts each outreach in its history; outreach trimmed from the
+    bounded history counts on the oldest day still kept. Other documents
+    count once.
+    """
+    history = document.get("outreach") if kind == "networking" else None
+    if history:
+        overflow = max(document.get("outreach_count", len(history)) - len(history), 0)
+        return [(history[0], 1 + overflow)] + [(entry, 1) for entry in history[1:]]
+    return [(document, 1)]
+
+def rollup_changes(kind, before, after):
+    """How a document's contribution per (day, company) moves between two versions of it."""
+    date_field = ROLLUP_SOURCES[kind]
+    changes = Counter()
+    for document, sign in ((before, -1), (after, 1)):
+        for occurrence, count in rollup_occurrences(kind, document):
+            key = (rollup_day(occurrence[date_field]), occurrence.get("company_name") or document.get("company_name"))
+            changes[key] += sign * count
+    return {key: delta for key, delta in changes.items() if delta}
+
+def move_to_trash(db, collection, item_id, user_email):
+    """Soft delete a document so it can be restored until the TTL index purges it."""
+    from bson import ObjectId
+    
+    if not rate_limit("write", user_email):
+        return False
+    
+    removed = db[collection].find_one_and_update(
+        {"_id": ObjectId(item_id), "user_email": user_email, "deleted": False},
+        {"$set": {"deleted": True, "deleted_at": datetime.now()}},
+        projection=rollup_projection(collection)
+    )
+    if removed is None:
+        return False
+    
+    rollup_document(db, user_email, collection, removed, delta=-1)
+    record_events(db, user_email, [document_event(collection, "delete", removed)])
+    return True
+
+def restore_from_trash(collection, item_id, user_email):
+    """Restore a soft-deleted document that is still within the retention window."""
+    db = get_database()
+    if db is None or collection not in TRASH_COLLECTIONS:
+        return False
+    
+    if not rate_limit("write", user_email):
+        return False
+    
+    from bson import ObjectId
+    
+    try:
+        restored = db[collection].find_one_and_update(
+            {"_id": ObjectId(item_id), "user_email": user_email, "deleted": True},
+            {"$set": {"deleted": False}, "$unset": {"deleted_at": ""}},
+            projection=rollup_projection(collection)
+        )
+    except DuplicateKeyError:
+        # An equivalent application was added while this one was in the trash
+        return False
+    if restored is None:
+        return False
+    
+    if collection == "notes":
+        # The body was cached as missing while the note sat in the trash
+        get_note_body.clear()
+    rollup_document(db, user_email, collection, restored, delta=1)
+    record_events(db, user_email, [document_event(collection, "restore", restored)])
+    return True
+
+def get_trash(user_email, limit=20):
+    """Get the most recently deleted items across all collections."""
+    db = get_database()
+    if db is None:
+        return []
+    
+    items = []
+    for collection in TRASH_COLLECTIONS:
+        fields = TRASH_LABEL_FIELDS[collection]
+        deleted = db[collection].find(
+            {"user_email": user_email, "deleted": True},
+            {field: 1 for field in fields + ("deleted_at",)}
+        ).sort("deleted_at", -1).limit(limit)
         
-        df = pd.DataFrame(notes)
-        return df[['ID', 'Title', 'Body', 'Created']]
+        for doc in deleted:
+            items.append({
+                "collection": collection,
+                "id": str(doc['_id']),
+                "label": " • ".join(str(doc.get(field, "")) for field in fields),
+                "deleted_at": doc['deleted_at']
+            })
+    
+    items.sort(key=lambda item: item['deleted_at'], reverse=True)
+    items = items[:limit]
+    labels = format_dates(to_datetimes([item['deleted_at'] for item in items]))
+    for item, label in zip(items, labels):
+        item['deleted_label'] = label
+    return items
+
+# ============================================================================
+# ARCHIVE FUNCTIONS
+# ============================================================================
+
+def archive_due(application, now):
+    """Whether a live application has aged out of the hot collection."""
+    if application['date_applied'] < now - timedelta(days=ARCHIVE_AFTER_DAYS):
+        return True
+    history = application.get('status_history') or [{}]
+    changed_at = history[-1].get('at') or application['date_applied']
+    return (
+        application.get('status') in ARCHIVE_TERMINAL_STATUSES
+        and changed_at < now - timedelta(days=ARCHIVE_TERMINAL_DAYS)
+    )
+
+def archive_applications(user_email):
+    """Move a user's old and settled applications into the archive collection.
+    
+    Documents are copied before they are deleted, so an interrupted pass is
+    finished by the next one. Rollups keep counting archived applications;
+    the summary is reconciled to describe the hot collection only.
+    """
+    db = get_database()
+    if db is None:
+        return 0
+    
+    now = datetime.now()
+    candidates = db.applications.find({
+        "user_email": user_email,
+        "deleted": False,
+        "$or": [
+            {"date_applied": {"$lt": now - timedelta(days=ARCHIVE_AFTER_DAYS)}},
+            {"status": {"$in": list(ARCHIVE_TERMINAL_STATUSES)}}
+        ]
+    })
+    due = [application for application in candidates if archive_due(application, now)]
+    
+    for start in range(0, len(due), ARCHIVE_BATCH_SIZE):
+        batch = [{**application, "archived_at": now} for application in due[start:start + ARCHIVE_BATCH_SIZE]]
+        try:
+            db.applications_archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Copies left behind by an interrupted pass are already archived
+            if any(error['code'] != 11000 for error in e.details.get('writeErrors', [])):
+                raise
+        db.applications.delete_many({"_id": {"$in": [application['_id'] for application in batch]}})
+        record_events(db, user_email, [document_event("applications", "archive", application) for application in batch])
+    
+    if due:
+        invalidate_frames(user_email, "applications")
+        reconcile_user_summary(user_email)
+    return len(due)
+
+def ensure_archived(user_email):
+    """Run the archival pass for a user at most once per ARCHIVE_INTERVAL_HOURS."""
+    if st.session_state.get('archive_checked'):
+        return
+    
+    db = get_database()
+    if db is None:
+        return
+    
+    user = db.users.find_one({"email": user_email}, {"archived_at": 1})
+    if user and user.get('archived_at', datetime.min) < datetime.now() - timedelta(hours=ARCHIVE_INTERVAL_HOURS):
+        archive_applications(user_email)
+        db.users.update_one({"email": user_email}, {"$set": {"archived_at": datetime.now()}})
+    st.session_state.archive_checked = True
+
+def with_archive(collection):
+    """Names of a collection and, when it has one, its archive."""
+    return [collection] + ([ARCHIVE_COLLECTIONS[collection]] if collection in ARCHIVE_COLLECTIONS else [])
+
+# ============================================================================
+# ATTACHMENT FUNCTIONS
+# ============================================================================
+
+class GridFSStore:
+    """Attachment contents stored in GridFS."""
+    
+    # Collection holding one reference-counted record per distinct file
+    blob_collection = "attachment_blobs"
+    
+    def __init__(self, db):
+        self.db = db
+        self._bucket = None
+    
+    @property
+    def bucket(self):
+        # Opened on first use so sessions that never touch a file don't pay for it
+        if self._bucket is None:
+            self._bucket = GridFSBucket(self.db, bucket_name="attachments", chunk_size_bytes=ATTACHMENT_CHUNK_BYTES)
+        return self._bucket
+    
+    def put(self, source, sha256):
+        """Stream a file into the store and return its location."""
+        return self.bucket.upload_from_stream(sha256, source)
+    
+    def open(self, location):
+        """Yield the contents of a stored file chunk by chunk."""
+        stream = self.bucket.open_download_stream(location)
+        try:
+            yield from iter(lambda: stream.read(ATTACHMENT_CHUNK_BYTES), b"")
+        finally:
+            stream.close()
+    
+    def delete(self, location):
+        self.bucket.delete(location)
+
+class LocalFileStore:
+    """Attachment contents stored as content-addressed files for the local replica.
+    
+    Only the metadata syncs to MongoDB; the files stay on this machine.
+    """
+    
+    blob_collection = "attachment_files"
+    
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def put(self, source, sha256):
+        location = os.path.join(sha256[:2], sha256)
+        path = os.path.join(self.directory, location)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write next to the target and rename, so a crash never leaves a partial file behind
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as target:
+            shutil.copyfileobj(source, target, ATTACHMENT_CHUNK_BYTES)
+        os.replace(target.name, path)
+        return location
+    
+    def open(self, location):
+        with open(os.path.join(self.directory, location), "rb") as source:
+            yield from iter(lambda: source.read(ATTACHMENT_CHUNK_BYTES), b"")
+    
+    def delete(self, location):
+        try:
+            os.remove(os.path.join(self.directory, location))
+        except FileNotFoundError:
+            pass
+
+@st.cache_resource
+def get_attachment_store():
+    """Get the attachment store matching the database backend."""
+    if LOCAL_REPLICA_PATH:
+        return LocalFileStore(ATTACHMENT_DIR)
+    db = init_mongodb()
+    return GridFSStore(db) if db is not None else None
+
+def spool_upload(source):
+    """Copy an upload to a temporary file chunk by chunk, hashing it on the way.
+    
+    Returns (file, sha256, size), or None when the upload exceeds ATTACHMENT_MAX_MB.
+    """
+    limit = ATTACHMENT_MAX_MB * 1024 * 1024
+    spooled = tempfile.TemporaryFile()
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(ATTACHMENT_CHUNK_BYTES), b""):
+        size += len(chunk)
+        if size > limit:
+            spooled.close()
+            return None
+        digest.update(chunk)
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled, digest.hexdigest(), size
+
+def acquire_blob(db, store, spooled, sha256, size, attempts=3):
+    """Take a reference to the stored copy of a file, storing it only if it is new."""
+    blobs = db[store.blob_collection]
+    for _ in range(attempts):
+        # Never revive a blob whose last reference is being released
+        if blobs.find_one_and_update({"_id": sha256, "refcount": {"$gt": 0}}, {"$inc": {"refcount": 1}}):
+            return True
+        
+        spooled.seek(0)
+        location = store.put(spooled, sha256)
+        try:
+            blobs.insert_one({
+                "_id": sha256,
+                "location": location,
+                "size": size,
+                "refcount": 1,
+                "created_at": datetime.now()
+            })
+            return True
+        except DuplicateKeyError:
+            # Another upload of the same file won the race; use its copy, and
+            # keep ours only if it is that copy (content-addressed stores)
+            winner = blobs.find_one({"_id": sha256}, {"location": 1})
+            if winner is None or winner['location'] != location:
+                store.delete(location)
+    return False
+
+def release_blob(db, store, sha256):
+    """Drop a reference to a stored file, deleting the file with its last reference."""
+    blobs = db[store.blob_collection]
+    blob = blobs.find_one_and_update(
+        {"_id": sha256},
+        {"$inc": {"refcount": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if blob is not None and blob['refcount'] <= 0:
+        if blobs.delete_one({"_id": sha256, "refcount": {"$lte": 0}}).deleted_count:
+            store.delete(blob['location'])
+
+def add_attachment(app_id, user_email, filename, content_type, source):
+    """Attach a file to an application, storing identical contents only once.
+    
+    source is a binary file-like object; it is read in chunks and never held
+    in memory as a whole. Returns the attachment id, or False on failure.
+    """
+    db = get_database()
+    store = get_attachment_store()
+    if db is None or store is None:
+        return False
+    
+    if not rate_limit("write", user_email):
+        return False
+    
+    from bson import ObjectId
+    
+    try:
+        if not db.applications.count_documents({"_id": ObjectId(app_id), "user_email": user_email, "deleted": False}, limit=1):
+            return False
+    except bson.errors.InvalidId:
+        return False
+    
+    upload = spool_upload(source)
+    if upload is None:
+        return False
+    spooled, sha256, size = upload
+    
+    with spooled:
+        if not acquire_blob(db, store, spooled, sha256, size):
+            return False
+    
+    try:
+        result = db.attachments.insert_one({
+            "user_email": user_email,
+            "application_id": app_id,
+            "filename": filename,
+            "content_type": content_type or "application/octet-stream",
+            "size": size,
+            "sha256": sha256,
+            "created_at": datetime.now()
+        })
+    except PyMongoError:
+        # Give back the reference taken above so the file is not kept forever
+        release_blob(db, store, sha256)
+        logger.warning("Failed to record attachment", exc_info=True, extra={"application_id": app_id})
+        return False
+    record_event(db, user_email, "attachments", "add", result.inserted_id, application_id=app_id, size=size)
+    return str(result.inserted_id)
+
+def get_attachments(app_id, user_email):
+    """Get the attachments of an application, newest first."""
+    db = get_database()
+    if db is None:
+        return []
+    
+    attachments = list(db.attachments.find(
+        {"user_email": user_email, "application_id": app_id},
+        {"filename": 1, "content_type": 1, "size": 1, "created_at": 1}
+    ).sort("created_at", -1))
+    labels = format_dates(to_datetimes([attachment['created_at'] for attachment in attachments]))
+    for attachment, label in zip(attachments, labels):
+        attachment['id'] = str(attachment.pop('_id'))
+        attachment['created_label'] = label
+    return attachments
+
+def get_attachment_counts(user_email, app_ids):
+    """Count the attachments of several applications in one query."""
+    db = get_database()
+    if db is None or not app_ids:
+        return {}
+    
+    return {
+        group['_id']: group['count']
+        for group in db.attachments.aggregate([
+            {"$match": {"user_email": user_email, "application_id": {"$in": list(app_ids)}}},
+            {"$group": {"_id": "$application_id", "count": {"$sum": 1}}}
+        ])
+    }
+
+def open_attachment(attachment_id, user_email):
+    """Return (metadata, chunk iterator) for an attachment, or None if it is not the user's."""
+    db = get_database()
+    store = get_attachment_store()
+    if db is None or store is None:
+        return None
+    
+    from bson import ObjectId
+    
+    try:
+        attachment = db.attachments.find_one({"_id": ObjectId(attachment_id), "user_email": user_email})
+    except bson.errors.InvalidId:
+        return None
+    if attachment is None:
+        return None
+    
+    blob = db[store.blob_collection].find_one({"_id": attachment['sha256']}, {"location": 1})
+    if blob is None:
+        return None
+    return attachment, store.open(blob['location'])
+
+def read_attachment(attachment_id, user_email):
+    """Copy an attachment chunk by chunk into a temporary file, for Streamlit's download button."""
+    opened = open_attachment(attachment_id, user_email)
+    if not opened:
+        return b""
+    
+    with tempfile.NamedTemporaryFile(delete=False) as target:
+        for chunk in opened[1]:
+            target.write(chunk)
+    # Streamlit reads plain read-only files; the open handle outlives the unlinked name
+    copy = open(target.name, "rb")
+    os.remove(target.name)
+    return copy
+
+def delete_attachment(attachment_id, user_email):
+    """Remove an attachment, deleting the stored file once nothing references it."""
+    db = get_database()
+    store = get_attachment_store()
+    if db is None or store is None:
+        return False
+    
+    if not rate_limit("write", user_email):
+        return False
+    
+    from bson import ObjectId
+    
+    try:
+        attachment = db.attachments.find_one_and_delete(
+            {"_id": ObjectId(attachment_id), "user_email": user_email},
+            projection={"sha256": 1}
+        )
+    except bson.errors.InvalidId:
+        return False
+    if attachment is None:
+        return False
+    
+    release_blob(db, store, attachment['sha256'])
+    record_event(db, user_email, "attachments", "delete", attachment['_id'])
+    return True
+
+def release_purged_attachments(user_email):
+    """Delete attachments whose application was purged from the trash (archived ones keep theirs)."""
+    db = get_database()
+    if db is None:
+        return 0
+    
+    from bson import ObjectId
+    
+    app_ids = db.attachments.distinct("application_id", {"user_email": user_email})
+    if not app_ids:
+        return 0
+    
+    existing = {
+        str(app['_id'])
+        for collection in with_archive("applications")
+        for app in db[collection].find({"_id": {"$in": [ObjectId(app_id) for app_id in app_ids]}}, {"_id": 1})
+    }
+    purged = [app_id for app_id in app_ids if app_id not in existing]
+    store = get_attachment_store() if purged else None
+    if store is None:
+        return 0
+    
+    released = 0
+    for attachment in db.attachments.find(
+        {"user_email": user_email, "application_id": {"$in": purged}},
+        {"sha256": 1}
+    ):
+        if db.attachments.delete_one({"_id": attachment['_id']}).deleted_count:
+            release_blob(db, store, attachment['sha256'])
+            released += 1
+    return released
+
+# ============================================================================
+# ANALYTICS ROLLUP FUNCTIONS
+# ============================================================================
+
+# Bump this when the rollup document layout or what it counts changes to force a rebuild
+# (3: networking counts every outreach to a contact on its own day)
+ROLLUPS_VERSION = 3
+
+# Collection and date field each rollup counter is derived from
+ROLLUP_SOURCES = {
+    "applications": "date_applied",
+    "networking": "date_sent",
+    "notes": "created_at",
+    "todos": "created_at",
+}
+
+def normalize_company(company_name):
+    """Normalize a company name into a grouping key."""
+    return " ".join(str(company_name or "").lower().split())
+
+def company_reference(user_email, company_name):
+    """Hash a user's normalized company name into the key joining their company records."""
+    return hashlib.sha256(f"{user_email}|{normalize_company(company_name)}".encode()).hexdigest()
+
+def rollup_day(value):
+    """Truncate a date or datetime to the start of its day."""
+    if isinstance(value, datetime):
+        return datetime.combine(value.date(), datetime.min.time())
+    if hasattr(value, 'year'):  # It's a datetime.date object
+        return datetime.combine(value, datetime.min.time())
+    return datetime.strptime(str(value).split()[0], '%Y-%m-%d')
+
+def rollup_document(db, user_email, kind, document, delta):
+    """Add or remove a stored document's contribution to the rollups and summary."""
+    date_field = ROLLUP_SOURCES[kind]
+    company_count = None
+    for occurrence, count in rollup_occurrences(kind, document):
+        company_count = update_rollups(
+            db, user_email, kind, occurrence[date_field], occurrence.get("company_name") or document.get("company_name"), delta=delta * count
+        )
+    if document.get("responded_at"):
+        update_rollups(db, user_email, "responses", document[date_field], document.get("company_name"), delta=delta)
+    update_summary(db, user_email, kind, document, delta, company_count)
+    invalidate_frames(user_email, kind)
+
+def update_rollups(db, user_email, kind, when, company_name=None, delta=1):
+    """Apply an increment to the per-day and per-company rollup documents.
+    
+    Returns the company's updated counter, or None without a company.
+    """
+    day = rollup_day(when)
+    db.daily_stats.update_one(
+        {"user_email": user_email, "day": day},
+        {"$inc": {kind: delta}},
+        upsert=True
+    )
     
-    return pd.DataFrame()
+    if company_name:
+        update = {
+            "$inc": {kind: delta},
+            "$setOnInsert": {
+                "company_name": company_name,
+                "company_ref": company_reference(user_email, company_name)
+            }
+        }
+        if delta > 0:
+            update["$max"] = {"last_activity": day}
+        company = db.company_stats.find_one_and_update(
+            {"user_email": user_email, "company_key": normalize_company(company_name)},
+            update,
+            projection={kind: 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return company.get(kind, 0)
+    return None
 
-def delete_note(note_id, user_email):
-    """Delete a note."""
+def rebuild_rollups(user_email):
+    """Rebuild all rollup documents for a user from the raw collections."""
     db = get_database()
     if db is None:
         return False
+    
+    daily = {}
+    companies = {}
+    # Archived documents still count towards the history
+    for kind, date_field in ROLLUP_SOURCES.items():
+        stages = [{"$match": {"user_email": user_email, "deleted": False}}]
+        date, company = f"${date_field}", "$company_name"
+        if kind == "networking":
+            # A contact counts once per outreach, on that outreach's day
+            stages.append({"$unwind": {"path": "$outreach", "preserveNullAndEmptyArrays": True}})
+            date = {"$ifNull": [f"$outreach.{date_field}", date]}
+            company = {"$ifNull": ["$outreach.company_name", company]}
         
-    from bson import ObjectId
+        for collection in with_archive(kind):
+            per_day = db[collection].aggregate(stages + [
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": date}},
+                    "count": {"$sum": 1}
+                }}
+            ])
+            for row in per_day:
+                counts = daily.setdefault(rollup_day(row['_id']), {})
+                counts[kind] = counts.get(kind, 0) + row['count']
+        
+        if kind == "networking":
+            # Outreach trimmed from a full history counts on the oldest day kept, as when it is deleted
+            for collection in with_archive(kind):
+                full = db[collection].find(
+                    {**stages[0]["$match"], "outreach_count": {"$gt": OUTREACH_HISTORY_LIMIT}},
+                    rollup_projection(kind)
+                )
+                for contact in full:
+                    (first, count), *_ = rollup_occurrences(kind, contact)
+                    day = rollup_day(first[date_field])
+                    counts = daily.setdefault(day, {})
+                    counts[kind] = counts.get(kind, 0) + count - 1
+                    company_name = first.get("company_name") or contact.get("company_name")
+                    key = normalize_company(company_name)
+                    if key:
+                        stats = companies.setdefault(key, {"company_name": company_name})
+                        stats[kind] = stats.get(kind, 0) + count - 1
+        
+        if kind not in ("applications", "networking"):
+            continue
+        
+        for collection in with_archive(kind):
+            per_company = db[collection].aggregate(stages + [
+                {"$group": {
+                    "_id": company,
+                    "count": {"$sum": 1},
+                    "responses": {"$sum": {"$cond": [{"$ifNull": ["$responded_at", False]}, 1, 0]}},
+                    "last_activity": {"$max": date}
+                }}
+            ])
+            for row in per_company:
+                key = normalize_company(row['_id'])
+                if not key:
+                    continue
+                stats = companies.setdefault(key, {"company_name": row['_id']})
+                stats[kind] = stats.get(kind, 0) + row['count']
+                if kind == "applications":
+                    stats['responses'] = stats.get('responses', 0) + row['responses']
+                last_activity = rollup_day(row['last_activity'])
+                stats['last_activity'] = max(stats.get('last_activity', last_activity), last_activity)
     
-    try:
-        db.notes.delete_one({
-            "_id": ObjectId(note_id),
-            "user_email": user_email
-        })
-        return True
-    except:
-        return False
-
-# ============================================================================
-# TODO LIST FUNCTIONS
-# ============================================================================
+    for collection in with_archive("applications"):
+        responses = db[collection].aggregate([
+            {"$match": {"user_email": user_email, "deleted": False, "responded_at": {"$exists": True}}},
+            {"$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date_applied"}},
+                "count": {"$sum": 1}
+            }}
+        ])
+        for row in responses:
+            counts = daily.setdefault(rollup_day(row['_id']), {})
+            counts['responses'] = counts.get('responses', 0) + row['count']
+    
+    db.daily_stats.delete_many({"user_email": user_email})
+    db.company_stats.delete_many({"user_email": user_email})
+    if daily:
+        db.daily_stats.insert_many([
+            {"user_email": user_email, "day": day, **counts}
+            for day, counts in daily.items()
+        ])
+    if companies:
+        db.company_stats.insert_many([
+            {"user_email": user_email, "company_key": key, "company_ref": company_reference(user_email, key), **stats}
+            for key, stats in companies.items()
+        ])
+    
+    db.users.update_one(
+        {"email": user_email},
+        {"$set": {"rollups_version": ROLLUPS_VERSION}}
+    )
+    reconcile_user_summary(user_email)
+    # Frames cached before the rebuild joined the old company stats
+    for kind in ("applications", "networking"):
+        invalidate_frames(user_email, kind)
+    return True
 
-def add_todo(user_email, task, priority="Medium", due_date=None):
-    """Add a new todo item."""
+def ensure_rollups(user_email):
+    """Build the rollup documents once for users whose data predates them."""
+    if st.session_state.get('rollups_checked'):
+        return
+    
     db = get_database()
     if db is None:
-        return False
-    
-    # Convert date if provided
-    if due_date and hasattr(due_date, 'date'):
-        due_date = datetime.combine(due_date, datetime.min.time())
+        return
     
-    db.todos.insert_one({
-        "user_email": user_email,
-        "task": task,
-        "priority": priority,
-        "due_date": due_date,
-        "completed": False,
-        "created_at": datetime.now()
-    })
-    return True
+    user = db.users.find_one({"email": user_email}, {"rollups_version": 1})
+    if not user or user.get('rollups_version') != ROLLUPS_VERSION:
+        rebuild_rollups(user_email)
+    st.session_state.rollups_checked = True
 
-def get_todos(user_email):
-    """Get all todos for a user."""
+def get_daily_stats(user_email, since=None):
+    """Get the per-day activity rollups for a user."""
     db = get_database()
     if db is None:
         return pd.DataFrame()
     
-    todos = list(db.todos.find(
-        {"user_email": user_email}
-    ).sort([("completed", 1), ("priority", -1), ("created_at", -1)]))
-    
-    if todos:
-        # Convert MongoDB documents to DataFrame
-        for todo in todos:
-            todo['ID'] = str(todo['_id'])
-            todo['Task'] = todo['task']
-            todo['Priority'] = todo['priority']
-            todo['Due Date'] = todo.get('due_date', None)
-            todo['Completed'] = todo['completed']
-            todo['Created'] = todo['created_at']
-        
-        df = pd.DataFrame(todos)
-        return df[['ID', 'Task', 'Priority', 'Due Date', 'Completed', 'Created']]
+    query = {"user_email": user_email}
+    if since:
+        query["day"] = {"$gte": rollup_day(since)}
+    
+    rows = list(db.daily_stats.find(query, {"_id": 0, "user_email": 0}).sort("day", 1))
+    
+    if rows:
+        df = pd.DataFrame(rows).set_index('day')
+        df.index = pd.to_datetime(df.index)
+        return df.reindex(columns=list(ROLLUP_SOURCES) + ['responses']).fillna(0).astype(int)
     
     return pd.DataFrame()
 
-def toggle_todo_status(todo_id, user_email):
-    """Toggle the completion status of a todo."""
+def get_company_stats(user_email, limit=20):
+    """Get the most active companies for a user from the rollups."""
     db = get_database()
     if db is None:
-        return False
+        return pd.DataFrame()
     
-    from bson import ObjectId
+    rows = list(db.company_stats.find(
+        {"user_email": user_email, "$or": [{"applications": {"$gt": 0}}, {"networking": {"$gt": 0}}]},
+        {"_id": 0, "company_name": 1, "applications": 1, "networking": 1, "responses": 1, "last_activity": 1}
+    ).sort([("applications", -1), ("last_activity", -1)]).limit(limit))
     
-    try:
-        # Get current status
-        todo = db.todos.find_one({
-            "_id": ObjectId(todo_id),
-            "user_email": user_email
+    if rows:
+        df = pd.DataFrame(rows)
+        df = df.reindex(columns=['company_name', 'applications', 'networking', 'responses', 'last_activity'])
+        counts = ['applications', 'networking', 'responses']
+        df[counts] = df[counts].fillna(0).astype(int)
+        df['response_rate'] = (df['responses'] / df['applications'].where(df['applications'] > 0)).fillna(0)
+        return df.rename(columns={
+            'company_name': 'Company',
+            'applications': 'Applications',
+            'networking': 'Outreach',
+            'responses': 'Responses',
+            'response_rate': 'Response Rate',
+            'last_activity': 'Last Activity'
         })
-        
-        if todo:
-            # Toggle the status
-            db.todos.update_one(
-                {"_id": ObjectId(todo_id)},
-                {"$set": {"completed": not todo['completed']}}
-            )
-            return True
-        return False
-    except:
-        return False
+    
+    return pd.DataFrame()
 
-def delete_todo(todo_id, user_email):
-    """Delete a todo item."""
+# ============================================================================
+# COMPANY VIEW FUNCTIONS
+# ============================================================================
+
+# Timeline events of the company view and how they are labelled
+COMPANY_EVENT_LABELS = {
+    "application": "📨 Applied",
+    "stage": "🚦 Stage change",
+    "outreach": "🤝 Outreach"
+}
+
+# DataFrame columns of a company timeline event and the event fields they come from
+COMPANY_EVENT_COLUMNS = {
+    "Company": ("company_name", ""),
+    "Event": ("event", ""),
+    "Detail": ("detail", ""),
+    "Status": ("status", ""),
+    "Date": ("date", None),
+    "Notes": ("notes", "")
+}
+
+def company_events(company):
+    """Flatten one joined company document into its timeline events, skipping trashed records."""
+    name = company.get('company_name') or ""
+    for app in company['applications']:
+        if app.get('deleted'):
+            continue
+        role = app.get('role', "")
+        yield {
+            "_id": app['_id'],
+            "company_name": name,
+            "event": "application",
+            "detail": role,
+            "status": app.get('status', "applied"),
+            "date": app.get('date_applied'),
+            "notes": app.get('notes') or ""
+        }
+        for change in app.get('status_history', []):
+            if change['status'] != "applied":
+                yield {
+                    "_id": app['_id'],
+                    "company_name": name,
+                    "event": "stage",
+                    "detail": role,
+                    "status": change['status'],
+                    "date": change['at']
+                }
+    for contact in company['contacts']:
+        if contact.get('deleted'):
+            continue
+        for outreach in contact.get('outreach') or [contact]:
+            yield {
+                "_id": contact['_id'],
+                "company_name": name,
+                "event": "outreach",
+                "detail": contact.get('linkedin_url', ""),
+                "date": outreach.get('date_sent'),
+                "notes": outreach.get('notes') or ""
+            }
+
+def get_company_view(user_email):
+    """Get the timeline of every company a user applied to or contacted (cached per user).
+    
+    One aggregation joins the user's company rollups to their applications and
+    outreach on company_ref; the frame is dropped on writes to either collection.
+    """
     db = get_database()
     if db is None:
-        return False
+        return pd.DataFrame()
     
-    from bson import ObjectId
+    def load():
+        companies = db.company_stats.aggregate([
+            {"$match": {"user_email": user_email, "$or": [{"applications": {"$gt": 0}}, {"networking": {"$gt": 0}}]}},
+            {"$project": {"company_name": 1, "company_ref": 1}},
+            {"$lookup": {"from": "applications", "localField": "company_ref", "foreignField": "company_ref", "as": "applications"}},
+            {"$lookup": {"from": "networking", "localField": "company_ref", "foreignField": "company_ref", "as": "contacts"}}
+        ])
+        events = [event for company in companies for event in company_events(company)]
+        if not events:
+            return pd.DataFrame()
+        events.sort(key=lambda event: event['date'] or datetime.min, reverse=True)
+        return build_frame(events, COMPANY_EVENT_COLUMNS, categories=("Company", "Event", "Status"), dates=("Date",))
     
-    try:
-        db.todos.delete_one({
-            "_id": ObjectId(todo_id),
-            "user_email": user_email
-        })
-        return True
-    except:
-        return False
+    return get_frame_cache().get(user_email, ("companies", None), load)
+
+def outreach_timing(first_applied, first_contacted):
+    """Describe when a company was first contacted relative to the first application."""
+    if pd.isna(first_contacted):
+        return "No outreach"
+    if pd.isna(first_applied):
+        return "Outreach only"
+    return "Before applying" if first_contacted <= first_applied else "After applying"
+
+def get_company_overview(user_email):
+    """Get one row per company with its application and outreach counts (cached per user)."""
+    def load():
+        events = get_company_view(user_email)
+        if events.empty:
+            return pd.DataFrame()
+        
+        companies = events.groupby("Company", observed=True)
+        firsts = events.pivot_table(index="Company", columns="Event", values="Date", aggfunc="min", observed=True)
+        firsts = firsts.reindex(columns=list(COMPANY_EVENT_LABELS))
+        counts = pd.crosstab(events["Company"], events["Event"]).reindex(columns=list(COMPANY_EVENT_LABELS), fill_value=0)
+        
+        overview = pd.DataFrame({
+            "Applications": counts["application"],
+            "Outreach": counts["outreach"],
+            "Outreach Timing": [
+                outreach_timing(applied, contacted)
+                for applied, contacted in zip(firsts["application"], firsts["outreach"])
+            ],
+            "Last Activity": companies["Date"].max()
+        }).rename_axis("Company").reset_index()
+        overview["Last Activity Label"] = format_dates(overview["Last Activity"])
+        return overview.sort_values("Last Activity", ascending=False, ignore_index=True)
+    
+    return get_frame_cache().get(user_email, ("companies", "overview"), load)
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def format_date(date_str):
-    """Format date string for better display."""
-    try:
-        if isinstance(date_str, datetime):
-            return date_str.strftime('%b %d, %Y')
-        elif hasattr(date_str, 'date'):  # It's a datetime.date object
-            return date_str.strftime('%b %d, %Y')
-        elif isinstance(date_str, str):
-            # Try to parse various date formats
-            date_str_clean = str(date_str).split()[0]  # Remove time part if present
-            try:
-                date_obj = datetime.strptime(date_str_clean, '%Y-%m-%d')
-                return date_obj.strftime('%b %d, %Y')
-            except ValueError:
-                # Try other common formats
-                try:
-                    date_obj = datetime.fromisoformat(date_str_clean)
-                    return date_obj.strftime('%b %d, %Y')
-                except:
-                    return str(date_str)
-        else:
-            return str(date_str)
-    except:
-        return str(date_str)
+def display_timezone():
+    """Timezone that timezone-aware dates are shown in."""
+    return DISPLAY_TIMEZONE or datetime.now().astimezone().tzinfo
+
+def to_datetimes(values):
+    """Parse dates into a naive datetime64 Series, with NaT for missing or invalid values.
+    
+    Timezone-aware values are converted to the display timezone; when they are
+    mixed with naive ones, the naive values are taken to be UTC.
+    """
+    values = pd.Series(values, dtype=object)
+    if any(getattr(value, 'tzinfo', None) is not None for value in values):
+        parsed = pd.to_datetime(values, errors='coerce', utc=True)
+        return parsed.dt.tz_convert(display_timezone()).dt.tz_localize(None)
+    return pd.to_datetime(values, errors='coerce')
+
+def format_dates(dates):
+    """Format a datetime64 Series for display in one pass; missing dates become ''."""
+    return dates.dt.strftime(DATE_DISPLAY_FORMAT).fillna("")
+
+def format_date(value):
+    """Format a single date for display."""
+    return format_dates(to_datetimes([value])).iloc[0]
 
 # ============================================================================
 # UI COMPONENTS
 # ============================================================================
 
+def remember_deleted(collection, item_id, label):
+    """Remember the last deleted item so it can be undone."""
+    st.session_state.last_deleted = {"collection": collection, "id": item_id, "label": label}
+    st.session_state.search_active = False
+    st.session_state.search_results = pd.DataFrame()
+
+def display_undo_banner():
+    """Offer to undo the most recent delete."""
+    last_deleted = st.session_state.get('last_deleted')
+    if not last_deleted:
+        return
+    
+    col1, col2, col3 = st.columns([4, 1, 1])
+    with col1:
+        st.info(f"🗑️ Deleted **{last_deleted['label']}**")
+    with col2:
+        if st.button("↩️ Undo", key="undo_delete", use_container_width=True):
+            if restore_from_trash(last_deleted['collection'], last_deleted['id'], st.session_state.user_email):
+                del st.session_state.last_deleted
+                st.rerun()
+            else:
+                st.error("Could not restore this item")
+    with col3:
+        if st.button("Dismiss", key="dismiss_undo", use_container_width=True):
+            del st.session_state.last_deleted
+            st.rerun()
+
+def display_summary_tiles(summary, kind, total_label, latest_label):
+    """Render the total/latest/companies/this-week tiles from the summary document."""
+    latest = summary_stat(summary, kind, "latest", None)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(total_label, summary_stat(summary, kind, "total"))
+    with col2:
+        st.metric(latest_label, format_date(latest) if latest else "None")
+    with col3:
+        st.metric("Companies", len(summary_stat(summary, kind, "companies", [])))
+    with col4:
+        st.metric("This Week", summary_this_week(summary, kind))
+
+def display_sync_status():
+    """Display whether the local replica is in sync with MongoDB."""
+    status = get_local_replica().status()
+    if status['online']:
+        st.caption(f"🟢 Synced at {status['last_sync'].strftime('%H:%M:%S')}")
+    else:
+        st.caption("🔴 Offline - working from the local copy")
+    if status['pending']:
+        st.caption(f"{status['pending']} change(s) waiting to sync")
+
+def display_db_diagnostics():
+    """Display the database cost of the previous rerun and recent history."""
+    stats = st.session_state.get('last_rerun_accounting')
+    if stats:
+        st.caption(f"Previous rerun (#{stats['rerun']})")
+        st.metric(
+            "DB Commands",
+            stats['commands'],
+            delta="over budget" if stats['over_budget'] else None,
+            delta_color="inverse"
+        )
+        st.caption(
+            f"{stats['duration_ms']:.1f} ms • {stats['bytes_sent'] / 1024:.1f} KB sent • "
+            f"{stats['bytes_received'] / 1024:.1f} KB received"
+        )
+        st.json(dict(stats['by_command']), expanded=False)
+    
+    summary = get_command_accountant().summary()
+    if summary['reruns']:
+        st.caption(
+            f"Last {summary['reruns']} reruns: avg {summary['avg_commands']:.1f}, "
+            f"p95 {summary['p95_commands']}, max {summary['max_commands']} commands • "
+            f"{summary['over_budget']} over budget ({DB_COMMAND_BUDGET})"
+        )
+    
+    frames = get_frame_cache().report()
+    if frames['users']:
+        st.caption(
+            f"Frame cache: {frames['users']} users • {frames['bytes'] / 1024:.1f} KB "
+            f"(~{frames['bytes_per_user'] / 1024:.1f} KB per user) • "
+            f"{frames.get('hits', 0)} hits, {frames.get('misses', 0)} misses"
+        )
+        if 'shared' in frames:
+            st.caption(
+                f"Shared frames: {frames['shared']['frames']} • {frames['shared']['bytes'] / 1024:.1f} KB • "
+                f"{frames.get('shared_hits', 0)} served from other workers • "
+                f"{frames.get('invalidations_received', 0)} invalidations received"
+            )
+        st.json(frames['by_kind'], expanded=False)
+    
+    if INSERT_BATCH_WINDOW_MS > 0:
+        batching = get_insert_batcher().metrics()
+        if batching.get('batches'):
+            st.caption(
+                f"Insert batching: {batching['batches']} batches, avg {batching['avg_batch']:.1f} "
+                f"(max {batching['max_batch']}) docs • ack p50 {batching['p50_wait_ms']:.1f} ms, "
+                f"p95 {batching['p95_wait_ms']:.1f} ms • queue {batching['depth']} "
+                f"(peak {batching['max_depth']}) • {batching.get('throttled', 0)} throttled"
+            )
+
+    limits = get_rate_limiter().metrics()
+    st.caption(
+        "Rate limits: " + " • ".join(
+            f"{action} {limits[action].get('limited', 0)}/"
+            f"{limits[action].get('allowed', 0) + limits[action].get('limited', 0)} limited"
+            for action in RATE_LIMITS
+        ) + f" • {limits['buckets']} buckets"
+    )
+
+def display_trash(user_email):
+    """Display recently deleted items with restore buttons."""
+    trash = get_trash(user_email)
+    if not trash:
+        st.caption("Trash is empty")
+        return
+    
+    st.caption(f"Items are permanently removed after {TRASH_RETENTION_DAYS} days")
+    for item in trash:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(item['label'])
+            st.caption(f"{item['collection'].title()} • {item['deleted_label']}")
+        with col2:
+            if st.button("↩️", key=f"restore_{item['id']}", help="Restore"):
+                if restore_from_trash(item['collection'], item['id'], user_email):
+                    if st.session_state.get('last_deleted', {}).get('id') == item['id']:
+                        del st.session_state.last_deleted
+                    st.rerun()
+                else:
+                    st.error("Could not restore this item")
+
+def on_status_change(app_id, widget_key):
+    """Persist a stage change made from a status selectbox."""
+    update_application_status(app_id, st.session_state.user_email, st.session_state[widget_key])
+    st.session_state.search_active = False
+    st.session_state.search_results = pd.DataFrame()
+
+def status_selectbox(app_id, status, key_prefix):
+    """Render a compact selectbox that moves an application between stages."""
+    widget_key = f"{key_prefix}_{app_id}"
+    st.selectbox(
+        "Stage",
+        APPLICATION_STATUSES,
+        index=APPLICATION_STATUSES.index(status) if status in APPLICATION_STATUSES else 0,
+        format_func=lambda s: STATUS_LABELS[s],
+        key=widget_key,
+        label_visibility="collapsed",
+        on_change=on_status_change,
+        args=(app_id, widget_key)
+    )
+
+def display_pipeline_board(user_email):
+    """Display applications as a Kanban board grouped by pipeline stage."""
+    counts = get_status_counts(user_email)
+    columns = st.columns(len(APPLICATION_STATUSES))
+    
+    for column, status in zip(columns, APPLICATION_STATUSES):
+        with column:
+            st.markdown(f"**{STATUS_LABELS[status]}** ({counts[status]})")
+            
+            for app in get_applications_by_status(user_email, status):
+                app_id = str(app['_id'])
+                with st.container(border=True):
+                    st.markdown(f"**{app['company_name']}**")
+                    st.caption(f"{app['role']} • {app['date_label']}")
+                    status_selectbox(app_id, status, key_prefix="stage")
+            
+            if counts[status] > 20:
+                st.caption(f"Showing latest 20 of {counts[status]}")
+
+def display_attachments(applications_df):
+    """Display and manage the attachments of one of the listed applications."""
+    user_email = st.session_state.user_email
+    
+    with st.expander("📎 Attachments"):
+        labels = dict(zip(applications_df['ID'], applications_df['Company'].astype(str) + " • " + applications_df['Role'].astype(str)))
+        app_id = st.selectbox("Application", list(labels), format_func=labels.get, key="attachment_app")
+        
+        for attachment in get_attachments(app_id, user_email):
+            col1, col2, col3 = st.columns([4, 1, 1])
+            with col1:
+                st.write(attachment['filename'])
+                st.caption(f"{attachment['size'] / 1024:.0f} KB • {attachment['created_label']}")
+            with col2:
+                # Contents are only read when the button is clicked
+                st.download_button(
+                    "⬇️",
+                    data=lambda attachment_id=attachment['id']: read_attachment(attachment_id, user_email),
+                    file_name=attachment['filename'],
+                    mime=attachment['content_type'],
+                    key=f"download_{attachment['id']}",
+                    on_click="ignore"
+                )
+            with col3:
+                if st.button("🗑️", key=f"del_attachment_{attachment['id']}", help="Remove attachment"):
+                    if delete_attachment(attachment['id'], user_email):
+                        st.rerun()
+                    else:
+                        st.error("Failed to remove attachment")
+        
+        with st.form("attachment_form", clear_on_submit=True):
+            upload = st.file_uploader(f"Attach a resume, cover letter or other file (max {ATTACHMENT_MAX_MB:g} MB)")
+            if st.form_submit_button("Attach", type="primary") and upload is not None:
+                if add_attachment(app_id, user_email, upload.name, upload.type, upload):
+                    st.success(f"✅ Attached {upload.name}")
+                    st.rerun()
+                else:
+                    st.error(f"❌ Could not attach {upload.name}. Files must be under {ATTACHMENT_MAX_MB:g} MB.")
+
 def display_applications_list(applications_df, search_active=False):
     """Display applications list with optional search context."""
     if not applications_df.empty:
@@ -681,13 +3526,21 @@ def display_applications_list(applications_df, search_active=False):
         else:
             st.markdown(f"### 📋 Your Latest Applications (Showing {len(applications_df)} of latest 50)")
         
+        attachment_counts = get_attachment_counts(st.session_state.user_email, applications_df['ID'].tolist())
+        
         for idx, row in applications_df.iterrows():
+            archived = bool(row.get('Archived Label'))
             with st.container():
                 col1, col2 = st.columns([5, 1])
                 
                 with col1:
                     st.markdown(f"**{row['Company']}** • {row['Role']}")
-                    st.caption(f"📅 Applied: {format_date(row['Date Applied'])}")
+                    attached = attachment_counts.get(row['ID'])
+                    st.caption(
+                        f"📅 Applied: {row['Date Applied Label']} • {STATUS_LABELS.get(row['Status'], row['Status'])}"
+                        + (f" • 📎 {attached}" if attached else "")
+                        + (f" • 🗄️ Archived {row['Archived Label']}" if archived else "")
+                    )
                     
                     if row['URL']:
                         st.markdown(f"🔗 [View Job Posting]({row['URL']})")
@@ -695,22 +3548,27 @@ def display_applications_list(applications_df, search_active=False):
                     if row['Notes']:
                         st.info(f"💭 {row['Notes']}")
                 
+                # Archived applications are read-only
                 with col2:
-                    st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
-                    if st.button("Delete", key=f"del_app_{row['ID']}", help="Remove this application"):
-                        if delete_application(row['ID'], st.session_state.user_email):
-                            st.rerun()
-                        else:
-                            st.error("Failed to delete application")
+                    if not archived:
+                        status_selectbox(row['ID'], row['Status'], key_prefix="status")
+                        if st.button("Delete", key=f"del_app_{row['ID']}", help="Remove this application"):
+                            if delete_application(row['ID'], st.session_state.user_email):
+                                remember_deleted("applications", row['ID'], f"{row['Company']} • {row['Role']}")
+                                st.rerun()
+                            else:
+                                st.error("Failed to delete application")
                         
             st.divider()
+        
+        display_attachments(applications_df)
     else:
         if search_active:
             st.info("🔍 No applications found matching your search criteria. Try adjusting your filters.")
         else:
             st.info("No applications yet. Start tracking your job applications by adding your first one above!")
 
-def applications_tab():
+def applications_tab(summary):
     """Applications management tab with search functionality."""
     # Initialize search state
     if 'search_active' not in st.session_state:
@@ -718,45 +3576,38 @@ def applications_tab():
     if 'search_results' not in st.session_state:
         st.session_state.search_results = pd.DataFrame()
     
-    # Get applications for stats (full count)
-    all_applications_df = get_applications(st.session_state.user_email)
-    
-    # Get limited applications for display
-    display_applications_df = get_applications(st.session_state.user_email, limit=50)
-    
     # Determine which dataframe to use for display
     if st.session_state.search_active and not st.session_state.search_results.empty:
         display_df = st.session_state.search_results
-        stats_df = st.session_state.search_results  # Use search results for stats
     else:
-        display_df = display_applications_df
-        stats_df = all_applications_df  # Use full data for stats
+        display_df = get_applications(st.session_state.user_email, limit=50)
     
     # Header with stats
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        if st.session_state.search_active:
+    if st.session_state.search_active:
+        # Search results are already in memory, so describe those instead
+        stats_df = st.session_state.search_results
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
             st.metric("Search Results", len(stats_df))
-        else:
-            st.metric("Total Applications", len(stats_df))
-    with col2:
-        if not stats_df.empty:
-            latest = stats_df.iloc[0]['Date Applied']
-            st.metric("Latest Application", format_date(latest))
-        else:
-            st.metric("Latest Application", "None")
-    with col3:
-        if not stats_df.empty:
-            companies = stats_df['Company'].nunique()
-            st.metric("Companies", companies)
-        else:
-            st.metric("Companies", "0")
-    with col4:
-        if not stats_df.empty:
-            this_week = len(stats_df[pd.to_datetime(stats_df['Date Applied']) >= datetime.now() - timedelta(days=7)])
-            st.metric("This Week", this_week)
-        else:
-            st.metric("This Week", "0")
+        with col2:
+            if not stats_df.empty:
+                st.metric("Latest Application", stats_df.iloc[0]['Date Applied Label'])
+            else:
+                st.metric("Latest Application", "None")
+        with col3:
+            if not stats_df.empty:
+                companies = stats_df['Company'].nunique()
+                st.metric("Companies", companies)
+            else:
+                st.metric("Companies", "0")
+        with col4:
+            if not stats_df.empty:
+                this_week = int((stats_df['Date Applied'] >= datetime.now() - timedelta(days=7)).sum())
+                st.metric("This Week", this_week)
+            else:
+                st.metric("This Week", "0")
+    else:
+        display_summary_tiles(summary, "applications", "Total Applications", "Latest Application")
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -766,7 +3617,11 @@ def applications_tab():
         col1, col2 = st.columns(2)
         
         with col1:
-            company_name = st.text_input("🏢 Company Name", placeholder="e.g., Google")
+            company_name = st.text_input(
+                "🏢 Company Name",
+                placeholder="e.g., Google",
+                help="Saved under the spelling you already use, so 'google llc' files under 'Google'"
+            )
             role = st.text_input("💼 Role/Position", placeholder="e.g., Software Engineer")
         
         with col2:
@@ -779,14 +3634,21 @@ def applications_tab():
         
         if submitted:
             if company_name and role:
-                if add_application(
-                    st.session_state.user_email,
-                    company_name,
-                    role,
-                    url,
-                    date_applied.strftime('%Y-%m-%d'),
-                    notes
-                ):
+                application = {
+                    "company_name": company_name,
+                    "role": role,
+                    "url": url,
+                    "date_applied": date_applied.strftime('%Y-%m-%d'),
+                    "notes": notes
+                }
+                result = add_application(st.session_state.user_email, **application)
+                if result == ADD_DUPLICATE:
+                    # Keep the submission around so it can be merged below
+                    st.session_state.pending_duplicate = application
+                elif result:
+                    if result == ADD_SIMILAR:
+                        # Shown once after the rerun below
+                        st.session_state.similar_posting = application
                     st.success("✅ Application added successfully!")
                     # Reset search if active to show updated results
                     if st.session_state.search_active:
@@ -798,6 +3660,73 @@ def applications_tab():
             else:
                 st.error("⚠️ Please provide at least Company Name and Role")
     
+    # Offer to merge a rejected duplicate into the stored application
+    if st.session_state.get('pending_duplicate'):
+        pending = st.session_state.pending_duplicate
+        st.warning(f"⚠️ You already track **{pending['company_name']}** • {pending['role']} (same job URL, or same company and role without one).")
+        
+        col_merge, col_discard = st.columns(2)
+        with col_merge:
+            if st.button("🔗 Merge Into Existing", use_container_width=True):
+                add_application(st.session_state.user_email, **pending, on_duplicate="merge")
+                del st.session_state.pending_duplicate
+                st.rerun()
+        with col_discard:
+            if st.button("Discard", use_container_width=True):
+                del st.session_state.pending_duplicate
+                st.rerun()
+    
+    similar = st.session_state.pop('similar_posting', None)
+    if similar:
+        st.warning(
+            f"⚠️ Saved. You also track another **{similar['company_name']}** • {similar['role']} "
+            "posting with a different URL."
+        )
+    
+    # Bulk import from CSV
+    with st.expander("📥 Import Applications"):
+        if 'import_summary' in st.session_state:
+            st.success(st.session_state.pop('import_summary'))
+        
+        st.caption("Upload a CSV with company_name, role, url, date_applied (YYYY-MM-DD) and notes columns.")
+        with st.form("import_applications_form", clear_on_submit=True):
+            uploaded_file = st.file_uploader("📄 CSV File", type=["csv"])
+            duplicate_mode = st.radio(
+                "When an application is already tracked",
+                ["reject", "merge"],
+                format_func=lambda mode: "Skip it" if mode == "reject" else "Merge into existing",
+                horizontal=True
+            )
+            
+            import_submitted = st.form_submit_button("Import Applications", use_container_width=True)
+            
+            if import_submitted:
+                if uploaded_file is None:
+                    st.error("⚠️ Please choose a CSV file to import")
+                else:
+                    records_df = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+                    missing = {"company_name", "role", "date_applied"} - set(records_df.columns)
+                    if missing:
+                        st.error(f"⚠️ Missing columns: {', '.join(sorted(missing))}")
+                    else:
+                        try:
+                            summary = import_applications(
+                                st.session_state.user_email,
+                                records_df.to_dict('records'),
+                                on_duplicate=duplicate_mode
+                            )
+                        except ValueError as e:
+                            st.error(f"❌ Could not read the file: {e}")
+                        else:
+                            if summary is None:
+                                st.error("❌ Failed to import applications. Please try again.")
+                            else:
+                                st.session_state.import_summary = (
+                                    f"✅ Imported {summary[ADD_INSERTED]}, merged {summary[ADD_MERGED]}, "
+                                    f"skipped {summary[ADD_DUPLICATE]} duplicates"
+                                )
+                                st.rerun()
+    
     st.markdown("---")
     
     # Search Section
@@ -808,13 +3737,36 @@ def applications_tab():
             col1, col2 = st.columns(2)
             
             with col1:
-                search_company = st.text_input("🏢 Company Name", placeholder="e.g., Google, Microsoft...")
-                search_role = st.text_input("💼 Role/Position", placeholder="e.g., Software Engineer...")
+                # Typeahead over the user's own companies and roles; any other text still does a partial match
+                search_company = st.selectbox(
+                    "🏢 Company Name",
+                    known_values(st.session_state.user_email, "company_name"),
+                    index=None,
+                    accept_new_options=True,
+                    placeholder="e.g., Google, Microsoft..."
+                )
+                search_role = st.selectbox(
+                    "💼 Role/Position",
+                    known_values(st.session_state.user_email, "role"),
+                    index=None,
+                    accept_new_options=True,
+                    placeholder="e.g., Software Engineer..."
+                )
             
             with col2:
                 search_date_from = st.date_input("📅 From Date", value=None, help="Leave empty for no start date limit")
                 search_date_to = st.date_input("📅 To Date", value=None, help="Leave empty for no end date limit")
             
+            search_status = st.selectbox(
+                "🚦 Stage",
+                [None] + APPLICATION_STATUSES,
+                format_func=lambda s: "Any stage" if s is None else STATUS_LABELS[s]
+            )
+            search_archive = st.checkbox(
+                "🗄️ Include archive",
+                help=f"Also search applications archived after {ARCHIVE_AFTER_DAYS} days or {ARCHIVE_TERMINAL_DAYS} days in a final stage"
+            )
+            
             col_search, col_clear = st.columns([2, 1])
             
             with col_search:
@@ -831,7 +3783,9 @@ def applications_tab():
                     date_from=search_date_from,
                     date_to=search_date_to,
                     role_filter=search_role if search_role else None,
-                    limit=50
+                    status_filter=search_status,
+                    limit=50,
+                    include_archive=search_archive
                 )
                 
                 st.session_state.search_results = search_results
@@ -847,6 +3801,10 @@ def applications_tab():
                     filters_applied.append(f"From: {search_date_from}")
                 if search_date_to:
                     filters_applied.append(f"To: {search_date_to}")
+                if search_status:
+                    filters_applied.append(f"Stage: {STATUS_LABELS[search_status]}")
+                if search_archive:
+                    filters_applied.append("Including archive")
                 
                 if filters_applied:
                     st.success(f"✅ Search completed! Filters: {', '.join(filters_applied)}")
@@ -867,34 +3825,17 @@ def applications_tab():
         st.info("🔍 **Search Active** - Only showing filtered results. Use 'Clear Filters' to see all applications.")
     
     # Display applications
-    display_applications_list(display_df, st.session_state.search_active)
+    view = st.radio("View", ["📋 List", "🗂️ Pipeline"], horizontal=True, label_visibility="collapsed")
+    if view == "🗂️ Pipeline":
+        display_pipeline_board(st.session_state.user_email)
+    else:
+        display_applications_list(display_df, st.session_state.search_active)
 
-def networking_tab():
+def networking_tab(summary):
     """Networking attempts management tab."""
     # Header with stats
     networking_df = get_networking(st.session_state.user_email)
-    
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("Total Connections", len(networking_df))
-    with col2:
-        if not networking_df.empty:
-            latest = networking_df.iloc[0]['Date Sent']
-            st.metric("Latest Outreach", format_date(latest))
-        else:
-            st.metric("Latest Outreach", "None")
-    with col3:
-        if not networking_df.empty:
-            companies = networking_df['Company'].nunique()
-            st.metric("Companies", companies)
-        else:
-            st.metric("Companies", "0")
-    with col4:
-        if not networking_df.empty:
-            this_week = len(networking_df[pd.to_datetime(networking_df['Date Sent']) >= datetime.now() - timedelta(days=7)])
-            st.metric("This Week", this_week)
-        else:
-            st.metric("This Week", "0")
+    display_summary_tiles(summary, "networking", "Total Connections", "Latest Outreach")
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -904,7 +3845,11 @@ def networking_tab():
         col1, col2 = st.columns(2)
         
         with col1:
-            company_name = st.text_input("🏢 Company Name", placeholder="e.g., Microsoft")
+            company_name = st.text_input(
+                "🏢 Company Name",
+                placeholder="e.g., Microsoft",
+                help="Saved under the spelling you already use, so 'google llc' files under 'Google'"
+            )
             linkedin_url = st.text_input("💼 LinkedIn Profile URL", placeholder="https://linkedin.com/in/...")
         
         with col2:
@@ -916,13 +3861,17 @@ def networking_tab():
         
         if submitted:
             if company_name:
-                if add_networking(
+                result = add_networking(
                     st.session_state.user_email,
                     company_name,
                     linkedin_url,
                     date_sent.strftime('%Y-%m-%d'),
                     notes
-                ):
+                )
+                if result == ADD_MERGED:
+                    st.success("✅ Added to the outreach history of your existing contact!")
+                    st.rerun()
+                elif result:
                     st.success("✅ Connection added successfully!")
                     st.rerun()
                 else:
@@ -942,7 +3891,10 @@ def networking_tab():
                 
                 with col1:
                     st.markdown(f"**{row['Company']}**")
-                    st.caption(f"📅 Reached out: {format_date(row['Date Sent'])}")
+                    st.caption(
+                        f"📅 Reached out: {row['Date Sent Label']}"
+                        + (f" • 🔁 {row['Outreach']} times" if row['Outreach'] > 1 else "")
+                    )
                     
                     if row['LinkedIn URL']:
                         st.markdown(f"💼 [View LinkedIn Profile]({row['LinkedIn URL']})")
@@ -954,6 +3906,7 @@ def networking_tab():
                     st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
                     if st.button("Delete", key=f"del_net_{row['ID']}", help="Remove this connection"):
                         if delete_networking(row['ID'], st.session_state.user_email):
+                            remember_deleted("networking", row['ID'], row['Company'])
                             st.rerun()
                         else:
                             st.error("Failed to delete connection")
@@ -962,32 +3915,83 @@ def networking_tab():
     else:
         st.info("No connections yet. Start building your network by adding your first connection above!")
 
-def notes_tab():
+def companies_tab():
+    """Company-centric view joining applications and outreach per company."""
+    user_email = st.session_state.user_email
+    overview = get_company_overview(user_email)
+    
+    if overview.empty:
+        st.info("No companies yet. Companies show up here once you add applications or connections.")
+        return
+    
+    timing = overview['Outreach Timing']
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Companies", len(overview))
+    with col2:
+        st.metric("Applied & Reached Out", int(timing.isin(["Before applying", "After applying"]).sum()))
+    with col3:
+        st.metric("Applied Without Outreach", int((timing == "No outreach").sum()))
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    shown = st.radio(
+        "🔎 Show",
+        ["All", "No outreach", "Outreach only", "Before applying", "After applying"],
+        horizontal=True
+    )
+    if shown != "All":
+        overview = overview[overview['Outreach Timing'] == shown]
+    
+    st.dataframe(
+        overview[['Company', 'Applications', 'Outreach', 'Outreach Timing', 'Last Activity Label']],
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Last Activity Label": "Last Activity"}
+    )
+    
+    if overview.empty:
+        return
+    
+    st.markdown("---")
+    
+    st.markdown("### 🕒 Company Timeline")
+    company = st.selectbox("🏢 Company", overview['Company'].tolist())
+    events = get_company_view(user_email)
+    timeline = events[events['Company'] == company]
+    
+    for _, row in timeline.iterrows():
+        with st.container():
+            label = COMPANY_EVENT_LABELS.get(row['Event'], row['Event'])
+            status = STATUS_LABELS.get(row['Status'], row['Status'])
+            if row['Event'] == "outreach":
+                detail = f"💼 [LinkedIn Profile]({row['Detail']})" if row['Detail'] else ""
+            elif row['Event'] == "stage":
+                detail = f"**{row['Detail']}** → {status}"
+            else:
+                detail = f"**{row['Detail']}** • now {status}"
+            st.markdown(f"{label} {detail}")
+            st.caption(f"📅 {row['Date Label']}")
+            if row['Notes']:
+                st.info(f"💭 {row['Notes']}")
+
+def notes_tab(summary):
     """General notes management tab."""
     # Header with stats
-    notes_df = get_notes(st.session_state.user_email)
+    notes_df = get_notes(st.session_state.user_email, limit=NOTES_PAGE_SIZE)
+    total = summary_stat(summary, "notes", "total")
+    latest = summary_stat(summary, "notes", "latest", None)
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Notes", len(notes_df))
+        st.metric("Total Notes", total)
     with col2:
-        if not notes_df.empty:
-            latest = notes_df.iloc[0]['Created']
-            st.metric("Latest Note", format_date(str(latest).split()[0]))
-        else:
-            st.metric("Latest Note", "None")
+        st.metric("Latest Note", format_date(latest) if latest else "None")
     with col3:
-        if not notes_df.empty:
-            avg_length = notes_df['Body'].str.len().mean()
-            st.metric("Avg. Length", f"{int(avg_length)} chars")
-        else:
-            st.metric("Avg. Length", "0 chars")
+        avg_length = summary_stat(summary, "notes", "body_chars") / total if total else 0
+        st.metric("Avg. Length", f"{int(avg_length)} chars")
     with col4:
-        if not notes_df.empty:
-            this_week = len(notes_df[pd.to_datetime(notes_df['Created']) >= datetime.now() - timedelta(days=7)])
-            st.metric("This Week", this_week)
-        else:
-            st.metric("This Week", "0")
+        st.metric("This Week", summary_this_week(summary, "notes"))
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -1012,7 +4016,10 @@ def notes_tab():
     st.markdown("---")
     
     # Display existing notes
-    st.markdown("### 📝 Your Notes")
+    if total > len(notes_df):
+        st.markdown(f"### 📝 Your Notes (Showing {len(notes_df)} of {total})")
+    else:
+        st.markdown("### 📝 Your Notes")
     
     if not notes_df.empty:
         for idx, row in notes_df.iterrows():
@@ -1021,16 +4028,18 @@ def notes_tab():
                 
                 with col1:
                     st.markdown(f"**{row['Title']}**")
-                    st.caption(f"📅 Created: {format_date(str(row['Created']).split()[0])}")
+                    st.caption(f"📅 Created: {row['Created Label']}")
                     
-                    if row['Body']:
-                        with st.expander("View Note", expanded=False):
-                            st.write(row['Body'])
+                    # The body is only fetched once the note is opened
+                    if row['Length'] and st.toggle("View Note", key=f"open_note_{row['ID']}"):
+                        with st.container(border=True):
+                            st.write(get_note_body(row['ID'], st.session_state.user_email) or "")
                 
                 with col2:
                     st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
                     if st.button("Delete", key=f"del_note_{row['ID']}", help="Remove this note"):
                         if delete_note(row['ID'], st.session_state.user_email):
+                            remember_deleted("notes", row['ID'], row['Title'])
                             st.rerun()
                         else:
                             st.error("Failed to delete note")
@@ -1039,35 +4048,28 @@ def notes_tab():
     else:
         st.info("No notes yet. Start documenting your journey by adding your first note above!")
 
-def todo_tab():
+def todo_tab(summary):
     """TODO list management tab."""
     # Header with stats
     todos_df = get_todos(st.session_state.user_email)
+    total = summary_stat(summary, "todos", "total")
+    completed = summary_stat(summary, "todos", "completed")
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Tasks", len(todos_df))
+        st.metric("Total Tasks", total)
     with col2:
-        if not todos_df.empty:
-            completed = len(todos_df[todos_df['Completed'] == True])
-            st.metric("Completed", completed)
-        else:
-            st.metric("Completed", "0")
+        st.metric("Completed", completed)
     with col3:
-        if not todos_df.empty:
-            pending = len(todos_df[todos_df['Completed'] == False])
-            st.metric("Pending", pending)
-        else:
-            st.metric("Pending", "0")
+        st.metric("Pending", total - completed)
     with col4:
-        if not todos_df.empty:
-            today_tasks = len(todos_df[
-                (pd.to_datetime(todos_df['Due Date']) == datetime.now().date()) | 
-                (pd.to_datetime(todos_df['Created']) >= datetime.now() - timedelta(days=1))
-            ])
-            st.metric("Today", today_tasks)
-        else:
-            st.metric("Today", "0")
+        due_counts = count_due_todos(st.session_state.user_email)
+        st.metric(
+            "Due Today",
+            due_counts['due'],
+            delta=f"{due_counts['overdue']} overdue" if due_counts['overdue'] else None,
+            delta_color="inverse"
+        )
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -1100,6 +4102,19 @@ def todo_tab():
     st.markdown("---")
     
     # Display todos
+    # Overdue and due-soon queue
+    due_df = get_due_todos(st.session_state.user_email)
+    if not due_df.empty:
+        with st.expander(f"⏰ Overdue & Due in {DUE_SOON_DAYS} Days ({len(due_df)})", expanded=True):
+            for idx, row in due_df.iterrows():
+                if row['Days Left'] < 0:
+                    when = f"🚨 Overdue by {-row['Days Left']} day(s)"
+                elif row['Days Left'] == 0:
+                    when = "📌 Due today"
+                else:
+                    when = f"📅 Due {row['Due Date Label']}"
+                st.markdown(f"**{row['Task']}** • {when}")
+    
     st.markdown("### 📋 Your Tasks")
     
     if not todos_df.empty:
@@ -1130,15 +4145,16 @@ def todo_tab():
                         st.markdown(f"{priority_color.get(row['Priority'], '⚪')} **{row['Task']}**")
                         
                         details = []
-                        if row['Due Date']:
-                            details.append(f"📅 Due: {format_date(row['Due Date'])}")
-                        details.append(f"Created: {format_date(str(row['Created']).split()[0])}")
+                        if row['Due Date Label']:
+                            details.append(f"📅 Due: {row['Due Date Label']}")
+                        details.append(f"Created: {row['Created Label']}")
                         
                         st.caption(" • ".join(details))
                     
                     with col3:
                         if st.button("Delete", key=f"del_todo_{row['ID']}", help="Remove this task"):
                             if delete_todo(row['ID'], st.session_state.user_email):
+                                remember_deleted("todos", row['ID'], row['Task'])
                                 st.rerun()
                             else:
                                 st.error("Failed to delete task")
@@ -1161,11 +4177,12 @@ def todo_tab():
                         
                         with col2:
                             st.markdown(f"~~{row['Task']}~~")
-                            st.caption(f"Completed • Created: {format_date(str(row['Created']).split()[0])}")
+                            st.caption(f"Completed • Created: {row['Created Label']}")
                         
                         with col3:
                             if st.button("Delete", key=f"del_todo_{row['ID']}", help="Remove this task"):
                                 if delete_todo(row['ID'], st.session_state.user_email):
+                                    remember_deleted("todos", row['ID'], row['Task'])
                                     st.rerun()
                                 else:
                                     st.error("Failed to delete task")
@@ -1174,14 +4191,74 @@ def todo_tab():
     else:
         st.info("No tasks yet. Start organizing your day by adding your first task above!")
 
+def analytics_tab():
+    """Analytics tab backed by the pre-aggregated rollup documents."""
+    period = st.radio("📆 Group by", ["Weekly", "Monthly"], horizontal=True)
+    daily_df = get_daily_stats(st.session_state.user_email)
+    
+    if daily_df.empty:
+        st.info("No activity yet. Your trends will show up here once you start tracking applications.")
+        return
+    
+    rule = 'W-MON' if period == "Weekly" else 'MS'
+    trends_df = daily_df.resample(rule, label='left', closed='left').sum()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Applications", int(daily_df['applications'].sum()))
+    with col2:
+        st.metric("Outreach", int(daily_df['networking'].sum()))
+    with col3:
+        label = "Applications / Week" if period == "Weekly" else "Applications / Month"
+        st.metric(label, f"{trends_df['applications'].mean():.1f}")
+    with col4:
+        total = daily_df['applications'].sum()
+        st.metric("Response Rate", f"{daily_df['responses'].sum() / total:.0%}" if total else "0%")
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    st.markdown(f"### 📈 {period} Volume")
+    st.bar_chart(trends_df[['applications', 'networking']].rename(columns={
+        'applications': 'Applications',
+        'networking': 'Outreach'
+    }))
+    
+    st.markdown("### 💬 Response Rate")
+    rates = (trends_df['responses'] / trends_df['applications'].where(trends_df['applications'] > 0)).fillna(0)
+    st.line_chart(rates.rename("Response Rate"))
+    
+    st.markdown("---")
+    
+    st.markdown("### 🚦 Pipeline Funnel")
+    status_counts = get_status_counts(st.session_state.user_email)
+    funnel_df = pd.DataFrame({
+        "Stage": [STATUS_LABELS[status] for status in APPLICATION_STATUSES],
+        "Applications": [status_counts[status] for status in APPLICATION_STATUSES]
+    })
+    st.bar_chart(funnel_df, x="Stage", y="Applications", horizontal=True, sort=False)
+    
+    st.markdown("---")
+    
+    st.markdown("### 🏢 Top Companies")
+    company_df = get_company_stats(st.session_state.user_email)
+    if not company_df.empty:
+        st.dataframe(
+            company_df,
+            hide_index=True,
+            use_container_width=True,
+            column_config={"Response Rate": st.column_config.ProgressColumn(min_value=0, max_value=1, format="percent")}
+        )
+    else:
+        st.info("No company activity yet.")
+
 # ============================================================================
 # MAIN APPLICATION
 # ============================================================================
 
 def main():
     """Main application function."""
-    # Initialize database connection
-    db = init_mongodb()
+    # Initialize database connection (or the local replica, which works offline)
+    db = get_database()
     if db is None:
         st.error("❌ Unable to connect to database. Please check your connection.")
         return
@@ -1194,10 +4271,15 @@ def main():
         login_page()
         return
     
+    # Every tab reads the rollups, so legacy accounts get them before the first render
+    ensure_rollups(st.session_state.user_email)
+    
     # Main application UI
     st.title("✨ Application Tracker")
     st.caption("Your journey to success, beautifully organized")
     
+    display_undo_banner()
+    
     # Sidebar with user info and logout
     with st.sidebar:
         st.markdown("### 👤 User Profile")
@@ -1209,6 +4291,22 @@ def main():
         
         st.metric("⏱️ Session Time", f"{hours_remaining} hours remaining")
         
+        due_counts = count_due_todos(st.session_state.user_email, days=DUE_SOON_DAYS)
+        if due_counts['overdue'] or due_counts['due']:
+            st.warning(f"⏰ {due_counts['due']} task(s) due soon • {due_counts['overdue']} overdue")
+        
+        if LOCAL_REPLICA_PATH:
+            display_sync_status()
+        
+        st.markdown("---")
+        
+        with st.expander("🗑️ Trash"):
+            display_trash(st.session_state.user_email)
+        
+        if DB_DIAGNOSTICS:
+            with st.expander("🩺 Diagnostics"):
+                display_db_diagnostics()
+        
         st.markdown("---")
         
         if st.button("🚪 Sign Out", use_container_width=True):
@@ -1216,20 +4314,33 @@ def main():
                 del st.session_state[key]
             st.rerun()
     
+    # Move aged-out applications to the archive before anything reads them
+    ensure_archived(st.session_state.user_email)
+    
+    # One read of the precomputed summary serves every tab's header tiles
+    summary = get_user_summary(st.session_state.user_email)
+    
     # Main content tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📋 Applications", "🤝 Networking", "📝 Notes", "✅ TODO List"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📋 Applications", "🤝 Networking", "🏢 Companies", "📝 Notes", "✅ TODO List", "📊 Analytics"])
     
     with tab1:
-        applications_tab()
+        applications_tab(summary)
     
     with tab2:
-        networking_tab()
+        networking_tab(summary)
     
     with tab3:
-        notes_tab()
+        companies_tab()
     
     with tab4:
-        todo_tab()
+        notes_tab(summary)
+    
+    with tab5:
+        todo_tab(summary)
+    
+    with tab6:
+        analytics_tab()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with account_rerun():
+        main()
\ No newline at end of file
@@ -0,0 +1,494 @@
+"""Load test for the application tracker.
+
+Drives the Streamlit app headlessly with streamlit.testing's AppTest, one
+simulated user per thread, all sharing the process-wide cached MongoClient
+exactly like sessions on a single Streamlit server. Each user signs up, signs
+in and then repeatedly adds, searches and deletes applications.
+
+Reports rerun latency percentiles, database operations per rerun and the
+server RSS attributable to each session.
+
+With --target api the same workload goes through the JSON API (api_server.py)
+over HTTP instead, so the two paths can be compared; --target both runs one
+after the other. Database operations are only attributed to Streamlit reruns.
+
+Usage:
+    # Against a local mongod (never point this at production)
+    python load_test.py --users 20 --iterations 10 --mongo-uri mongodb://localhost:27017
+
+    # Fully in-process, with mongomock standing in for MongoDB
+    python load_test.py --users 20 --iterations 10 --mongomock
+
+    # Compare the Streamlit path with the JSON API served by uvicorn in this process
+    python load_test.py --users 20 --iterations 10 --mongomock --target both
+"""
+
+import argparse
+import base64
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+from pymongo import monitoring
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "application_tracker_streamlit.py")
+
+# Session state key identifying which simulated user a rerun belongs to
+USER_KEY = "load_test_user"
+
+# Collection methods counted as one database operation under mongomock
+MONGOMOCK_OPERATIONS = (
+    "find", "find_one", "insert_one", "insert_many", "update_one", "update_many",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_delete",
+    "count_documents", "aggregate", "distinct", "create_index", "drop_index", "bulk_write"
+)
+
+# ============================================================================
+# DATABASE OPERATION COUNTING
+# ============================================================================
+
+class OperationCounter:
+    """Count database operations per simulated user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+
+    def record(self):
+        """Attribute one operation to the user whose rerun is executing."""
+        ctx = get_script_run_ctx()
+        if ctx is None or USER_KEY not in ctx.session_state:
+            return
+        user = ctx.session_state[USER_KEY]
+        with self._lock:
+            self._counts[user] += 1
+
+    def get(self, user):
+        with self._lock:
+            return self._counts[user]
+
+class CommandCounter(monitoring.CommandListener):
+    """Count commands sent to a real MongoDB server."""
+
+    def __init__(self, counter):
+        self.counter = counter
+
+    def started(self, event):
+        # Started events fire on the thread issuing the command, i.e. the script thread
+        self.counter.record()
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def install_mongomock(counter):
+    """Replace MongoClient with a shared mongomock client that counts operations."""
+    import mongomock
+    import pymongo.mongo_client
+
+    depth = threading.local()
+
+    def counted(method):
+        def wrapper(*args, **kwargs):
+            # Only count the outermost call; mongomock calls itself internally
+            depth.value = getattr(depth, 'value', 0) + 1
+            try:
+                if depth.value == 1:
+                    counter.record()
+                return method(*args, **kwargs)
+            finally:
+                depth.value -= 1
+        return wrapper
+
+    create_index = mongomock.Collection.create_index
+
+    def create_existing_index(self, key_or_list, *args, **kwargs):
+        # MongoDB treats re-creating an existing index as a no-op; mongomock
+        # re-checks uniqueness and ignores partialFilterExpression while doing so
+        name = kwargs.get('name') or mongomock.helpers.gen_index_name(mongomock.helpers.create_index_list(key_or_list))
+        if name in self._store.indexes:
+            return name
+        return create_index(self, key_or_list, *args, **kwargs)
+
+    mongomock.Collection.create_index = create_existing_index
+
+    for name in MONGOMOCK_OPERATIONS:
+        if hasattr(mongomock.Collection, name):
+            setattr(mongomock.Collection, name, counted(getattr(mongomock.Collection, name)))
+
+    client = mongomock.MongoClient()
+    pymongo.mongo_client.MongoClient = lambda *args, **kwargs: client
+
+# ============================================================================
+# SIMULATED USERS
+# ============================================================================
+
+def share_test_runtime():
+    """Let concurrent AppTest sessions share one mock Streamlit runtime.
+
+    AppTest installs a mock Runtime singleton at the start of every run and
+    clears it at the end, so a session finishing its rerun would pull the
+    runtime out from under every other session still running. Fall back to
+    the most recently installed mock instead of failing.
+    """
+    latest = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest['runtime'] = cls._instance
+        if 'runtime' not in latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest['runtime']
+
+    def exists(cls):
+        return cls._instance is not None or 'runtime' in latest
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+    # AppTest also flips this option on and off around each run
+    config.get_config_options()
+    config._set_option("global.appTest", True, "load_test")
+
+def share_script_cache():
+    """Compile the app once for all sessions, as a real Streamlit server does.
+
+    AppTest builds a fresh ScriptCache per run, and compiling the same script
+    from many threads at once is not safe on every Python version.
+    """
+    shared = ScriptCache()
+    original = ScriptCache.get_bytecode
+    ScriptCache.get_bytecode = lambda self, script_path: original(shared, script_path)
+
+class SimulatedUser:
+    """One browser session clicking through the app."""
+
+    def __init__(self, user_id, counter, timeout):
+        self.user_id = user_id
+        self.counter = counter
+        self.email = f"load-{user_id}-{uuid.uuid4().hex[:8]}@example.com"
+        self.samples = []
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.secrets["mongo_password"] = "load-test"
+        self.at.session_state[USER_KEY] = user_id
+
+    def rerun(self, action, interact=None):
+        """Apply an interaction and time the rerun it triggers."""
+        if interact is not None:
+            interact()
+        ops_before = self.counter.get(self.user_id)
+        started = time.perf_counter()
+        self.at.run()
+        elapsed = time.perf_counter() - started
+
+        if self.at.exception:
+            raise RuntimeError(f"{action} failed for user {self.user_id}: {self.at.exception[0].message}")
+
+        self.samples.append({
+            "action": action,
+            "seconds": elapsed,
+            "ops": self.counter.get(self.user_id) - ops_before
+        })
+
+    def widget(self, kind, label, index=0):
+        return [w for w in getattr(self.at, kind) if w.label == label][index]
+
+    def submit(self, label):
+        return lambda: [b for b in self.at.get("form_submit_button") if b.label == label][0].click()
+
+    def login(self):
+        self.rerun("open")
+
+        def fill_form():
+            self.widget("text_input", "✉️ Email").input(self.email)
+            self.widget("text_input", "🔐 Password").input("load-test-password")
+
+        fill_form()
+        self.rerun("sign_up", self.submit("Create Account"))
+        fill_form()
+        self.rerun("sign_in", self.submit("Sign In"))
+
+    def add_application(self, iteration):
+        def fill_form():
+            self.widget("text_input", "🏢 Company Name").input(f"Company {self.user_id}-{iteration}")
+            self.widget("text_input", "💼 Role/Position").input("Software Engineer")
+            self.widget("text_input", "🔗 Job URL").input(f"https://jobs.example.com/{self.user_id}/{iteration}")
+
+        fill_form()
+        self.rerun("add", self.submit("Add Application"))
+
+    def search(self, iteration):
+        self.widget("selectbox", "🏢 Company Name").set_value(f"Company {self.user_id}-{iteration}")
+        self.rerun("search", self.submit("🔍 Search Applications"))
+        self.rerun("clear_search", self.submit("🗑️ Clear Filters"))
+
+    def delete_application(self):
+        delete_buttons = [b for b in self.at.button if b.key and b.key.startswith("del_app_")]
+        if delete_buttons:
+            self.rerun("delete", delete_buttons[0].click)
+
+    def run(self, iterations):
+        self.login()
+        for iteration in range(iterations):
+            self.add_application(iteration)
+            self.search(iteration)
+            if iteration % 2:
+                self.delete_application()
+        return self.samples
+
+class ApiUser:
+    """One API client running the simulated user's workload over HTTP."""
+
+    def __init__(self, user_id, base_url, timeout):
+        self.user_id = user_id
+        self.base_url = base_url
+        self.timeout = timeout
+        self.email = f"api-{user_id}-{uuid.uuid4().hex[:8]}@example.com"
+        self.password = "load-test-password"
+        self.samples = []
+        self.etag = None
+
+    def request(self, action, method, path, payload=None, headers=None, expect=(200,)):
+        """Send one request, time it and return the decoded JSON body (if any)."""
+        credentials = base64.b64encode(f"{self.email}:{self.password}".encode()).decode()
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode() if payload is not None else None,
+            method=method,
+            headers={"Authorization": f"Basic {credentials}", "Content-Type": "application/json", **(headers or {})}
+        )
+
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, body, etag = response.status, response.read(), response.headers.get("ETag")
+        except urllib.error.HTTPError as error:
+            status, body, etag = error.code, error.read(), error.headers.get("ETag")
+        elapsed = time.perf_counter() - started
+
+        if status not in expect:
+            raise RuntimeError(f"{action} failed for API user {self.user_id}: HTTP {status} {body[:200]!r}")
+
+        self.samples.append({"action": action, "seconds": elapsed, "ops": None})
+        if etag:
+            self.etag = etag
+        return json.loads(body) if body else None
+
+    def list_applications(self, action):
+        return self.request(action, "GET", "/api/applications?page=1&page_size=50")
+
+    def run(self, iterations):
+        self.request("sign_up", "POST", "/api/users", {"email": self.email, "password": self.password}, expect=(201,))
+        self.request("sign_in", "GET", "/api/summary")
+        for iteration in range(iterations):
+            self.request("add", "POST", "/api/applications", {
+                "company_name": f"Company {self.user_id}-{iteration}",
+                "role": "Software Engineer",
+                "url": f"https://jobs.example.com/api/{self.user_id}/{iteration}"
+            }, expect=(201,))
+            query = urllib.parse.urlencode({"company": f"Company {self.user_id}-{iteration}"})
+            self.request("search", "GET", f"/api/applications?{query}")
+            listing = self.list_applications("clear_search")
+            # A client polling for changes revalidates instead of downloading the page again
+            self.request("revalidate", "GET", "/api/applications?page=1&page_size=50",
+                         headers={"If-None-Match": self.etag}, expect=(304,))
+            if iteration % 2 and listing['items']:
+                self.request("delete", "DELETE", f"/api/applications/{listing['items'][0]['ID']}", expect=(204,))
+        return self.samples
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_api_server():
+    """Serve api_server.app with uvicorn on a background thread and return its URL."""
+    import uvicorn
+    from api_server import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+class RssSampler(threading.Thread):
+    """Track the peak resident set size of this process in the background."""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = self.process.memory_info().rss
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+def summarize(target, samples, users, baseline_rss, peak_rss, wall_seconds):
+    """Aggregate the raw samples into the report structure."""
+    by_action = defaultdict(list)
+    for sample in samples:
+        by_action[sample['action']].append(sample)
+
+    def stats(group):
+        latencies = [s['seconds'] * 1000 for s in group]
+        ops = [s['ops'] for s in group if s['ops'] is not None]
+        return {
+            "reruns": len(group),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "ops_per_rerun": round(statistics.mean(ops), 1) if ops else None,
+            "max_ops": max(ops) if ops else None
+        }
+
+    return {
+        "target": target,
+        "users": users,
+        "wall_seconds": round(wall_seconds, 2),
+        "reruns_per_second": round(len(samples) / wall_seconds, 1) if wall_seconds else 0.0,
+        "overall": stats(samples),
+        "actions": {action: stats(group) for action, group in sorted(by_action.items())},
+        "rss_baseline_mb": round(baseline_rss / 2**20, 1),
+        "rss_peak_mb": round(peak_rss / 2**20, 1),
+        "rss_per_session_mb": round((peak_rss - baseline_rss) / 2**20 / users, 2)
+    }
+
+def print_report(report):
+    """Print the report as a plain-text table."""
+    unit = "reruns" if report['target'] == "streamlit" else "requests"
+    print(f"\n[{report['target']}] {report['users']} users, {report['overall']['reruns']} {unit} in "
+          f"{report['wall_seconds']}s ({report['reruns_per_second']} {unit}/s)\n")
+    print(f"{'action':<14}{unit:>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/rerun':>11}{'max ops':>9}")
+    rows = list(report['actions'].items()) + [("overall", report['overall'])]
+    for action, stats in rows:
+        stats = {key: "-" if value is None else value for key, value in stats.items()}
+        print(f"{action:<14}{stats['reruns']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['ops_per_rerun']:>11}{stats['max_ops']:>9}")
+    print(f"\nRSS: baseline {report['rss_baseline_mb']} MB, peak {report['rss_peak_mb']} MB, "
+          f"~{report['rss_per_session_mb']} MB per session")
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def run_users(users, iterations):
+    """Run every user's workload concurrently and return (samples, wall seconds, RSS before, peak RSS)."""
+    sampler = RssSampler()
+    baseline_rss = sampler.peak
+    sampler.start()
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=len(users)) as pool:
+        results = list(pool.map(lambda user: user.run(iterations), users))
+
+    wall_seconds = time.perf_counter() - started
+    sampler.stop()
+    return [sample for result in results for sample in result], wall_seconds, baseline_rss, sampler.peak
+
+def benchmark_streamlit(args, counter):
+    # Warm up once so the cached client, indexes and migrations are not part of the measurement
+    warmup = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    warmup.secrets["mongo_password"] = "load-test"
+    warmup.run()
+
+    users = [SimulatedUser(user_id, counter, args.timeout) for user_id in range(args.users)]
+    samples, wall_seconds, baseline_rss, peak_rss = run_users(users, args.iterations)
+    return summarize("streamlit", samples, args.users, baseline_rss, peak_rss, wall_seconds)
+
+def benchmark_api(args):
+    base_url = args.api_url or start_api_server()
+
+    with urllib.request.urlopen(f"{base_url}/api/health", timeout=args.timeout) as response:
+        if not json.loads(response.read())['database']:
+            raise RuntimeError("The API server could not reach the database")
+
+    users = [ApiUser(user_id, base_url, args.timeout) for user_id in range(args.users)]
+    samples, wall_seconds, baseline_rss, peak_rss = run_users(users, args.iterations)
+    return summarize("api", samples, args.users, baseline_rss, peak_rss, wall_seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent users against the application tracker.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated sessions")
+    parser.add_argument("--iterations", type=int, default=5, help="Add/search/delete rounds per user")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds allowed per rerun")
+    backend = parser.add_mutually_exclusive_group(required=True)
+    backend.add_argument("--mongo-uri", help="URI of a local MongoDB server to test against")
+    backend.add_argument("--mongomock", action="store_true", help="Use an in-process mongomock client")
+    parser.add_argument("--target", choices=("streamlit", "api", "both"), default="streamlit",
+                        help="Drive the Streamlit script, the JSON API, or both in turn")
+    parser.add_argument("--api-url", help="Benchmark an already running API server instead of starting one")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    # AppTest gives every session the same id and all API clients connect from
+    # 127.0.0.1, so scale the per-session/per-client auth limits to the user count
+    for action in ("signup", "login"):
+        os.environ.setdefault(f"RATE_LIMIT_{action.upper()}", f"{args.users * 5}/60")
+
+    share_test_runtime()
+    share_script_cache()
+    counter = OperationCounter()
+    if args.mongomock:
+        install_mongomock(counter)
+    else:
+        os.environ['MONGO_URI'] = args.mongo_uri
+        monitoring.register(CommandCounter(counter))
+
+    reports = []
+    if args.target in ("streamlit", "both"):
+        reports.append(benchmark_streamlit(args, counter))
+    if args.target in ("api", "both"):
+        reports.append(benchmark_api(args))
+
+    for report in reports:
+        print_report(report)
+    if len(reports) == 2:
+        streamlit_report, api_report = reports
+        print(f"\nAPI throughput is {api_report['reruns_per_second'] / streamlit_report['reruns_per_second']:.1f}x "
+              f"the Streamlit path; p50 {api_report['overall']['p50_ms']} ms vs "
+              f"{streamlit_report['overall']['p50_ms']} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(reports[0] if len(reports) == 1 else reports, f, indent=2)
+
+if __name__ == "__main__":
+    main()
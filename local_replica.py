@@ -0,0 +1,1398 @@
+"""Embedded local replica of the tracker's MongoDB data.
+
+LocalReplica keeps the documents of every user this process has served in
+memory, backed by a SQLite file so they survive restarts, and exposes them
+through the subset of pymongo's Collection API the tracker uses. Reads never
+leave the process. Writes are applied locally, journaled in the same SQLite
+transaction and pushed to MongoDB by a background thread, so the app keeps
+working while MongoDB is unreachable and catches up once it is back.
+
+Each document written through the replica is stamped with updated_at. When a
+journaled change reaches MongoDB the copy with the later updated_at wins;
+documents without pending local changes always take the remote copy. Counter
+collections are the exception: their updates are replayed on MongoDB as the
+original operators, in order, so increments from every writer add up.
+
+Changes are pulled by updated_at; writers that do not stamp it, and deletes
+made in MongoDB, are picked up by a periodic full resync of active users.
+
+Only the query, update and aggregation operators the tracker relies on are
+implemented; anything else raises NotImplementedError.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from copy import deepcopy
+from datetime import datetime, timedelta
+
+import bson
+from bson import ObjectId, json_util
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+# Journal entries pushed to MongoDB per bulk write
+SYNC_BATCH_SIZE = 500
+
+# Longest wait between reconnection attempts while MongoDB is unreachable
+MAX_BACKOFF_SECONDS = 60
+
+# Users not seen for this long stop being polled for remote changes
+ACTIVE_SCOPE_SECONDS = 600
+
+# Clock skew tolerated between workers when pulling changes by updated_at
+PULL_OVERLAP = timedelta(seconds=30)
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# DOCUMENT HELPERS
+# ============================================================================
+
+def _type_rank(value):
+    """Position of a value's type in MongoDB's cross-type sort order."""
+    if value is None or value is _MISSING:
+        return 0
+    if isinstance(value, bool):
+        return 6
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, list):
+        return 4
+    if isinstance(value, ObjectId):
+        return 5
+    if isinstance(value, datetime):
+        return 7
+    return 8
+
+def sort_key(value):
+    """Key ordering values of mixed types the way MongoDB does."""
+    rank = _type_rank(value)
+    if rank == 0:
+        return (0, 0)
+    if rank in (3, 4, 8):
+        return (rank, repr(value))
+    return (rank, value)
+
+def _same(a, b):
+    return _type_rank(a) == _type_rank(b) and a == b
+
+def _hashable(value):
+    """Turn any BSON value into something usable as a dict key."""
+    if isinstance(value, (dict, list)):
+        return json_util.dumps(value)
+    return (_type_rank(value), value)
+
+def doc_key(_id):
+    """Stable string form of a document _id."""
+    return json_util.dumps(_id)
+
+def get_path(document, path):
+    """Resolve a dotted path, fanning out over arrays of subdocuments."""
+    value = document
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list):
+            if part.isdigit():
+                index = int(part)
+                value = value[index] if index < len(value) else _MISSING
+            else:
+                value = [item[part] for item in value if isinstance(item, dict) and part in item] or _MISSING
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+def set_path(document, path, value):
+    parts = path.split(".")
+    target = document
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            if not isinstance(target.get(part), (dict, list)):
+                target[part] = {}
+            target = target[part]
+    if isinstance(target, list):
+        target[int(parts[-1])] = value
+    else:
+        target[parts[-1]] = value
+
+def unset_path(document, path):
+    parts = path.split(".")
+    target = document
+    for part in parts[:-1]:
+        target = target.get(part) if isinstance(target, dict) else None
+        if target is None:
+            return
+    if isinstance(target, dict):
+        target.pop(parts[-1], None)
+
+# ============================================================================
+# QUERY MATCHING
+# ============================================================================
+
+TYPE_NAMES = {
+    "null": (type(None),),
+    "bool": (bool,),
+    "int": (int,),
+    "long": (int,),
+    "double": (float,),
+    "number": (int, float),
+    "string": (str,),
+    "object": (dict,),
+    "array": (list,),
+    "objectId": (ObjectId,),
+    "date": (datetime,)
+}
+
+REGEX_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}
+
+def _is_operator_dict(condition):
+    return isinstance(condition, dict) and bool(condition) and all(str(k).startswith("$") for k in condition)
+
+def _candidates(value):
+    """A field value plus, for arrays, each of its elements."""
+    if value is _MISSING:
+        return []
+    if isinstance(value, list):
+        return [value] + value
+    return [value]
+
+def _equals_any(value, target):
+    if target is None and value is _MISSING:
+        return True
+    return any(_same(candidate, target) for candidate in _candidates(value))
+
+def _compare(op, value, target):
+    if _type_rank(value) != _type_rank(target) or value is None:
+        return False
+    if op == "$gt":
+        return value > target
+    if op == "$gte":
+        return value >= target
+    if op == "$lt":
+        return value < target
+    return value <= target
+
+def _regex(pattern, options=""):
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    flags = 0
+    for option in options:
+        flags |= REGEX_FLAGS.get(option, 0)
+    return re.compile(pattern, flags)
+
+def _match_operator(value, op, arg, options):
+    if op == "$eq":
+        return _equals_any(value, arg)
+    if op == "$ne":
+        return not _equals_any(value, arg)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        return any(_compare(op, candidate, arg) for candidate in _candidates(value))
+    if op == "$in":
+        return any(_equals_any(value, item) for item in arg)
+    if op == "$nin":
+        return not any(_equals_any(value, item) for item in arg)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if op == "$type":
+        names = arg if isinstance(arg, list) else [arg]
+        types = tuple(t for name in names for t in TYPE_NAMES[name])
+        return any(
+            isinstance(candidate, types) and not (isinstance(candidate, bool) and bool not in types)
+            for candidate in _candidates(value)
+        )
+    if op == "$regex":
+        pattern = _regex(arg, options)
+        return any(isinstance(candidate, str) and pattern.search(candidate) for candidate in _candidates(value))
+    if op == "$not":
+        return not _match_field(value, arg)
+    if op == "$size":
+        return isinstance(value, list) and len(value) == arg
+    if op == "$elemMatch":
+        return isinstance(value, list) and any(
+            matches(item, arg) if isinstance(item, dict) else _match_field(item, arg)
+            for item in value
+        )
+    raise NotImplementedError(f"Query operator {op} is not supported by the local replica")
+
+def _match_field(value, condition):
+    if isinstance(condition, re.Pattern):
+        return _match_operator(value, "$regex", condition, "")
+    if _is_operator_dict(condition):
+        options = condition.get("$options", "")
+        return all(
+            _match_operator(value, op, arg, options)
+            for op, arg in condition.items()
+            if op != "$options"
+        )
+    return _equals_any(value, condition)
+
+def matches(document, query):
+    """Whether a document satisfies a MongoDB query filter."""
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, clause) for clause in condition):
+                return False
+        elif not _match_field(get_path(document, key), condition):
+            return False
+    return True
+
+def project(document, projection):
+    """Apply a find() projection to a copy of a document."""
+    if not projection:
+        return deepcopy(document)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+
+    include_id = projection.get("_id", 1)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if (fields and all(not v for v in fields.values())) or (not fields and not include_id):
+        result = deepcopy(document)
+        for field in fields:
+            unset_path(result, field)
+        if not include_id:
+            result.pop("_id", None)
+        return result
+
+    result = {"_id": document["_id"]} if include_id and "_id" in document else {}
+    for field in fields:
+        value = get_path(document, field)
+        if value is not _MISSING:
+            set_path(result, field, deepcopy(value))
+    return result
+
+def sort_spec(key_or_list, direction=None):
+    """Normalize the sort arguments pymongo accepts into (field, direction) pairs."""
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [tuple(item) for item in key_or_list]
+
+def sort_documents(documents, spec):
+    for field, direction in reversed(spec):
+        documents.sort(
+            key=lambda document: sort_key(get_path(document, field)),
+            reverse=direction < 0
+        )
+    return documents
+
+# ============================================================================
+# UPDATES
+# ============================================================================
+
+def _each(arg):
+    if isinstance(arg, dict) and "$each" in arg:
+        return arg["$each"]
+    return [arg]
+
+def _pull_matches(item, condition):
+    if _is_operator_dict(condition):
+        return _match_field(item, condition)
+    if isinstance(condition, dict) and isinstance(item, dict):
+        return matches(item, condition)
+    return _same(item, condition)
+
+def apply_update(document, update, inserting=False):
+    """Apply an update document or pipeline to a document in place and return it."""
+    if isinstance(update, list):
+        _id = document.get("_id")
+        updated = aggregate_documents([document], update)[0]
+        document.clear()
+        document.update(updated)
+        if _id is not None:
+            document["_id"] = _id
+        return document
+
+    for op, fields in update.items():
+        for path, arg in fields.items():
+            current = get_path(document, path)
+            if op == "$set":
+                set_path(document, path, deepcopy(arg))
+            elif op == "$setOnInsert":
+                if inserting:
+                    set_path(document, path, deepcopy(arg))
+            elif op == "$unset":
+                unset_path(document, path)
+            elif op == "$inc":
+                set_path(document, path, (0 if current is _MISSING else current) + arg)
+            elif op == "$mul":
+                set_path(document, path, (0 if current is _MISSING else current) * arg)
+            elif op == "$max":
+                if current is _MISSING or sort_key(arg) > sort_key(current):
+                    set_path(document, path, deepcopy(arg))
+            elif op == "$min":
+                if current is _MISSING or sort_key(arg) < sort_key(current):
+                    set_path(document, path, deepcopy(arg))
+            elif op == "$currentDate":
+                set_path(document, path, datetime.now())
+            elif op == "$push":
+                array = [] if current is _MISSING else list(current)
+                array.extend(deepcopy(_each(arg)))
+                if isinstance(arg, dict) and "$sort" in arg:
+                    order = arg["$sort"]
+                    if isinstance(order, dict):
+                        array = sort_documents(array, sort_spec(order))
+                    else:
+                        array.sort(key=sort_key, reverse=order < 0)
+                if isinstance(arg, dict) and "$slice" in arg:
+                    limit = arg["$slice"]
+                    array = array[limit:] if limit < 0 else array[:limit]
+                set_path(document, path, array)
+            elif op == "$addToSet":
+                array = [] if current is _MISSING else list(current)
+                for item in _each(arg):
+                    if not any(_same(item, existing) for existing in array):
+                        array.append(deepcopy(item))
+                set_path(document, path, array)
+            elif op == "$pull":
+                if isinstance(current, list):
+                    set_path(document, path, [item for item in current if not _pull_matches(item, arg)])
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the local replica")
+    return document
+
+def upsert_seed(query):
+    """The document an upsert starts from: the filter's equality conditions."""
+    seed = {}
+    for key, condition in query.items():
+        if key.startswith("$"):
+            continue
+        if _is_operator_dict(condition):
+            if "$eq" in condition:
+                set_path(seed, key, deepcopy(condition["$eq"]))
+        else:
+            set_path(seed, key, deepcopy(condition))
+    return seed
+
+# ============================================================================
+# AGGREGATION
+# ============================================================================
+
+def _truthy(value):
+    if value is None or value is False or value is _MISSING:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value != 0
+    return True
+
+def _format_date(value, fmt):
+    fmt = fmt.replace("%L", f"{value.microsecond // 1000:03d}")
+    return value.strftime(fmt)
+
+def evaluate(expression, document):
+    """Evaluate an aggregation expression against a document."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        if expression == "$$ROOT":
+            return document
+        if expression.startswith("$$"):
+            raise NotImplementedError(f"Variable {expression} is not supported by the local replica")
+        value = get_path(document, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, list):
+        return [evaluate(item, document) for item in expression]
+    if isinstance(expression, dict):
+        if len(expression) == 1:
+            op, arg = next(iter(expression.items()))
+            if op.startswith("$"):
+                return _evaluate_operator(op, arg, document)
+        return {key: evaluate(value, document) for key, value in expression.items()}
+    return expression
+
+def _evaluate_operator(op, arg, document):
+    if op == "$literal":
+        return arg
+    if op == "$cond":
+        if isinstance(arg, dict):
+            condition, then, otherwise = arg["if"], arg["then"], arg["else"]
+        else:
+            condition, then, otherwise = arg
+        return evaluate(then if _truthy(evaluate(condition, document)) else otherwise, document)
+    if op == "$switch":
+        for branch in arg["branches"]:
+            if _truthy(evaluate(branch["case"], document)):
+                return evaluate(branch["then"], document)
+        if "default" not in arg:
+            raise OperationFailure("$switch could not find a matching branch and has no default")
+        return evaluate(arg["default"], document)
+    if op == "$dateToString":
+        value = evaluate(arg["date"], document)
+        if value is None:
+            return arg.get("onNull")
+        return _format_date(value, arg.get("format", "%Y-%m-%dT%H:%M:%S.%LZ"))
+
+    values = [evaluate(item, document) for item in (arg if isinstance(arg, list) else [arg])]
+    if op == "$ifNull":
+        return next((value for value in values[:-1] if value is not None), values[-1])
+    if op == "$eq":
+        return sort_key(values[0]) == sort_key(values[1])
+    if op == "$ne":
+        return sort_key(values[0]) != sort_key(values[1])
+    if op == "$gt":
+        return sort_key(values[0]) > sort_key(values[1])
+    if op == "$gte":
+        return sort_key(values[0]) >= sort_key(values[1])
+    if op == "$lt":
+        return sort_key(values[0]) < sort_key(values[1])
+    if op == "$lte":
+        return sort_key(values[0]) <= sort_key(values[1])
+    if op == "$and":
+        return all(_truthy(value) for value in values)
+    if op == "$or":
+        return any(_truthy(value) for value in values)
+    if op == "$not":
+        return not _truthy(values[0])
+    if op == "$in":
+        return any(_same(values[0], item) for item in values[1])
+    if op == "$size":
+        return len(values[0])
+    if op == "$strLenCP":
+        return len(values[0])
+    if op == "$toLower":
+        return (values[0] or "").lower()
+    if op == "$toUpper":
+        return (values[0] or "").upper()
+    if op == "$concat":
+        return None if any(value is None for value in values) else "".join(values)
+    if op in ("$add", "$sum"):
+        if op == "$sum" and len(values) == 1 and isinstance(values[0], list):
+            values = values[0]
+        numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        dates = [value for value in values if isinstance(value, datetime)]
+        total = sum(numbers)
+        return dates[0] + timedelta(milliseconds=total) if dates else total
+    if op == "$subtract":
+        first, second = values
+        if isinstance(first, datetime) and isinstance(second, datetime):
+            return int((first - second).total_seconds() * 1000)
+        if isinstance(first, datetime):
+            return first - timedelta(milliseconds=second)
+        return first - second
+    if op == "$multiply":
+        product = 1
+        for value in values:
+            product *= value
+        return product
+    if op == "$divide":
+        return values[0] / values[1]
+    if op in ("$max", "$min"):
+        if len(values) == 1 and isinstance(values[0], list):
+            values = values[0]
+        present = [value for value in values if value is not None]
+        if not present:
+            return None
+        return (max if op == "$max" else min)(present, key=sort_key)
+    raise NotImplementedError(f"Aggregation operator {op} is not supported by the local replica")
+
+def _accumulate(op, values):
+    if op == "$sum":
+        return sum(value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool))
+    if op == "$avg":
+        numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        return sum(numbers) / len(numbers) if numbers else None
+    if op in ("$max", "$min"):
+        present = [value for value in values if value is not None]
+        if not present:
+            return None
+        return (max if op == "$max" else min)(present, key=sort_key)
+    if op == "$first":
+        return values[0] if values else None
+    if op == "$last":
+        return values[-1] if values else None
+    if op == "$push":
+        return list(values)
+    if op == "$addToSet":
+        unique = []
+        for value in values:
+            if not any(_same(value, existing) for existing in unique):
+                unique.append(value)
+        return unique
+    if op == "$count":
+        return len(values)
+    raise NotImplementedError(f"Accumulator {op} is not supported by the local replica")
+
+def _group(documents, spec):
+    groups = {}
+    for document in documents:
+        group_id = evaluate(spec["_id"], document)
+        group = groups.setdefault(_hashable(group_id), {"_id": group_id, "values": {}})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            op, expression = next(iter(accumulator.items()))
+            group["values"].setdefault(field, []).append(evaluate(expression, document) if op != "$count" else 1)
+
+    results = []
+    for group in groups.values():
+        row = {"_id": group["_id"]}
+        for field, accumulator in spec.items():
+            if field != "_id":
+                op = next(iter(accumulator))
+                row[field] = _accumulate(op, group["values"].get(field, []))
+        results.append(row)
+    return results
+
+def _is_flag(value, flag):
+    """Whether a $project value is a plain 1/true (flag=True) or 0/false (flag=False)."""
+    return isinstance(value, (bool, int, float)) and value in (0, 1) and bool(value) == flag
+
+def _project_stage(document, spec):
+    fields = {k: v for k, v in spec.items() if k != "_id"}
+    if fields and all(_is_flag(v, False) for v in fields.values()):
+        return project(document, spec)
+
+    result = {}
+    include_id = spec.get("_id", 1)
+    if _is_flag(include_id, True):
+        if "_id" in document:
+            result["_id"] = document["_id"]
+    elif not _is_flag(include_id, False):
+        result["_id"] = evaluate(include_id, document)
+
+    for field, expression in fields.items():
+        if _is_flag(expression, True):
+            value = get_path(document, field)
+            if value is not _MISSING:
+                set_path(result, field, deepcopy(value))
+        else:
+            set_path(result, field, evaluate(expression, document))
+    return result
+
+def _unwind(documents, spec):
+    path = spec if isinstance(spec, str) else spec["path"]
+    keep_empty = isinstance(spec, dict) and spec.get("preserveNullAndEmptyArrays", False)
+    field = path[1:]
+    results = []
+    for document in documents:
+        value = get_path(document, field)
+        if isinstance(value, list) and value:
+            for item in value:
+                copy = deepcopy(document)
+                set_path(copy, field, item)
+                results.append(copy)
+        elif value is _MISSING or value is None or value == []:
+            if keep_empty:
+                results.append(document)
+        else:
+            results.append(document)
+    return results
+
+def _lookup(documents, spec, resolve):
+    if "localField" not in spec:
+        raise NotImplementedError("Only localField/foreignField $lookup is supported by the local replica")
+    # Hash the foreign side once instead of scanning it for every local document
+    foreign = {}
+    for position, other in enumerate(resolve(spec["from"])):
+        value = get_path(other, spec["foreignField"])
+        for candidate in _candidates(value) or [None]:
+            foreign.setdefault(_hashable(candidate), {})[position] = other
+
+    results = []
+    for document in documents:
+        local = get_path(document, spec["localField"])
+        keys = local if isinstance(local, list) else [None if local is _MISSING else local]
+        joined = {}
+        for key in keys:
+            joined.update(foreign.get(_hashable(key), {}))
+        results.append({**document, spec["as"]: [deepcopy(joined[position]) for position in sorted(joined)]})
+    return results
+
+def aggregate_documents(documents, pipeline, resolve=None):
+    """Run an aggregation pipeline over a list of documents."""
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            documents = [document for document in documents if matches(document, spec)]
+        elif name == "$group":
+            documents = _group(documents, spec)
+        elif name == "$sort":
+            documents = sort_documents(list(documents), sort_spec(spec))
+        elif name == "$limit":
+            documents = documents[:spec]
+        elif name == "$skip":
+            documents = documents[spec:]
+        elif name == "$project":
+            documents = [_project_stage(document, spec) for document in documents]
+        elif name in ("$addFields", "$set"):
+            updated = []
+            for document in documents:
+                copy = deepcopy(document)
+                for field, expression in spec.items():
+                    set_path(copy, field, evaluate(expression, document))
+                updated.append(copy)
+            documents = updated
+        elif name == "$unset":
+            fields = [spec] if isinstance(spec, str) else spec
+            documents = [project(document, {field: 0 for field in fields}) for document in documents]
+        elif name == "$unwind":
+            documents = _unwind(documents, spec)
+        elif name == "$count":
+            documents = [{spec: len(documents)}] if documents else []
+        elif name == "$lookup":
+            documents = _lookup(documents, spec, resolve)
+        elif name == "$replaceRoot":
+            documents = [evaluate(spec["newRoot"], document) for document in documents]
+        else:
+            raise NotImplementedError(f"Pipeline stage {name} is not supported by the local replica")
+    return documents
+
+# ============================================================================
+# COLLECTION API
+# ============================================================================
+
+class LocalIndex:
+    """An index definition; unique indexes also keep a key -> document map."""
+
+    def __init__(self, name, keys, unique=False, partial=None, expire_after=None):
+        self.name = name
+        self.keys = keys
+        self.fields = [field for field, _ in keys]
+        self.unique = unique
+        self.partial = partial
+        self.expire_after = expire_after
+        self.entries = {}
+
+    def applies(self, document):
+        return self.partial is None or matches(document, self.partial)
+
+    def key(self, document):
+        values = []
+        for field in self.fields:
+            value = get_path(document, field)
+            values.append(_hashable(None if value is _MISSING else value))
+        return tuple(values)
+
+    def info(self):
+        info = {"key": self.keys}
+        if self.unique:
+            info["unique"] = True
+        if self.partial is not None:
+            info["partialFilterExpression"] = self.partial
+        if self.expire_after is not None:
+            info["expireAfterSeconds"] = self.expire_after
+        return info
+
+class LocalCursor:
+    """Lazy find() result supporting sort/skip/limit chaining."""
+
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def __iter__(self):
+        documents = self._collection._select(self._query, self._sort, self._skip, self._limit)
+        return iter([project(document, self._projection) for document in documents])
+
+class LocalCollection:
+    """pymongo-style collection backed by the local replica."""
+
+    def __init__(self, replica, name):
+        self._replica = replica
+        self.name = name
+
+    # ---- reads ----
+
+    def _select(self, query, sort=None, skip=0, limit=0):
+        self._replica.ensure_scope(self.name, query)
+        with self._replica._lock:
+            documents = [document for document in self._replica._scan(self.name, query) if matches(document, query)]
+        if sort:
+            sort_documents(documents, sort)
+        documents = documents[skip:]
+        return documents[:limit] if limit else documents
+
+    def find(self, filter=None, projection=None):
+        return LocalCursor(self, filter, projection)
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        documents = self._select(filter or {}, sort_spec(sort) if sort else None, limit=1)
+        return project(documents[0], projection) if documents else None
+
+    def count_documents(self, filter, skip=0, limit=0):
+        return len(self._select(filter, skip=skip, limit=limit))
+
+    def distinct(self, key, filter=None):
+        values = []
+        for document in self._select(filter or {}):
+            value = get_path(document, key)
+            for item in (value if isinstance(value, list) else [value]):
+                if item is not _MISSING and not any(_same(item, existing) for existing in values):
+                    values.append(item)
+        return values
+
+    def aggregate(self, pipeline):
+        first = pipeline[0].get("$match", {}) if pipeline else {}
+        documents = self._select(first)
+
+        def resolve(name):
+            return self._replica.collection(name)._select({})
+
+        return iter(deepcopy(aggregate_documents(documents, pipeline[1:] if first else pipeline, resolve)))
+
+    # ---- writes ----
+
+    def insert_one(self, document):
+        self._replica.ensure_scope(self.name, document)
+        document.setdefault("_id", ObjectId())
+        self._replica._put(self.name, document, insert=True)
+        return InsertOneResult(document["_id"], True)
+
+    def insert_many(self, documents, ordered=True):
+        errors = []
+        inserted = []
+        for index, document in enumerate(documents):
+            try:
+                inserted.append(self.insert_one(document).inserted_id)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e), "op": document})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors,
+                "writeConcernErrors": [],
+                "nInserted": len(inserted),
+                "nUpserted": 0,
+                "nMatched": 0,
+                "nModified": 0,
+                "nRemoved": 0,
+                "upserted": []
+            })
+        return InsertManyResult(inserted, True)
+
+    def _modify(self, filter, update, upsert=False, multi=False, sort=None, replace=False):
+        """Apply an update; returns (before, after) pairs plus the upserted _id."""
+        self._replica.ensure_scope(self.name, filter)
+        changes = []
+        operation = None
+        if self.name in self._replica.counters and not replace and not multi:
+            # Replayed on MongoDB as is, so concurrent increments are not overwritten
+            operation = {"filter": filter, "update": update, "upsert": upsert}
+        with self._replica._lock:
+            targets = self._select(filter, sort, limit=0 if multi else 1)
+            for current in targets:
+                if replace:
+                    updated = {"_id": current["_id"], **deepcopy(update)}
+                else:
+                    updated = apply_update(deepcopy(current), update)
+                after = current
+                if updated != current:
+                    after = self._replica._put(self.name, updated, operation=operation)
+                changes.append((current, after))
+
+            upserted_id = None
+            if not targets and upsert:
+                seed = upsert_seed(filter)
+                if replace:
+                    document = {**deepcopy(update)}
+                    if "_id" in seed:
+                        document.setdefault("_id", seed["_id"])
+                else:
+                    document = apply_update(seed, update, inserting=True)
+                document.setdefault("_id", ObjectId())
+                after = self._replica._put(self.name, document, insert=True, operation=operation)
+                upserted_id = document["_id"]
+                changes.append((None, after))
+        return changes, upserted_id
+
+    def _update_result(self, changes, upserted_id):
+        raw = {
+            "n": len(changes),
+            "nModified": sum(1 for before, after in changes if before is not None and after is not before),
+            "updatedExisting": upserted_id is None and bool(changes)
+        }
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    def update_one(self, filter, update, upsert=False):
+        return self._update_result(*self._modify(filter, update, upsert=upsert))
+
+    def update_many(self, filter, update, upsert=False):
+        return self._update_result(*self._modify(filter, update, upsert=upsert, multi=True))
+
+    def replace_one(self, filter, replacement, upsert=False):
+        return self._update_result(*self._modify(filter, replacement, upsert=upsert, replace=True))
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False, return_document=False):
+        changes, _ = self._modify(filter, update, upsert=upsert, sort=sort_spec(sort) if sort else None)
+        if not changes:
+            return None
+        before, after = changes[0]
+        document = after if return_document else before
+        return project(document, projection) if document is not None else None
+
+    def _remove(self, filter, multi):
+        with self._replica._lock:
+            targets = self._select(filter, limit=0 if multi else 1)
+            for document in targets:
+                self._replica._delete(self.name, doc_key(document["_id"]))
+        return targets
+
+    def find_one_and_delete(self, filter, projection=None):
+        targets = self._remove(filter, multi=False)
+        return project(targets[0], projection) if targets else None
+
+    def delete_one(self, filter):
+        return DeleteResult({"n": len(self._remove(filter, multi=False))}, True)
+
+    def delete_many(self, filter):
+        return DeleteResult({"n": len(self._remove(filter, multi=True))}, True)
+
+    # ---- indexes ----
+
+    def create_index(self, keys, unique=False, partialFilterExpression=None, expireAfterSeconds=None, name=None, **kwargs):
+        keys = sort_spec(keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        self._replica._add_index(self.name, LocalIndex(name, keys, unique, partialFilterExpression, expireAfterSeconds))
+        return name
+
+    def drop_index(self, name):
+        with self._replica._lock:
+            if self._replica._indexes.get(self.name, {}).pop(name, None) is None:
+                raise OperationFailure(f"index not found with name [{name}]", 27)
+
+    def index_information(self):
+        with self._replica._lock:
+            indexes = {"_id_": {"key": [("_id", 1)]}}
+            indexes.update({name: index.info() for name, index in self._replica._indexes.get(self.name, {}).items()})
+            return indexes
+
+class LocalDatabase:
+    """pymongo-style database whose collections live in the local replica."""
+
+    def __init__(self, replica):
+        self._replica = replica
+
+    def __getitem__(self, name):
+        return self._replica.collection(name)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._replica.collection(name)
+
+def _stamped(update):
+    """An update that also moves the document's updated_at, so other workers pull it."""
+    return {**update, "$set": {**update.get("$set", {}), "updated_at": datetime.now()}}
+
+def _request(key, seq, op, body):
+    """The bulk write request replaying one journal entry."""
+    _id = json_util.loads(key)
+    if op == "delete":
+        return DeleteOne({"_id": _id})
+    if op == "update":
+        operation = bson.decode(body)
+        return UpdateOne(operation["filter"], _stamped(operation["update"]), upsert=operation["upsert"])
+    document = bson.decode(body)
+    return ReplaceOne(
+        {"_id": _id, "$or": [
+            {"updated_at": {"$lte": document["updated_at"]}},
+            {"updated_at": {"$exists": False}}
+        ]},
+        document,
+        upsert=True
+    )
+
+# ============================================================================
+# REPLICA
+# ============================================================================
+
+class LocalReplica:
+    """SQLite-backed copy of the tracker's collections, synced with MongoDB in the background.
+
+    scopes maps each replicated collection to the field holding the email of
+    the user a document belongs to. The first time a user's data is touched in
+    this process it is pulled from MongoDB in full; afterwards only documents
+    whose updated_at moved are pulled, for users active recently, and every
+    resync_interval their data is pulled in full again.
+
+    counters names the collections whose updates are pushed as operators
+    rather than whole documents. sequences maps a collection to (field,
+    counter collection): the field is numbered from the counter document of
+    the owning user, and a number another writer already used is replaced
+    with a fresh one from MongoDB.
+    """
+
+    def __init__(self, path, scopes, connect, sync_interval=2.0, pull_interval=30.0,
+                 counters=(), sequences=None, resync_interval=300.0):
+        self.path = path
+        self.scopes = dict(scopes)
+        self.counters = set(counters)
+        self.sequences = dict(sequences or {})
+        self.sync_interval = sync_interval
+        self.pull_interval = pull_interval
+        self.resync_interval = resync_interval
+        self.remote = None
+        self.online = False
+        self.last_sync = None
+        self.last_error = None
+        self.conflicts = 0
+        self.db = LocalDatabase(self)
+
+        self._connect = connect
+        self._lock = threading.RLock()
+        self._documents = {}
+        self._by_scope = {}
+        self._indexes = {}
+        self._collections = {}
+        self._hydrated = {}
+        self._pending_scopes = set()
+        self._last_used = {}
+        self._last_pull = 0.0
+        self._last_resync = time.monotonic()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._sql = sqlite3.connect(path, check_same_thread=False)
+        self._sql.execute("PRAGMA journal_mode=WAL")
+        self._sql.execute("PRAGMA synchronous=NORMAL")
+        with self._sql:
+            self._sql.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "collection TEXT NOT NULL, doc_key TEXT NOT NULL, body BLOB NOT NULL, "
+                "PRIMARY KEY (collection, doc_key))"
+            )
+            self._sql.execute(
+                "CREATE TABLE IF NOT EXISTS journal ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, "
+                "doc_key TEXT NOT NULL, op TEXT NOT NULL, body BLOB)"
+            )
+        for collection, _, body in self._sql.execute("SELECT collection, doc_key, body FROM documents"):
+            self._index_document(collection, bson.decode(body))
+
+    def collection(self, name):
+        if name not in self._collections:
+            self._collections[name] = LocalCollection(self, name)
+        return self._collections[name]
+
+    # ---- local storage ----
+
+    def _scan(self, collection, query):
+        """Documents that could match a query, narrowed by _id or owning user."""
+        documents = self._documents.get(collection, {})
+        if "_id" in query and not _is_operator_dict(query["_id"]):
+            document = documents.get(doc_key(query["_id"]))
+            return [document] if document is not None else []
+        field = self.scopes.get(collection)
+        if field and field != "_id" and isinstance(query.get(field), str):
+            keys = self._by_scope.get(collection, {}).get(query[field], ())
+            return [documents[key] for key in keys]
+        return list(documents.values())
+
+    def _index_document(self, collection, document, previous=None):
+        """Add a stored document to the in-memory maps, replacing its previous version."""
+        key = doc_key(document["_id"])
+        field = self.scopes.get(collection)
+        if previous is not None:
+            self._unindex_document(collection, previous)
+        self._documents.setdefault(collection, {})[key] = document
+        if field and field != "_id" and isinstance(document.get(field), str):
+            self._by_scope.setdefault(collection, {}).setdefault(document[field], set()).add(key)
+        for index in self._indexes.get(collection, {}).values():
+            if index.unique and index.applies(document):
+                index.entries[index.key(document)] = key
+
+    def _unindex_document(self, collection, document):
+        key = doc_key(document["_id"])
+        field = self.scopes.get(collection)
+        self._documents.get(collection, {}).pop(key, None)
+        if field and field != "_id" and isinstance(document.get(field), str):
+            self._by_scope.get(collection, {}).get(document[field], set()).discard(key)
+        for index in self._indexes.get(collection, {}).values():
+            if index.unique and index.applies(document) and index.entries.get(index.key(document)) == key:
+                del index.entries[index.key(document)]
+
+    def _check_unique(self, collection, document, key, insert):
+        if insert and key in self._documents.get(collection, {}):
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {collection} index: _id_ dup key: {key}", 11000)
+        for index in self._indexes.get(collection, {}).values():
+            if index.unique and index.applies(document):
+                owner = index.entries.get(index.key(document))
+                if owner is not None and owner != key:
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error collection: {collection} index: {index.name}", 11000
+                    )
+
+    def _put(self, collection, document, insert=False, journal=True, operation=None):
+        """Store a document version, journaling it for MongoDB unless it came from there.
+
+        operation, when given, is journaled instead of the whole document.
+        """
+        key = doc_key(document["_id"])
+        with self._lock:
+            if journal:
+                document = {**document, "updated_at": datetime.now()}
+            body = bson.encode(document)
+            stored = bson.decode(body)
+            previous = self._documents.get(collection, {}).get(key)
+            if journal:
+                self._check_unique(collection, stored, key, insert)
+            else:
+                self._evict_conflicts(collection, stored, key)
+            with self._sql:
+                self._sql.execute(
+                    "INSERT OR REPLACE INTO documents (collection, doc_key, body) VALUES (?, ?, ?)",
+                    (collection, key, body)
+                )
+                if journal:
+                    self._sql.execute(
+                        "INSERT INTO journal (collection, doc_key, op, body) VALUES (?, ?, ?, ?)",
+                        (collection, key, "update", bson.encode(operation))
+                        if operation is not None else (collection, key, "upsert", body)
+                    )
+            self._index_document(collection, stored, previous)
+        if journal:
+            self._wake.set()
+        return stored
+
+    def _delete(self, collection, key, journal=True):
+        with self._lock:
+            document = self._documents.get(collection, {}).get(key)
+            with self._sql:
+                self._sql.execute("DELETE FROM documents WHERE collection = ? AND doc_key = ?", (collection, key))
+                if journal:
+                    self._sql.execute(
+                        "INSERT INTO journal (collection, doc_key, op) VALUES (?, ?, 'delete')",
+                        (collection, key)
+                    )
+            if document is not None:
+                self._unindex_document(collection, document)
+        if journal:
+            self._wake.set()
+
+    def _evict_conflicts(self, collection, document, key):
+        """Drop local copies that clash with an authoritative remote document."""
+        for index in self._indexes.get(collection, {}).values():
+            if index.unique and index.applies(document):
+                owner = index.entries.get(index.key(document))
+                if owner is not None and owner != key and not self._has_pending(collection, owner):
+                    self._delete(collection, owner, journal=False)
+
+    def _add_index(self, collection, index):
+        with self._lock:
+            indexes = self._indexes.setdefault(collection, {})
+            if index.name in indexes:
+                return
+            if index.unique:
+                for key, document in self._documents.get(collection, {}).items():
+                    if index.applies(document):
+                        index.entries[index.key(document)] = key
+            indexes[index.name] = index
+
+    def _has_pending(self, collection, key):
+        row = self._sql.execute(
+            "SELECT 1 FROM journal WHERE collection = ? AND doc_key = ? LIMIT 1", (collection, key)
+        ).fetchone()
+        return row is not None
+
+    # ---- scopes ----
+
+    def ensure_scope(self, collection, query):
+        """Pull a user's documents from MongoDB the first time they are touched."""
+        field = self.scopes.get(collection)
+        scope = (query or {}).get(field) if field else None
+        if not isinstance(scope, str):
+            return
+        self._last_used[scope] = time.monotonic()
+        if scope in self._hydrated:
+            return
+        if self.online:
+            try:
+                self._hydrate(scope)
+                return
+            except Exception as e:
+                self._mark_offline(e)
+        # Serve whatever is stored locally and let the sync thread pull the rest
+        self._pending_scopes.add(scope)
+        self._wake.set()
+
+    def _hydrate(self, scope):
+        started = datetime.now()
+        for collection, field in self.scopes.items():
+            remote_documents = list(self.remote[collection].find({field: scope}))
+            remote_keys = {doc_key(document["_id"]) for document in remote_documents}
+            with self._lock:
+                for document in remote_documents:
+                    self._merge_remote(collection, document)
+                # Documents deleted in MongoDB while this process was not watching
+                owned = [document for document in self._scan(collection, {field: scope}) if document.get(field) == scope]
+                for document in owned:
+                    key = doc_key(document["_id"])
+                    if key not in remote_keys and not self._has_pending(collection, key):
+                        self._delete(collection, key, journal=False)
+        self._hydrated[scope] = started
+        self._pending_scopes.discard(scope)
+
+    def _merge_remote(self, collection, document):
+        if not self._has_pending(collection, doc_key(document["_id"])):
+            self._put(collection, document, journal=False)
+
+    def _pull(self, full=False):
+        """Pull documents changed in MongoDB for recently active users (all of them when full)."""
+        cutoff = time.monotonic() - ACTIVE_SCOPE_SECONDS
+        for scope, pulled_at in list(self._hydrated.items()):
+            if self._last_used.get(scope, 0) < cutoff:
+                continue
+            if full:
+                self._hydrate(scope)
+                continue
+            started = datetime.now()
+            for collection, field in self.scopes.items():
+                changed = self.remote[collection].find({
+                    field: scope,
+                    "updated_at": {"$gt": pulled_at - PULL_OVERLAP}
+                })
+                for document in changed:
+                    with self._lock:
+                        self._merge_remote(collection, document)
+            self._hydrated[scope] = started
+
+    # ---- sync ----
+
+    def _push(self):
+        """Replay the journal to MongoDB.
+
+        Ordinary documents are pushed once, at their newest version; counter
+        collections replay every journaled write in order.
+        """
+        while True:
+            with self._lock:
+                rows = self._sql.execute(
+                    "SELECT seq, collection, doc_key, op, body FROM journal ORDER BY seq LIMIT ?",
+                    (SYNC_BATCH_SIZE,)
+                ).fetchall()
+            if not rows:
+                return
+
+            latest = {}
+            for seq, collection, key, op, body in rows:
+                latest[(collection, key)] = seq
+
+            by_collection = {}
+            for seq, collection, key, op, body in rows:
+                if collection not in self.counters and latest[(collection, key)] != seq:
+                    continue
+                by_collection.setdefault(collection, []).append((key, seq, op, body))
+
+            for collection, entries in by_collection.items():
+                if collection in self.counters:
+                    self._push_counters(collection, entries)
+                    continue
+                try:
+                    self.remote[collection].bulk_write([_request(*entry) for entry in entries], ordered=False)
+                except BulkWriteError as e:
+                    for error in e.details.get('writeErrors', []):
+                        if error['code'] != 11000:
+                            raise
+                        key, seq, _, _ = entries[error['index']]
+                        self._resolve_conflict(collection, key, seq)
+                with self._lock, self._sql:
+                    self._sql.executemany(
+                        "DELETE FROM journal WHERE collection = ? AND doc_key = ? AND seq <= ?",
+                        [(collection, key, seq) for key, seq, _, _ in entries]
+                    )
+
+            if len(rows) < SYNC_BATCH_SIZE:
+                return
+
+    def _push_counters(self, collection, entries):
+        """Apply a counter collection's journaled writes in order, then refresh the local copies."""
+        position = 0
+        while position < len(entries):
+            applied = len(entries)
+            failure = None
+            try:
+                self.remote[collection].bulk_write([_request(*entry) for entry in entries[position:]], ordered=True)
+            except BulkWriteError as e:
+                applied = position + e.details['writeErrors'][0]['index']
+                failure = e
+
+            # Forget what MongoDB applied before anything else can fail, so no write is replayed twice
+            with self._lock, self._sql:
+                self._sql.executemany(
+                    "DELETE FROM journal WHERE seq = ?",
+                    [(seq,) for _, seq, _, _ in entries[position:applied]]
+                )
+            if failure is None:
+                break
+
+            key, seq, op, body = entries[applied]
+            if failure.details['writeErrors'][0]['code'] != 11000:
+                raise failure
+            operation = bson.decode(body) if op == "update" else None
+            if operation and operation["upsert"]:
+                # Another writer created the document first; apply the update to theirs
+                self.remote[collection].update_one(operation["filter"], _stamped(operation["update"]))
+            else:
+                self._resolve_conflict(collection, key, seq)
+            with self._lock, self._sql:
+                self._sql.execute("DELETE FROM journal WHERE seq = ?", (seq,))
+            position = applied + 1
+
+        targets = {}
+        for key, _, op, body in entries:
+            targets[key] = bson.decode(body)["filter"] if op == "update" else {"_id": json_util.loads(key)}
+        for key, query in targets.items():
+            remote_document = self.remote[collection].find_one(query)
+            with self._lock:
+                if remote_document is None or self._has_pending(collection, key):
+                    continue
+                if doc_key(remote_document["_id"]) != key:
+                    # MongoDB already had this document under another _id
+                    self._delete(collection, key, journal=False)
+                self._put(collection, remote_document, journal=False)
+
+    def _resolve_conflict(self, collection, key, seq):
+        """A push lost: MongoDB holds a newer copy, or another document owns a unique key."""
+        self.conflicts += 1
+        remote_document = self.remote[collection].find_one({"_id": json_util.loads(key)})
+        with self._lock:
+            newer_local = self._sql.execute(
+                "SELECT 1 FROM journal WHERE collection = ? AND doc_key = ? AND seq > ? LIMIT 1",
+                (collection, key, seq)
+            ).fetchone()
+            if newer_local:
+                return
+            if remote_document is None and collection in self.sequences:
+                self._renumber(collection, key)
+                return
+            if remote_document is not None:
+                self._put(collection, remote_document, journal=False)
+            else:
+                self._delete(collection, key, journal=False)
+
+    def _renumber(self, collection, key):
+        """Give a document a sequence number no other writer has used, and push it again."""
+        field, counters = self.sequences[collection]
+        while True:
+            document = self._documents.get(collection, {}).get(key)
+            if document is None:
+                return
+            counter = self.remote[counters].find_one_and_update(
+                {"_id": document[self.scopes[collection]]},
+                {"$inc": {field: 1}, "$set": {"updated_at": datetime.now()}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            self._merge_remote(counters, counter)
+            try:
+                self._put(collection, {**document, field: counter[field]})
+                return
+            except DuplicateKeyError:
+                continue    # Taken locally too; draw the next number
+
+    def _expire(self):
+        """Apply TTL indexes locally; MongoDB runs its own TTL monitor."""
+        now = datetime.now()
+        with self._lock:
+            for collection, indexes in self._indexes.items():
+                for index in indexes.values():
+                    if index.expire_after is None:
+                        continue
+                    cutoff = now - timedelta(seconds=index.expire_after)
+                    for key, document in list(self._documents.get(collection, {}).items()):
+                        value = get_path(document, index.fields[0])
+                        if isinstance(value, datetime) and value < cutoff:
+                            self._delete(collection, key, journal=False)
+
+    def _mark_offline(self, error):
+        if self.online or self.last_error is None:
+            logger.warning("MongoDB unreachable, serving local data", extra={"error": str(error)})
+        self.online = False
+        self.last_error = str(error)
+
+    def _sync_once(self):
+        if self.remote is None:
+            self.remote = self._connect()
+        for scope in list(self._pending_scopes):
+            self._hydrate(scope)
+        self._push()
+        if time.monotonic() - self._last_pull >= self.pull_interval:
+            full = time.monotonic() - self._last_resync >= self.resync_interval
+            self._pull(full)
+            self._expire()
+            self._last_pull = time.monotonic()
+            if full:
+                self._last_resync = self._last_pull
+        if not self.online:
+            logger.info("Back online, local changes synced to MongoDB")
+        self.online = True
+        self.last_error = None
+        self.last_sync = datetime.now()
+
+    def _run(self):
+        delay = self.sync_interval
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            try:
+                self._sync_once()
+                delay = self.sync_interval
+            except Exception as e:
+                # Keep the journal and retry with backoff; the app keeps serving local data
+                self._mark_offline(e)
+                delay = min(max(delay, self.sync_interval) * 2, MAX_BACKOFF_SECONDS)
+
+    def start(self):
+        """Try to reach MongoDB once, then keep syncing in a background thread."""
+        try:
+            self._sync_once()
+        except Exception as e:
+            self._mark_offline(e)
+        self._thread = threading.Thread(target=self._run, name="local-replica-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def status(self):
+        """Sync state for display: connectivity, pending changes and conflicts."""
+        with self._lock:
+            pending = self._sql.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+        return {
+            "online": self.online,
+            "pending": pending,
+            "conflicts": self.conflicts,
+            "last_sync": self.last_sync,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,137 @@
+"""Cross-process tier of the tracker's per-user frame cache.
+
+SharedFrameStore keeps pickled DataFrames in a SQLite file opened by every
+app process on the host (SHARED_CACHE_PATH). A frame built by one worker is
+served to the others until the next write of its kind, so a user's data is
+queried from MongoDB once per change instead of once per worker.
+
+Writes bump a per-(user, kind) generation and append an invalidation message
+in the same transaction. Each process polls the messages to drop its own
+in-memory copies, and a frame is only published if no write of its kind
+landed while it was being built.
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+
+# Invalidation messages are kept this long; a process that falls further
+# behind drops its whole in-memory tier instead of replaying them
+INVALIDATION_RETENTION_SECONDS = 3600
+
+# Expired frames and old messages are deleted at most this often
+PRUNE_INTERVAL_SECONDS = 60
+
+class SharedFrameStore:
+    """Per-user frames and their invalidation log, shared through one SQLite file."""
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self._own = set()       # seqs of messages this process wrote, already applied locally
+
+        self._sql = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._sql.execute("PRAGMA journal_mode=WAL")
+        self._sql.execute("PRAGMA synchronous=NORMAL")
+        with self._sql:
+            self._sql.execute(
+                "CREATE TABLE IF NOT EXISTS frames ("
+                "user_email TEXT NOT NULL, kind TEXT NOT NULL, variant TEXT NOT NULL, "
+                "generation INTEGER NOT NULL, built_at REAL NOT NULL, body BLOB NOT NULL, "
+                "PRIMARY KEY (user_email, kind, variant))"
+            )
+            self._sql.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                "user_email TEXT NOT NULL, kind TEXT NOT NULL, generation INTEGER NOT NULL, "
+                "PRIMARY KEY (user_email, kind))"
+            )
+            self._sql.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, user_email TEXT NOT NULL, "
+                "kind TEXT NOT NULL, at REAL NOT NULL)"
+            )
+
+        # A new process has nothing in memory yet, so only later messages matter
+        self._last_seq = self._sql.execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+
+    def poll(self):
+        """(user_email, kind) pairs invalidated by any process since the last poll.
+
+        Returns None when messages were pruned before this process saw them.
+        """
+        with self._lock:
+            rows = self._sql.execute(
+                "SELECT seq, user_email, kind FROM invalidations WHERE seq > ? ORDER BY seq",
+                (self._last_seq,)
+            ).fetchall()
+            if not rows:
+                return []
+            missed = rows[0][0] > self._last_seq + 1
+            self._last_seq = rows[-1][0]
+            messages = [(user_email, kind) for seq, user_email, kind in rows if seq not in self._own]
+            self._own.difference_update(seq for seq, _, _ in rows)
+        return None if missed else messages
+
+    def generation(self, user_email, kind):
+        """Writes recorded so far for a user's frames of one kind."""
+        with self._lock:
+            row = self._sql.execute(
+                "SELECT generation FROM generations WHERE user_email = ? AND kind = ?",
+                (user_email, kind)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, user_email, key, generation):
+        """The shared frame for a key if it is current for generation, else None."""
+        with self._lock:
+            row = self._sql.execute(
+                "SELECT generation, built_at, body FROM frames WHERE user_email = ? AND kind = ? AND variant = ?",
+                (user_email, key[0], repr(key[1]))
+            ).fetchone()
+        if row is None or row[0] != generation or time.time() - row[1] >= self.ttl:
+            return None
+        return pickle.loads(row[2])
+
+    def put(self, user_email, key, generation, frame):
+        """Publish a frame built at generation, unless a write has made it stale since."""
+        body = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock, self._sql:
+            self._sql.execute(
+                "INSERT OR REPLACE INTO frames (user_email, kind, variant, generation, built_at, body) "
+                "SELECT ?, ?, ?, ?, ?, ? WHERE COALESCE("
+                "(SELECT generation FROM generations WHERE user_email = ? AND kind = ?), 0) = ?",
+                (user_email, key[0], repr(key[1]), generation, time.time(), body, user_email, key[0], generation)
+            )
+            self._prune()
+
+    def invalidate(self, user_email, kind):
+        """Record a write to a user's frames of one kind for every process."""
+        with self._lock, self._sql:
+            self._sql.execute(
+                "INSERT INTO generations (user_email, kind, generation) VALUES (?, ?, 1) "
+                "ON CONFLICT (user_email, kind) DO UPDATE SET generation = generation + 1",
+                (user_email, kind)
+            )
+            self._sql.execute("DELETE FROM frames WHERE user_email = ? AND kind = ?", (user_email, kind))
+            message = self._sql.execute(
+                "INSERT INTO invalidations (user_email, kind, at) VALUES (?, ?, ?)",
+                (user_email, kind, time.time())
+            )
+            self._own.add(message.lastrowid)
+
+    def _prune(self):
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        self._sql.execute("DELETE FROM frames WHERE built_at < ?", (now - self.ttl,))
+        self._sql.execute("DELETE FROM invalidations WHERE at < ?", (now - INVALIDATION_RETENTION_SECONDS,))
+
+    def stats(self):
+        """Frames and bytes held in the shared file."""
+        with self._lock:
+            frames, size = self._sql.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM frames").fetchone()
+        return {"frames": frames, "bytes": size}
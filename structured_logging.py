@@ -0,0 +1,110 @@
+"""Structured, non-blocking logging for the tracker.
+
+configure() attaches a QueueHandler to the tracker's loggers, so a log call
+only puts the record on an in-memory queue; a QueueListener thread formats
+each record as one JSON object per line and writes it to stderr. Records
+carry the correlation id of the Streamlit rerun or API request that emitted
+them (see correlation()).
+
+Fields whose names look like credentials are redacted, and passwords
+embedded in connection strings are masked in messages and tracebacks.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Correlation id of the rerun or request being served by the current thread
+correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+# Extra fields whose names contain any of these are never written out
+SENSITIVE_FIELDS = ("password", "secret", "token", "credential", "authorization", "uri")
+
+# user:password@ in connection strings
+CONNECTION_CREDENTIALS = re.compile(r"(\w+(?:\+\w+)?://)[^/@\s:]+(?::[^/@\s]*)?@")
+
+# Attributes every LogRecord has; anything else was passed through extra=
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "correlation_id"}
+
+_lock = threading.Lock()
+_listener = None
+
+def scrub(text):
+    """Mask credentials embedded in connection strings."""
+    return CONNECTION_CREDENTIALS.sub(r"\1[redacted]@", text)
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: timestamp, level, logger, message, correlation id and extra fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": scrub(record.getMessage()),
+            "correlation_id": getattr(record, "correlation_id", None),
+            "thread": record.threadName
+        }
+        for field, value in vars(record).items():
+            if field in RECORD_ATTRIBUTES or field.startswith("_"):
+                continue
+            if any(word in field.lower() for word in SENSITIVE_FIELDS):
+                value = "[redacted]"
+            elif isinstance(value, str):
+                value = scrub(value)
+            entry[field] = value
+        if record.exc_info:
+            entry["exc"] = scrub(self.formatException(record.exc_info))
+        elif record.exc_text:
+            entry["exc"] = scrub(record.exc_text)
+        return json.dumps(entry, default=str)
+
+class CorrelationHandler(logging.handlers.QueueHandler):
+    """QueueHandler that stamps records with the caller's correlation id before queueing them."""
+
+    def prepare(self, record):
+        # Runs on the calling thread inside emit(), so it only reads the context
+        # variable; the queue stays in this process, so the record keeps its args
+        # and exc_info and the listener thread merges, renders and encodes them
+        record.correlation_id = correlation_id.get()
+        return record
+
+def configure(logger_names, level="INFO", stream=None):
+    """Route the named loggers through one background JSON writer (idempotent)."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        records = queue.SimpleQueue()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter())
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        handler = CorrelationHandler(records)
+        for name in logger_names:
+            logger = logging.getLogger(name)
+            logger.setLevel(level)
+            logger.addHandler(handler)
+            logger.propagate = False
+        return _listener
+
+@contextmanager
+def correlation(value=None):
+    """Tag every record logged inside the block with one correlation id."""
+    token = correlation_id.set(value or uuid.uuid4().hex[:12])
+    try:
+        yield correlation_id.get()
+    finally:
+        correlation_id.reset(token)